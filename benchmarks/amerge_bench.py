@@ -0,0 +1,75 @@
+# Micro-benchmark of `amerge` (task per item) against `StreamMultiplexer` (pump per
+# source), merging several fast streams the way the agent merges mic, upstream and
+# tool events.
+#
+# Usage:
+#   python benchmarks/amerge_bench.py [--sources 3] [--items 20000] [--repeat 5]
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from langchain_openai_voice.utils import StreamMultiplexer, amerge  # noqa: E402
+
+
+async def source(items: int) -> AsyncIterator[int]:
+    for i in range(items):
+        # 다른 task에 양보해서 실제 socket 수신처럼 동작
+        if i % 8 == 0:
+            await asyncio.sleep(0)
+        yield i
+
+
+async def run(kind: str, sources: int, items: int) -> tuple[float, int, int]:
+    loop = asyncio.get_running_loop()
+    created = 0
+    default_factory = loop.get_task_factory()
+
+    def counting_factory(loop, coro, **kwargs):
+        nonlocal created
+        created += 1
+        if default_factory is not None:
+            return default_factory(loop, coro, **kwargs)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    loop.set_task_factory(counting_factory)
+    streams = {f"s{i}": source(items) for i in range(sources)}
+    merged = (
+        amerge(**streams)
+        if kind == "amerge"
+        else StreamMultiplexer(streams, priorities={"s0": 0})
+    )
+    received = 0
+    started = time.perf_counter()
+    async for _ in merged:
+        received += 1
+    elapsed = time.perf_counter() - started
+    loop.set_task_factory(default_factory)
+    return elapsed, received, created
+
+
+def main(sources: int, items: int, repeat: int) -> None:
+    print(f"{sources} sources x {items} items, best of {repeat}")
+    print(f"{'impl':18} {'items/s':>12} {'µs/item':>9} {'tasks':>9}")
+    for kind in ("amerge", "StreamMultiplexer"):
+        results = [asyncio.run(run(kind, sources, items)) for _ in range(repeat)]
+        elapsed, received, created = min(results)
+        print(
+            f"{kind:18} {received / elapsed:12.0f} "
+            f"{elapsed / received * 1e6:9.2f} {created:9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="amerge vs StreamMultiplexer")
+    parser.add_argument("--sources", type=int, default=3)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.sources, args.items, args.repeat)
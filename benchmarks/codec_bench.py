@@ -0,0 +1,105 @@
+# Per-event encode/decode cost of each installed JSON codec backend
+#
+# Usage:
+#   python benchmarks/codec_bench.py [--number 20000]
+
+import argparse
+import base64
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from langchain_openai_voice.codec import available_codecs  # noqa: E402
+
+# 100 ms of 24kHz PCM16, the browser's mic frame size
+PCM = bytes((i * 7) & 0xFF for i in range(4800))
+AUDIO = base64.b64encode(PCM).decode("ascii")
+
+EVENTS: Dict[str, Any] = {
+    "response.audio.delta": {
+        "type": "response.audio.delta",
+        "event_id": "event_AJ3B2hzNA5Tn8oDS9tjMb",
+        "response_id": "resp_AJ3B2mT0qZ1hTwp9vMfZk",
+        "item_id": "item_AJ3B2CRsZ3sHNlv7jQXCD",
+        "output_index": 0,
+        "content_index": 0,
+        "delta": AUDIO,
+    },
+    "input_audio_buffer.append": {
+        "type": "input_audio_buffer.append",
+        "audio": AUDIO,
+    },
+    "response.audio_transcript.done": {
+        "type": "response.audio_transcript.done",
+        "event_id": "event_AJ3B4v7Ijz7G5zWc0Xm7o",
+        "response_id": "resp_AJ3B2mT0qZ1hTwp9vMfZk",
+        "item_id": "item_AJ3B2CRsZ3sHNlv7jQXCD",
+        "output_index": 0,
+        "content_index": 0,
+        "transcript": "서울의 오늘 날씨는 맑고 최고 기온은 23도입니다.",
+    },
+    "response.function_call_arguments.done": {
+        "type": "response.function_call_arguments.done",
+        "event_id": "event_AJ3B3Wp6sTVM6v9LxDrsf",
+        "response_id": "resp_AJ3B2mT0qZ1hTwp9vMfZk",
+        "item_id": "item_AJ3B3dMTuYk2XXPpX5wJZ",
+        "output_index": 0,
+        "call_id": "call_Xy7J1bK2lMnOpQrS",
+        "name": "tavily_search_results_json",
+        "arguments": '{"query": "weather in Seoul today"}',
+    },
+    "response.done": {
+        "type": "response.done",
+        "event_id": "event_AJ3B5Yt0jwQ8kFzTbXr3H",
+        "response": {
+            "id": "resp_AJ3B2mT0qZ1hTwp9vMfZk",
+            "object": "realtime.response",
+            "status": "completed",
+            "output": [
+                {
+                    "id": "item_AJ3B2CRsZ3sHNlv7jQXCD",
+                    "object": "realtime.item",
+                    "type": "message",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [
+                        {
+                            "type": "audio",
+                            "transcript": "서울의 오늘 날씨는 맑습니다.",
+                        }
+                    ],
+                }
+            ],
+            "usage": {
+                "total_tokens": 1534,
+                "input_tokens": 1240,
+                "output_tokens": 294,
+            },
+        },
+    },
+}
+
+
+def main(number: int) -> None:
+    codecs = available_codecs()
+    print(f"backends: {', '.join(codecs)}  (µs per event, {number} iterations)")
+    print(f"{'event':40} {'backend':8} {'bytes':>7} {'encode':>8} {'decode':>8}")
+    for event_name, event in EVENTS.items():
+        for name, codec in codecs.items():
+            encoded = codec.dumps(event)
+            encode = timeit.timeit(lambda: codec.dumps(event), number=number)
+            decode = timeit.timeit(lambda: codec.loads(encoded), number=number)
+            print(
+                f"{event_name:40} {name:8} {len(encoded.encode()):7} "
+                f"{encode / number * 1e6:8.2f} {decode / number * 1e6:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON codec benchmark")
+    parser.add_argument("--number", type=int, default=20000)
+    main(parser.parse_args().number)
@@ -0,0 +1,464 @@
+# Load generator for the /ws relay, driven against the local fake Realtime API
+#
+# Usage:
+#   python benchmarks/loadgen.py --sessions 50 --duration 30 --spawn-server
+#
+# The fake upstream runs inside this process. With --spawn-server, the Starlette app
+# is started as a child process pointed at it through OPENAI_REALTIME_URL, and its
+# CPU time and RSS are sampled from /proc (or psutil when installed).
+
+import argparse
+import asyncio
+import base64
+import bisect
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import websockets  # noqa: E402
+
+from langchain_openai_voice.fake_upstream import BYTES_PER_MS, FakeRealtimeServer  # noqa: E402
+
+MIC_FRAME_MS = 100
+# Mirrors server.backend.audio_frames, which needs Starlette to import
+FRAME_HEADER_SIZE = 8
+INPUT_AUDIO_FRAME = 1
+# --listeners용 VOICE_LISTEN_TOKEN (직접 띄운 서버에도 같은 값을 지정)
+LISTEN_TOKEN = "loadgen"
+
+
+class ProcessSampler:
+    """Reads cumulative CPU seconds and RSS bytes of a process."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            import psutil
+
+            self._process = psutil.Process(pid)
+        except ImportError:
+            self._process = None
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def sample(self) -> tuple[float, int]:
+        if self._process is not None:
+            cpu = self._process.cpu_times()
+            return cpu.user + cpu.system, self._process.memory_info().rss
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self._ticks
+        rss = 0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+        return cpu_seconds, rss
+
+
+class SessionStats:
+    def __init__(self) -> None:
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.audio_frames_received = 0
+        self.audio_bytes_received = 0
+        self.latencies: List[float] = []
+        self.first_audio: Optional[float] = None
+        self.speech_stopped_at: Optional[float] = None
+        self.turn_latencies: List[float] = []
+        self.upstream_errors = 0
+        self.queued = False
+        self.busy = False
+        self.listener_frames_received = 0
+        self.error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_port(host: str, port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def spawn_server(
+    port: int,
+    upstream_url: str,
+    pool_size: int,
+    context_max_tokens: int = 0,
+    max_sessions: int = 0,
+    listen_token: str = "",
+) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")])
+    )
+    env["OPENAI_REALTIME_URL"] = upstream_url
+    env["REALTIME_POOL_SIZE"] = str(pool_size)
+    if context_max_tokens > 0:
+        env["VOICE_CONTEXT_MAX_TOKENS"] = str(context_max_tokens)
+    if max_sessions > 0:
+        env["VOICE_MAX_SESSIONS"] = str(max_sessions)
+    if listen_token:
+        env["VOICE_LISTEN_TOKEN"] = listen_token
+    env.setdefault("OPENAI_API_KEY", "fake")
+    env.setdefault("TAVILY_API_KEY", "fake")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "server.app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def run_session(
+    index: int,
+    url: str,
+    upstream: FakeRealtimeServer,
+    stop_at: float,
+    stats: SessionStats,
+    binary: bool,
+    listeners: int = 0,
+    listen_token: str = "",
+) -> None:
+    tag = f"loadgen-session-{index}"
+    sizes, sent_at = upstream.delta_log(tag)
+    pcm = bytes(MIC_FRAME_MS * BYTES_PER_MS)
+    json_mic_frame = json.dumps(
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm).decode()}
+    )
+
+    listener_tasks: List[asyncio.Task] = []
+
+    async def listen(session_id: str) -> None:
+        # 같은 대화를 듣기만 하는 websocket (감독/QA)
+        listen_url = f"{url}/listen/{session_id}?token={listen_token}"
+        async with websockets.connect(
+            listen_url, max_size=None, compression=None
+        ) as ws:
+            async for _ in ws:
+                stats.listener_frames_received += 1
+
+    async def receive(websocket: Any) -> None:
+        async for raw in websocket:
+            now = time.perf_counter()
+            stats.frames_received += 1
+            if isinstance(raw, bytes):
+                audio_bytes = len(raw) - FRAME_HEADER_SIZE
+            else:
+                event = json.loads(raw)
+                if event.get("type") == "error":
+                    stats.upstream_errors += 1
+                elif event.get("type") == "session.queued":
+                    stats.queued = True
+                elif event.get("type") == "session.busy":
+                    stats.busy = True
+                elif event.get("type") == "session.configured":
+                    listener_tasks.extend(
+                        asyncio.create_task(listen(event["session_id"]))
+                        for _ in range(listeners)
+                    )
+                if event.get("type") == "input_audio_buffer.speech_stopped":
+                    stats.speech_stopped_at = now
+                if event.get("type") != "response.audio.delta":
+                    continue
+                audio_bytes = len(event["delta"]) * 3 // 4
+            if stats.first_audio is None:
+                stats.first_audio = now - opened_at
+            if stats.speech_stopped_at is not None:
+                stats.turn_latencies.append(now - stats.speech_stopped_at)
+                stats.speech_stopped_at = None
+            stats.audio_frames_received += 1
+            stats.audio_bytes_received += audio_bytes
+            i = bisect.bisect_left(sizes, stats.audio_bytes_received)
+            if i < len(sent_at):
+                stats.latencies.append(now - sent_at[i])
+
+    try:
+        opened_at = time.perf_counter()
+        async with websockets.connect(url, max_size=None, compression=None) as ws:
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "initial_settings",
+                        "instructions": tag,
+                        "binary_audio": binary,
+                    }
+                )
+            )
+            receiver = asyncio.create_task(receive(ws))
+            next_frame = time.perf_counter()
+            sequence = 0
+            while time.perf_counter() < stop_at and not receiver.done():
+                if binary:
+                    header = struct.pack("<B3xI", INPUT_AUDIO_FRAME, sequence)
+                    await ws.send(header + pcm)
+                    sequence += 1
+                else:
+                    await ws.send(json_mic_frame)
+                stats.frames_sent += 1
+                next_frame += MIC_FRAME_MS / 1000
+                await asyncio.sleep(max(0.0, next_frame - time.perf_counter()))
+            receiver.cancel()
+    except Exception as e:
+        stats.error = f"{type(e).__name__}: {e}"
+    finally:
+        for task in listener_tasks:
+            task.cancel()
+        await asyncio.gather(*listener_tasks, return_exceptions=True)
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    upstream = FakeRealtimeServer(
+        port=args.upstream_port,
+        speech_ms=args.speech_ms,
+        response_deltas=args.response_deltas,
+        delta_bytes=args.delta_bytes,
+        delta_interval_ms=args.delta_interval_ms,
+        tool_call_every=args.tool_call_every,
+        connect_delay_ms=args.connect_delay_ms,
+        latency_per_1k_tokens_ms=args.latency_per_1k_tokens_ms,
+        barge_in_ms=args.barge_in_ms,
+        argument_delta_interval_ms=args.argument_delta_interval_ms,
+        rate_limit_requests=args.rate_limit_requests,
+        rate_limit_window_s=args.rate_limit_window_s,
+    )
+    await upstream.start()
+
+    server = None
+    server_url = args.server_url
+    sampler = ProcessSampler(args.server_pid) if args.server_pid else None
+    if args.spawn_server:
+        port = free_port()
+        server = spawn_server(
+            port,
+            upstream.url,
+            args.pool_size,
+            args.context_max_tokens,
+            args.max_sessions,
+            LISTEN_TOKEN if args.listeners else "",
+        )
+        server_url = f"ws://127.0.0.1:{port}/ws"
+        await wait_for_port("127.0.0.1", port, timeout=30)
+        sampler = ProcessSampler(server.pid)
+
+    try:
+        cpu_start, rss_start = sampler.sample() if sampler else (0.0, 0)
+        started = time.perf_counter()
+        stop_at = started + args.duration
+        stats = [SessionStats() for _ in range(args.sessions)]
+        tasks = []
+        for i, session_stats in enumerate(stats):
+            tasks.append(
+                asyncio.create_task(
+                    run_session(
+                        i,
+                        server_url,
+                        upstream,
+                        stop_at,
+                        session_stats,
+                        args.binary,
+                        args.listeners,
+                        LISTEN_TOKEN,
+                    )
+                )
+            )
+            await asyncio.sleep(args.ramp / max(1, args.sessions))
+        rss_peak = rss_start
+        while not all(task.done() for task in tasks):
+            await asyncio.sleep(0.5)
+            if sampler:
+                rss_peak = max(rss_peak, sampler.sample()[1])
+        elapsed = time.perf_counter() - started
+        cpu_end, _ = sampler.sample() if sampler else (0.0, 0)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        await upstream.aclose()
+
+    latencies = [x * 1000 for s in stats for x in s.latencies]
+    first_audio = [s.first_audio * 1000 for s in stats if s.first_audio is not None]
+    audio_frames = sum(s.audio_frames_received for s in stats)
+    # 대화가 길어질수록 응답이 느려지는지 보기 위해 세션별 처음/마지막 3턴을 비교
+    first_turns = [x * 1000 for s in stats for x in s.turn_latencies[:3]]
+    last_turns = [x * 1000 for s in stats for x in s.turn_latencies[-3:]]
+    errors = [s.error for s in stats if s.error]
+    report: Dict[str, Any] = {
+        "sessions": args.sessions,
+        "duration_s": round(elapsed, 2),
+        "errors": len(errors),
+        "upstream_errors": sum(s.upstream_errors for s in stats),
+        "sessions_queued": sum(s.queued for s in stats),
+        "sessions_busy": sum(s.busy for s in stats),
+        "mic_frames_sent": sum(s.frames_sent for s in stats),
+        "frames_received": sum(s.frames_received for s in stats),
+        "listener_frames_received": sum(s.listener_frames_received for s in stats),
+        "audio_frames_per_s": round(audio_frames / elapsed, 1),
+        "audio_kb_per_session": round(
+            sum(s.audio_bytes_received for s in stats) / 1024 / args.sessions, 1
+        ),
+        "audio_frames_per_s_per_session": round(
+            audio_frames / elapsed / args.sessions, 2
+        ),
+        "turns": sum(len(s.turn_latencies) for s in stats),
+        "turn_latency_first_3_p50_ms": round(percentile(first_turns, 50), 2),
+        "turn_latency_last_3_p50_ms": round(percentile(last_turns, 50), 2),
+        "relay_latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "samples": len(latencies),
+        },
+        "first_audio_ms": {
+            "p50": round(percentile(first_audio, 50), 2),
+            "p95": round(percentile(first_audio, 95), 2),
+            "p99": round(percentile(first_audio, 99), 2),
+            "samples": len(first_audio),
+        },
+    }
+    if sampler:
+        cpu_percent = (cpu_end - cpu_start) / elapsed * 100
+        report["server_cpu_percent"] = round(cpu_percent, 1)
+        report["server_cpu_percent_per_session"] = round(cpu_percent / args.sessions, 3)
+        report["server_rss_mb"] = round(rss_peak / 2**20, 1)
+        report["server_rss_kb_per_session"] = round(
+            (rss_peak - rss_start) / 1024 / args.sessions, 1
+        )
+    if errors:
+        report["first_error"] = errors[0]
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    latencies = {key: report.pop(key) for key in ("relay_latency_ms", "first_audio_ms")}
+    for key, value in report.items():
+        print(f"{key:32} {value}")
+    for key, latency in latencies.items():
+        print(
+            f"{key:32} p50={latency['p50']} p95={latency['p95']} "
+            f"p99={latency['p99']} (n={latency['samples']})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Concurrent /ws session load generator"
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument(
+        "--ramp", type=float, default=2.0, help="seconds to open all sessions"
+    )
+    parser.add_argument("--server-url", default="ws://127.0.0.1:3000/ws")
+    parser.add_argument("--server-pid", type=int, help="sample CPU/RSS of this process")
+    parser.add_argument("--spawn-server", action="store_true")
+    parser.add_argument(
+        "--binary", action="store_true", help="use binary audio frames on /ws"
+    )
+    parser.add_argument("--upstream-port", type=int, default=0)
+    parser.add_argument("--speech-ms", type=int, default=1000)
+    parser.add_argument("--response-deltas", type=int, default=25)
+    parser.add_argument("--delta-bytes", type=int, default=4800)
+    parser.add_argument("--delta-interval-ms", type=float, default=20.0)
+    parser.add_argument("--tool-call-every", type=int, default=0)
+    parser.add_argument(
+        "--connect-delay-ms",
+        type=float,
+        default=0.0,
+        help="simulated upstream handshake cost",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="REALTIME_POOL_SIZE of the spawned server",
+    )
+    parser.add_argument(
+        "--latency-per-1k-tokens-ms",
+        type=float,
+        default=0.0,
+        help="simulated response latency growth with the conversation size",
+    )
+    parser.add_argument(
+        "--barge-in-ms",
+        type=int,
+        default=0,
+        help="mic audio during a reply that makes the fake upstream detect speech",
+    )
+    parser.add_argument(
+        "--argument-delta-interval-ms",
+        type=float,
+        default=0.0,
+        help="delay between the fake upstream's function call argument deltas",
+    )
+    parser.add_argument(
+        "--rate-limit-requests",
+        type=int,
+        default=0,
+        help="responses the fake upstream allows per window across all sessions",
+    )
+    parser.add_argument("--rate-limit-window-s", type=float, default=10.0)
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=0,
+        help="VOICE_MAX_SESSIONS of the spawned server",
+    )
+    parser.add_argument(
+        "--listeners",
+        type=int,
+        default=0,
+        help="read-only listeners per session (server needs VOICE_LISTEN_TOKEN=loadgen)",
+    )
+    parser.add_argument(
+        "--context-max-tokens",
+        type=int,
+        default=0,
+        help="VOICE_CONTEXT_MAX_TOKENS of the spawned server",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
@@ -0,0 +1,172 @@
+# Replays a recorded session through OpenAIVoiceReactAgent against the fake upstream
+#
+# Usage:
+#   python benchmarks/replay.py recordings/20261017-101500-1a2b3c4d.ndjson.gz
+#       [--speed 1] [--repeat 3] [--live-tools] [--coalesce-max-bytes 9600] [--json]
+#
+# Record sessions by starting the server with VOICE_RECORD_DIR set. Upstream events
+# are replayed by FakeRealtimeServer in scripted mode, and mic events are fed to the
+# agent at their recorded times. --speed 0 replays as fast as possible. Tool calls are
+# answered with the recorded outputs and latencies unless --live-tools is given.
+
+import argparse
+import asyncio
+import bisect
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from langchain_openai_voice import OpenAIVoiceReactAgent  # noqa: E402
+from langchain_openai_voice import codec  # noqa: E402
+from langchain_openai_voice.constants import OUTPUT_AUDIO_EVENT  # noqa: E402
+from langchain_openai_voice.fake_upstream import FakeRealtimeServer  # noqa: E402
+from langchain_openai_voice.recording import (  # noqa: E402
+    RecordedTool,
+    load_recording,
+    recorded_audio_bytes,
+    upstream_script,
+)
+from langchain_openai_voice.utils import extract_string_field, sniff_event_type  # noqa: E402
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def replay_once(path: str, args: argparse.Namespace, run: int) -> Dict[str, Any]:
+    header, events = load_recording(path)
+    tag = f"replay-{run}"
+    upstream = FakeRealtimeServer(script=upstream_script(events), speed=args.speed)
+    await upstream.start()
+    expected_audio = recorded_audio_bytes(events)
+    sizes, sent_at = upstream.delta_log(tag)
+
+    if args.live_tools:
+        from langchain_openai_voice.tools import TOOLS
+
+        tools = TOOLS
+    else:
+        tools = RecordedTool.from_recording(header, events, speed=args.speed)
+
+    received = {"frames": 0, "audio_bytes": 0}
+    latencies: List[float] = []
+    audio_done = asyncio.Event()
+
+    async def send_output_chunk(chunk: str) -> None:
+        now = time.perf_counter()
+        received["frames"] += 1
+        if sniff_event_type(chunk) != OUTPUT_AUDIO_EVENT:
+            return
+        received["audio_bytes"] += (
+            len(extract_string_field(chunk, "delta") or "") * 3 // 4
+        )
+        i = bisect.bisect_left(sizes, received["audio_bytes"])
+        if i < len(sent_at):
+            latencies.append(now - sent_at[i])
+        if received["audio_bytes"] >= expected_audio:
+            audio_done.set()
+
+    async def input_stream() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        for t, stream, event in events:
+            if stream != "input_mic":
+                continue
+            if args.speed > 0:
+                delay = started + t / args.speed - time.perf_counter()
+                await asyncio.sleep(max(0.0, delay))
+            yield event if isinstance(event, str) else codec.dumps(event)
+        await upstream.script_finished()
+        try:
+            await asyncio.wait_for(audio_done.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+        yield codec.dumps({"type": "end_of_conversation"})
+
+    session = header.get("session", {})
+    agent = OpenAIVoiceReactAgent(
+        model=header.get("model", "gpt-4o-realtime-preview"),
+        api_key="replay",
+        instructions=tag,
+        tools=tools,
+        url=upstream.url,
+        coalesce_max_bytes=args.coalesce_max_bytes,
+    )
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    try:
+        await agent.aconnect(input_stream(), send_output_chunk)
+    finally:
+        await upstream.aclose()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    metrics = agent.session_metrics()
+    latencies_ms = [x * 1000 for x in latencies]
+    ttfa_ms = [x * 1000 for x in metrics["time_to_first_audio_s"]]
+    recorded_duration = events[-1][0] if events else 0.0
+    return {
+        "recording": path,
+        "tools": len(session.get("tools", [])),
+        "events": len(events),
+        "recorded_duration_s": round(recorded_duration, 2),
+        "replay_duration_s": round(elapsed, 3),
+        "cpu_ms": round(cpu * 1000, 1),
+        "cpu_us_per_event": round(cpu / max(1, len(events)) * 1e6, 1),
+        "frames_to_client": received["frames"],
+        "audio_complete": received["audio_bytes"] >= expected_audio,
+        "relay_latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p95": round(percentile(latencies_ms, 95), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "samples": len(latencies_ms),
+        },
+        "time_to_first_audio_ms": [round(x, 1) for x in ttfa_ms],
+        "tool_calls": metrics["tool_calls"],
+    }
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    return [await replay_once(args.recording, args, run) for run in range(args.repeat)]
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report.pop("relay_latency_ms")
+    for key, value in report.items():
+        print(f"{key:24} {value}")
+    print(
+        f"{'relay_latency_ms':24} p50={latency['p50']} p95={latency['p95']} "
+        f"p99={latency['p99']} (n={latency['samples']})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded voice session")
+    parser.add_argument("recording")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed, 0 for max speed"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--live-tools", action="store_true", help="run the real tools from tools.py"
+    )
+    parser.add_argument("--coalesce-max-bytes", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for i, report in enumerate(reports):
+            if i:
+                print()
+            print_report(report)
@@ -0,0 +1,113 @@
+# Worker startup and per-session setup cost of the server
+#
+# Usage:
+#   python benchmarks/startup_bench.py [--repeat 5] [--sessions 1000]
+#
+# Each worker boot is measured in a fresh interpreter: the time to import
+# `server.app`, and the time for a spawned uvicorn worker to accept connections.
+# Session setup is measured in this process: building the agent, its session
+# settings and the serialized `session.update` event, for the first session
+# (which builds the tools) and on average afterwards.
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from loadgen import free_port, wait_for_port  # noqa: E402
+
+IMPORT_APP = (
+    "import time; started = time.perf_counter(); import server.app; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def server_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")])
+    )
+    env.setdefault("OPENAI_API_KEY", "fake")
+    env.setdefault("TAVILY_API_KEY", "fake")
+    env.setdefault("PYTHONWARNINGS", "ignore")
+    return env
+
+
+def import_seconds() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP],
+        cwd=ROOT,
+        env=server_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+async def boot_seconds() -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "server.app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=server_env(),
+    )
+    try:
+        await wait_for_port("127.0.0.1", port, timeout=60)
+        return time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def session_setup(sessions: int) -> tuple[float, float]:
+    os.environ.update({k: v for k, v in server_env().items() if k.endswith("_KEY")})
+    from server.router.websocket import create_agent
+
+    def setup() -> None:
+        agent = create_agent("You are a helpful assistant.")
+        agent._session_update(agent.session_config())
+
+    started = time.perf_counter()
+    setup()
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(sessions):
+        setup()
+    return first, (time.perf_counter() - started) / sessions
+
+
+def main(args: argparse.Namespace) -> None:
+    imports = [import_seconds() for _ in range(args.repeat)]
+    boots = [asyncio.run(boot_seconds()) for _ in range(args.repeat)]
+    first, mean = session_setup(args.sessions)
+    print(f"import server.app (ms)     p50={statistics.median(imports) * 1000:8.1f}")
+    print(f"worker accepting (ms)      p50={statistics.median(boots) * 1000:8.1f}")
+    print(f"first session setup (ms)   {first * 1000:12.2f}")
+    print(f"session setup (µs)         {mean * 1e6:12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sessions", type=int, default=1000)
+    main(parser.parse_args())
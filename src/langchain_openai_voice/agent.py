@@ -1,20 +1,50 @@
 # Core class implementing the OpenAI voice-based conversational agent
 
 import asyncio
-import json
-from typing import AsyncIterator, Any, Callable, Coroutine, Dict, List
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Any, Callable, Coroutine, Dict, List, Set, Tuple
 
+import websockets
 from langchain_core.tools import BaseTool
 from langchain_core._api import beta
 from langchain_core.utils import secret_from_env
 
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, Field, PrivateAttr, SecretStr
 
-from .constants import DEFAULT_MODEL, DEFAULT_URL, EVENTS_TO_IGNORE
-from .utils import amerge, parse_json_safely
-from .tool_executor import VoiceToolExecutor
+from . import codec
+from .coalescer import AudioCoalescer
+from .constants import (
+    DEFAULT_MODEL,
+    DEFAULT_URL,
+    EVENTS_TO_IGNORE,
+    INPUT_AUDIO_EVENT,
+    OUTPUT_AUDIO_EVENT,
+    STREAM_PRIORITIES,
+)
+from .context import ContextBudget
+from .utils import (
+    IncrementalJSONScanner,
+    StreamMultiplexer,
+    extract_string_field,
+    parse_json_safely,
+    sniff_event_type,
+)
+from .execution import ToolExecutionPolicy, ToolExecutionPools
+from .metrics import ACTIVE_SESSIONS, MIC_AUDIO, SESSIONS, SessionMetrics
+from .pool import UpstreamPool
+from .recording import SessionRecorder
+from .registry import ToolRegistry, tool_definition
+from .tool_cache import ToolResultCache
+from .tool_executor import VoiceToolExecutor, function_call_output
+from .tracing import SESSION_ID
+from .transcripts import TranscriptStore
+from .vad import BYTES_PER_MS, SilenceGate
 from .websocket import connect
 
+logger = logging.getLogger(__name__)
+
 
 @beta()
 class OpenAIVoiceReactAgent(BaseModel):
@@ -28,8 +58,42 @@ class OpenAIVoiceReactAgent(BaseModel):
         model (str): The name of the OpenAI model to use.
         api_key (SecretStr): The API key for authenticating with OpenAI.
         instructions (str | None): Optional instructions for the agent.
-        tools (List[BaseTool] | None): Optional list of tools the agent can use.
+        tools (List[BaseTool] | ToolRegistry | None): Optional tools the agent can
+            use. A registry shared across sessions builds its tools on first use
+            and computes their definitions and the `session.update` event once.
         url (str): The URL for the OpenAI API.
+        coalesce_max_bytes (int): Merge consecutive audio appends and deltas until
+            this many PCM bytes are pending. 0 disables coalescing.
+        coalesce_max_delay_ms (float): The longest time an audio event is held for
+            coalescing before being flushed.
+        stream_queue_size (int): The number of events buffered per input stream
+            before backpressure is applied to it.
+        max_concurrent_tools (int): The maximum number of tools running at once.
+        tool_timeout (float | None): Seconds a tool may run. None disables it.
+        tool_timeouts (Dict[str, float]): Per-tool timeouts overriding tool_timeout.
+        ordered_tool_outputs (bool): Return tool outputs in call order rather than
+            completion order.
+        tool_cache (ToolResultCache | None): An optional tool result cache, shared
+            across sessions.
+        tool_policies (Dict[str, ToolExecutionPolicy]): Per-tool execution policies.
+        tool_pools (ToolExecutionPools | None): Thread and process pools used by the
+            execution policies, shared across sessions.
+        upstream_pool (UpstreamPool | None): An optional pool of pre-connected
+            sessions. When it has a matching connection ready, the handshake is
+            skipped and only the session settings that differ are sent.
+        recorder (SessionRecorder | None): Records every event relayed between the
+            client, the model and the tools, for offline replay.
+        silence_gate (SilenceGate | None): Drops silent mic frames instead of
+            sending them to the model. Its state is reset on every connection.
+        context_budget (ContextBudget | None): Prunes old conversation items once
+            the model reports more tokens than its budget. Its state is reset on
+            every connection.
+        transcript_store (TranscriptStore | None): Persists the transcripts, tool
+            calls and outcome of each conversation, shared across sessions.
+        session_id (str): The id of the conversation in the transcript store.
+        on_rate_limits (Callable[[List[Dict[str, Any]]], None] | None): Called with
+            the `rate_limits` of every `rate_limits.updated` event, e.g. to hold
+            back new sessions while the upstream budget is low.
     """
 
     model: str = Field(default=DEFAULT_MODEL)
@@ -38,8 +102,41 @@ class OpenAIVoiceReactAgent(BaseModel):
         default_factory=secret_from_env("OPENAI_API_KEY", default=""),
     )
     instructions: str | None = None
-    tools: List[BaseTool] | None = None
+    tools: List[BaseTool] | ToolRegistry | None = None
     url: str = Field(default=DEFAULT_URL)
+    coalesce_max_bytes: int = 0
+    coalesce_max_delay_ms: float = 30.0
+    stream_queue_size: int = 64
+    max_concurrent_tools: int = 4
+    tool_timeout: float | None = 30.0
+    tool_timeouts: Dict[str, float] = Field(default_factory=dict)
+    ordered_tool_outputs: bool = False
+    tool_cache: ToolResultCache | None = None
+    tool_policies: Dict[str, ToolExecutionPolicy] = Field(default_factory=dict)
+    tool_pools: ToolExecutionPools | None = None
+    upstream_pool: UpstreamPool | None = None
+    recorder: SessionRecorder | None = None
+    silence_gate: SilenceGate | None = None
+    context_budget: ContextBudget | None = None
+    transcript_store: TranscriptStore | None = None
+    session_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    on_rate_limits: Callable[[List[Dict[str, Any]]], None] | None = None
+
+    _multiplexer: StreamMultiplexer | None = PrivateAttr(default=None)
+    _pending_tool_calls: Set[str] = PrivateAttr(default_factory=set)
+    _tool_outputs_sent: bool = PrivateAttr(default=False)
+    _response_in_progress: bool = PrivateAttr(default=False)
+    _coalescers: Dict[str, AudioCoalescer] = PrivateAttr(default_factory=dict)
+    _metrics: SessionMetrics = PrivateAttr(default_factory=SessionMetrics)
+    # 현재 재생 중인 응답 오디오 (끼어들기 시 실제로 재생된 만큼만 남기기 위함)
+    _audio_item_id: str | None = PrivateAttr(default=None)
+    _audio_started_at: float | None = PrivateAttr(default=None)
+    _audio_sent_ms: float = PrivateAttr(default=0.0)
+    _dropping_item_id: str | None = PrivateAttr(default=None)
+    # 인자를 스트리밍 중인 speculative 도구 호출: call_id -> (도구 이름, scanner)
+    _speculations: Dict[str, Tuple[str, IncrementalJSONScanner]] = PrivateAttr(
+        default_factory=dict
+    )
 
     async def aconnect(
         self,
@@ -57,62 +154,432 @@ class OpenAIVoiceReactAgent(BaseModel):
         Returns:
             None
         """
-        tools_by_name = {tool.name: tool for tool in self.tools or []}
-        tool_executor = VoiceToolExecutor(tools_by_name=tools_by_name)
+        if isinstance(self.tools, ToolRegistry):
+            if not self.tools.loaded:
+                # 도구 import와 생성은 느리고 registry lock을 기다릴 수도 있으므로
+                # event loop 밖에서 (preload 중이면 그 완료를 기다림)
+                await asyncio.to_thread(self.tools.load)
+            tools_by_name = self.tools.tools_by_name()
+        else:
+            tools_by_name = {tool.name: tool for tool in self.tools or []}
+        self._coalescers = {}
+        self._pending_tool_calls = set()
+        self._tool_outputs_sent = False
+        self._response_in_progress = False
+        self._audio_item_id = None
+        self._audio_started_at = None
+        self._audio_sent_ms = 0.0
+        self._dropping_item_id = None
+        self._speculations = {}
+        self._metrics = SessionMetrics()
+        if self.silence_gate is not None:
+            self.silence_gate.reset()
+        if self.context_budget is not None:
+            self.context_budget.reset()
+        tool_executor = VoiceToolExecutor(
+            tools_by_name=tools_by_name,
+            max_concurrency=self.max_concurrent_tools,
+            default_timeout=self.tool_timeout,
+            tool_timeouts=self.tool_timeouts,
+            ordered=self.ordered_tool_outputs,
+            cache=self.tool_cache,
+            policies=self.tool_policies,
+            pools=self.tool_pools,
+            metrics=self._metrics,
+        )
 
-        async with connect(
-            model=self.model, api_key=self.api_key.get_secret_value(), url=self.url
-        ) as (model_send, model_receive_stream):
-            tool_defs = [
-                {
-                    "type": "function",
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": {"type": "object", "properties": tool.args},
-                }
-                for tool in tools_by_name.values()
-            ]
-            await model_send(
-                {
-                    "type": "session.update",
-                    "session": {
-                        "instructions": self.instructions,
-                        "input_audio_transcription": {"model": "whisper-1"},
-                        "tools": tool_defs,
-                    },
-                }
+        session = self.session_config()
+        if self.recorder is not None:
+            self.recorder.start({"model": self.model, "session": session})
+        if self.transcript_store is not None:
+            self.transcript_store.begin_session(
+                self.session_id,
+                {"model": self.model, "instructions": self.instructions},
             )
+        websocket = None
+        if self.upstream_pool is not None:
+            pooled = self.upstream_pool.acquire(self.model, self.url)
+            if pooled is not None:
+                websocket, pooled_session = pooled
+                # 풀에서 이미 적용된 설정은 다시 보내지 않음
+                session = {
+                    key: value
+                    for key, value in session.items()
+                    if pooled_session.get(key) != value
+                }
 
-            while True:
-                async for stream_key, data_raw in amerge(
-                    input_mic=input_stream,
-                    output_speaker=model_receive_stream,
-                    tool_outputs=tool_executor.output_iterator(),
-                ):
-                    data = (
-                        parse_json_safely(data_raw)
-                        if isinstance(data_raw, str)
-                        else data_raw
+        send_to_client = send_output_chunk
+
+        async def send_output_chunk(chunk: str) -> None:
+            await send_to_client(chunk)
+            self._metrics.frame("client_out", len(chunk))
+
+        ACTIVE_SESSIONS.inc()
+        outcome = "closed"
+        # 이후 만드는 task와 callback은 모두 이 대화의 것으로 표시됨
+        session_token = SESSION_ID.set(self.session_id)
+        try:
+            async with connect(
+                model=self.model,
+                api_key=self.api_key.get_secret_value(),
+                url=self.url,
+                websocket=websocket,
+                metrics=self._metrics,
+            ) as (model_send, model_receive_stream):
+                if session:
+                    await model_send(self._session_update(session))
+
+                if self.coalesce_max_bytes > 0:
+                    model_send = self._coalesce(model_send, INPUT_AUDIO_EVENT, "audio")
+                    send_output_chunk = self._coalesce(
+                        send_output_chunk, OUTPUT_AUDIO_EVENT, "delta", "item_id"
                     )
 
+                try:
+                    await self._relay(
+                        input_stream,
+                        model_send,
+                        model_receive_stream,
+                        send_output_chunk,
+                        tool_executor,
+                    )
+                except BaseException:
+                    for coalescer in self._coalescers.values():
+                        coalescer.discard()
+                    raise
+                finally:
+                    await tool_executor.aclose()
+                    for coalescer in self._coalescers.values():
+                        await coalescer.aclose()
+        except (OSError, websockets.WebSocketException):
+            # 브라우저 연결 종료는 정상 종료("closed")로 집계
+            outcome = "upstream_error"
+            self._metrics.upstream_error("connection")
+            raise
+        finally:
+            SESSION_ID.reset(session_token)
+            ACTIVE_SESSIONS.dec()
+            SESSIONS.inc(outcome=outcome)
+            if self.silence_gate is not None:
+                stats = self.silence_gate.stats()
+                MIC_AUDIO.inc(stats["audio_ms_out"], decision="forwarded")
+                MIC_AUDIO.inc(
+                    stats["audio_ms_in"] - stats["audio_ms_out"], decision="suppressed"
+                )
+            if self.recorder is not None:
+                await self.recorder.aclose()
+            if self.transcript_store is not None:
+                self.transcript_store.end_session(
+                    self.session_id, outcome, self._metrics.summary()
+                )
+
+    def session_config(self) -> Dict[str, Any]:
+        """
+        Returns the session settings sent to the model in `session.update`.
+
+        Returns:
+            Dict[str, Any]: The instructions, transcription settings and tool
+                definitions of the agent.
+        """
+        if isinstance(self.tools, ToolRegistry):
+            tool_defs = self.tools.definitions()
+        else:
+            tool_defs = [tool_definition(tool) for tool in self.tools or []]
+        return {
+            "instructions": self.instructions,
+            "input_audio_transcription": {"model": "whisper-1"},
+            "tools": tool_defs,
+        }
+
+    def _session_update(self, session: Dict[str, Any]) -> Dict[str, Any] | str:
+        if isinstance(self.tools, ToolRegistry):
+            return self.tools.session_update(session)
+        return {"type": "session.update", "session": session}
+
+    def _coalesce(
+        self,
+        send: Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]],
+        event_type: str,
+        payload_key: str,
+        group_key: str | None = None,
+    ) -> AudioCoalescer:
+        """
+        Wraps a send coroutine function with an audio coalescing stage.
+
+        Args:
+            send (Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]): The
+                send coroutine function to wrap.
+            event_type (str): The audio event type to merge.
+            payload_key (str): The key holding the base64 audio payload.
+            group_key (str | None): Only events sharing this key's value are merged.
+
+        Returns:
+            AudioCoalescer: The coalescing send coroutine function.
+        """
+        coalescer = AudioCoalescer(
+            send=send,
+            event_type=event_type,
+            payload_key=payload_key,
+            group_key=group_key,
+            max_bytes=self.coalesce_max_bytes,
+            max_delay_ms=self.coalesce_max_delay_ms,
+        )
+        self._coalescers[event_type] = coalescer
+        return coalescer
+
+    def coalescing_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the audio coalescing statistics of the current session.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Statistics indexed by audio event type.
+        """
+        return {key: c.stats() for key, c in self._coalescers.items()}
+
+    def session_metrics(self) -> Dict[str, Any]:
+        """
+        Returns the latency and throughput metrics of the current session.
+
+        Returns:
+            Dict[str, Any]: See `SessionMetrics.summary`.
+        """
+        return self._metrics.summary()
+
+    def silence_stats(self) -> Dict[str, float]:
+        """
+        Returns the silence gate statistics of the current session.
+
+        Returns:
+            Dict[str, float]: See `SilenceGate.stats`, or an empty dict when the
+                gate is disabled.
+        """
+        return self.silence_gate.stats() if self.silence_gate else {}
+
+    def context_stats(self) -> Dict[str, float]:
+        """
+        Returns the context budget statistics of the current session.
+
+        Returns:
+            Dict[str, float]: See `ContextBudget.stats`, or an empty dict when the
+                budget is disabled.
+        """
+        return self.context_budget.stats() if self.context_budget else {}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """
+        Returns the number of events waiting to be relayed from each stream.
+
+        Returns:
+            Dict[str, int]: Queue depths indexed by stream key.
+        """
+        return self._multiplexer.depths() if self._multiplexer else {}
+
+    async def _relay(
+        self,
+        input_stream: AsyncIterator[str],
+        model_send: Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]],
+        model_receive_stream: AsyncIterator[Dict[str, Any] | str],
+        send_output_chunk: Callable[[str], Coroutine[Any, Any, None]],
+        tool_executor: VoiceToolExecutor,
+    ) -> None:
+        """
+        Relays events between the client, the OpenAI API and the tool executor.
+
+        Args:
+            input_stream (AsyncIterator[str]): An async iterator providing input data.
+            model_send (Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]):
+                A coroutine function for sending data to the model.
+            model_receive_stream (AsyncIterator[Dict[str, Any] | str]): An async
+                iterator of events received from the model.
+            send_output_chunk (Callable[[str], Coroutine[Any, Any, None]]):
+                A coroutine function for sending output chunks.
+            tool_executor (VoiceToolExecutor): An instance of VoiceToolExecutor for
+                executing tools.
+
+        Returns:
+            None
+        """
+        self._multiplexer = StreamMultiplexer(
+            {
+                "input_mic": input_stream,
+                "output_speaker": model_receive_stream,
+                "tool_outputs": tool_executor.output_iterator(),
+            },
+            priorities=STREAM_PRIORITIES,
+            maxsize=self.stream_queue_size,
+        )
+        try:
+            async for stream_key, data_raw in self._multiplexer:
+                if self.recorder is not None:
+                    self.recorder.record(stream_key, data_raw)
+                if isinstance(data_raw, str):
                     if stream_key == "input_mic":
-                        if data.get("type") == "start_listening":
-                            await model_send({"type": "input_audio_buffer.start"})
-                            print("Start listening for new input")
+                        self._metrics.frame("client_in", len(data_raw))
+                    # 오디오 프레임은 파싱 없이 원본 문자열 그대로 전달
+                    event_type = sniff_event_type(data_raw)
+                    if stream_key == "input_mic" and event_type == INPUT_AUDIO_EVENT:
+                        if self.silence_gate is None:
+                            await model_send(data_raw)
                         else:
-                            await model_send(data)
-                    elif stream_key == "tool_outputs":
-                        print("Tool output:", data)
+                            for event in self.silence_gate.process(data_raw):
+                                await model_send(event)
+                        continue
+                    if (
+                        stream_key == "output_speaker"
+                        and event_type == OUTPUT_AUDIO_EVENT
+                    ):
+                        delta_ms = self._audio_delta_ms(data_raw)
+                        if self._dropping_item_id is not None and (
+                            extract_string_field(data_raw, "item_id")
+                            == self._dropping_item_id
+                        ):
+                            # 취소된 응답의 남은 오디오는 클라이언트로 보내지 않음
+                            self._metrics.audio_discarded(delta_ms)
+                            continue
+                        if self._audio_started_at is None:
+                            self._audio_started_at = time.monotonic()
+                        self._audio_sent_ms += delta_ms
+                        self._metrics.audio_delta()
+                        if self.context_budget is not None:
+                            self.context_budget.audio_delta(len(data_raw))
+                        await send_output_chunk(data_raw)
+                        continue
+                    data = parse_json_safely(data_raw)
+                else:
+                    data = data_raw
+
+                if stream_key == "input_mic":
+                    if data.get("type") == "start_listening":
+                        await model_send({"type": "input_audio_buffer.start"})
+                        logger.debug("Start listening for new input")
+                    else:
                         await model_send(data)
-                        await model_send({"type": "response.create", "response": {}})
-                    elif stream_key == "output_speaker":
-                        await self._handle_output_speaker(
-                            data, model_send, send_output_chunk, tool_executor
-                        )
+                elif stream_key == "tool_outputs":
+                    if data["item"]["call_id"] not in self._pending_tool_calls:
+                        # 끼어들기로 취소된 호출은 이미 취소 결과를 보냈음
+                        continue
+                    logger.debug("Tool output: %s", data["item"]["call_id"])
+                    self._persist(
+                        "tool_output",
+                        {
+                            "call_id": data["item"]["call_id"],
+                            "output": data["item"]["output"],
+                        },
+                    )
+                    await model_send(data)
+                    self._pending_tool_calls.discard(data["item"]["call_id"])
+                    self._tool_outputs_sent = True
+                    await self._request_tool_response(model_send)
+                elif stream_key == "output_speaker":
+                    await self._handle_output_speaker(
+                        data, model_send, send_output_chunk, tool_executor
+                    )
+
+                # 대화 종료 조건 확인 (필요한 경우)
+                if data.get("type") == "end_of_conversation":
+                    return
+        finally:
+            # return으로 빠져나와도 pump task가 남지 않도록 정리
+            self._multiplexer.close()
+
+    async def _request_tool_response(
+        self, model_send: Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]
+    ) -> None:
+        """
+        Asks the model to respond once every tool call of the turn has an output.
 
-                    # 대화 종료 조건 확인 (필요한 경우)
-                    if data.get("type") == "end_of_conversation":
-                        return
+        Parallel tool calls are answered with a single `response.create`, sent after
+        the last output and after the response that issued the calls is done.
+
+        Args:
+            model_send (Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]):
+                A coroutine function for sending data to the model.
+        """
+        if (
+            self._tool_outputs_sent
+            and not self._pending_tool_calls
+            and not self._response_in_progress
+        ):
+            self._tool_outputs_sent = False
+            self._response_in_progress = True
+            await model_send({"type": "response.create", "response": {}})
+
+    async def _interrupt(
+        self,
+        model_send: Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]],
+        tool_executor: VoiceToolExecutor,
+    ) -> None:
+        """
+        Stops the current reply when the user starts speaking over it.
+
+        The response in progress is cancelled, and the assistant item is truncated
+        to the audio the client has played, assuming playback started with the
+        first delta and runs in real time. Audio still buffered for coalescing or
+        in flight from the model is dropped, and pending tool calls are cancelled
+        and answered with an error output.
+
+        Args:
+            model_send (Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]):
+                A coroutine function for sending data to the model.
+            tool_executor (VoiceToolExecutor): The executor running the tool calls.
+        """
+        interrupted = False
+        if self._response_in_progress:
+            await model_send({"type": "response.cancel"})
+            self._dropping_item_id = self._audio_item_id
+            interrupted = True
+
+        if self._audio_item_id is not None and self._audio_started_at is not None:
+            elapsed_ms = (time.monotonic() - self._audio_started_at) * 1000
+            if elapsed_ms < self._audio_sent_ms:
+                await model_send(
+                    {
+                        "type": "conversation.item.truncate",
+                        "item_id": self._audio_item_id,
+                        "content_index": 0,
+                        "audio_end_ms": int(elapsed_ms),
+                    }
+                )
+                self._metrics.audio_discarded(self._audio_sent_ms - elapsed_ms)
+                interrupted = True
+        self._audio_item_id = None
+        self._audio_started_at = None
+        self._audio_sent_ms = 0.0
+
+        coalescer = self._coalescers.get(OUTPUT_AUDIO_EVENT)
+        if coalescer is not None:
+            coalescer.discard()
+        # 인자가 스트리밍되는 도중 시작한 호출은 아직 pending이 아니므로 따로 취소
+        self._speculations.clear()
+        tool_executor.cancel_speculations()
+
+        if self._pending_tool_calls:
+            tool_executor.cancel_all()
+            for call_id in sorted(self._pending_tool_calls):
+                output = function_call_output(
+                    call_id, "Error: cancelled because the user interrupted"
+                )
+                self._persist(
+                    "tool_output",
+                    {"call_id": call_id, "output": output["item"]["output"]},
+                )
+                await model_send(output)
+            self._pending_tool_calls.clear()
+            interrupted = True
+        self._tool_outputs_sent = False
+
+        if interrupted:
+            logger.debug("Interrupted by user speech")
+            self._metrics.interruption()
+
+    def _persist(self, kind: str, data: Dict[str, Any]) -> None:
+        if self.transcript_store is not None:
+            self.transcript_store.record(self.session_id, kind, data)
+
+    @staticmethod
+    def _audio_delta_ms(event: str) -> float:
+        delta = extract_string_field(event, "delta")
+        return len(delta or "") * 3 / 4 / BYTES_PER_MS
 
     async def _handle_output_speaker(
         self,
@@ -137,21 +604,55 @@ class OpenAIVoiceReactAgent(BaseModel):
             None
         """
         t = data["type"]
+        if self.context_budget is not None:
+            self.context_budget.observe(data)
         if t == "response.audio.delta":
-            await send_output_chunk(json.dumps(data))
-        elif t == "response.audio_buffer.speech_started":
-            print("Interrupt")
-            await send_output_chunk(json.dumps(data))
+            self._metrics.audio_delta()
+            await send_output_chunk(codec.dumps(data))
+        elif t == "input_audio_buffer.speech_started":
+            await self._interrupt(model_send, tool_executor)
+            # 클라이언트는 이 이벤트를 받으면 재생 중인 오디오를 비움
+            await send_output_chunk(codec.dumps({"type": t}))
         elif t == "error":
-            print("Error:", data)
-            await send_output_chunk(json.dumps({"type": "error", "message": str(data)}))
+            logger.warning("Error: %s", data)
+            self._metrics.upstream_error(data.get("error", {}).get("type", "unknown"))
+            await send_output_chunk(
+                codec.dumps({"type": "error", "message": str(data)})
+            )
+        elif t == "response.function_call_arguments.delta":
+            speculation = self._speculations.get(data.get("call_id"))
+            if speculation is not None and speculation[1].feed(data.get("delta", "")):
+                # 인자가 완전한 JSON이 되면 done 이벤트를 기다리지 않고 바로 실행
+                del self._speculations[data["call_id"]]
+                name, scanner = speculation
+                await tool_executor.speculate(
+                    {
+                        "name": name,
+                        "call_id": data["call_id"],
+                        "arguments": scanner.text,
+                    }
+                )
         elif t == "response.function_call_arguments.done":
-            print("Tool call:", data)
+            logger.info("Tool call: %s(%s)", data.get("name"), data.get("arguments"))
+            self._speculations.pop(data["call_id"], None)
+            self._persist(
+                "tool_call",
+                {
+                    "call_id": data["call_id"],
+                    "name": data.get("name"),
+                    "arguments": data.get("arguments"),
+                },
+            )
+            self._pending_tool_calls.add(data["call_id"])
             await tool_executor.add_tool_call(data)
         elif t == "response.audio_transcript.done":
-            print("Model:", data["transcript"])
+            logger.debug("Model: %s", data["transcript"])
+            self._persist(
+                "assistant",
+                {"item_id": data.get("item_id"), "transcript": data["transcript"]},
+            )
             await send_output_chunk(
-                json.dumps(
+                codec.dumps(
                     {
                         "type": "transcript",
                         "transcript": data["transcript"],
@@ -160,9 +661,13 @@ class OpenAIVoiceReactAgent(BaseModel):
                 )
             )
         elif t == "conversation.item.input_audio_transcription.completed":
-            print("User:", data["transcript"])
+            logger.debug("User: %s", data["transcript"])
+            self._persist(
+                "user",
+                {"item_id": data.get("item_id"), "transcript": data["transcript"]},
+            )
             await send_output_chunk(
-                json.dumps(
+                codec.dumps(
                     {
                         "type": "transcript",
                         "transcript": data["transcript"],
@@ -170,20 +675,45 @@ class OpenAIVoiceReactAgent(BaseModel):
                     }
                 )
             )
+        elif t == "response.created":
+            self._response_in_progress = True
         elif t == "response.done":
+            self._response_in_progress = False
+            self._dropping_item_id = None
             # AI의 응답이 끝났음을 알리는 메시지 추가
-            await send_output_chunk(json.dumps({"type": "end_of_turn"}))
-        elif t in [
-            "input_audio_buffer.speech_started",
-            "input_audio_buffer.speech_stopped",
-            "input_audio_buffer.committed",
-            "response.output_item.added",
-        ]:
+            await send_output_chunk(codec.dumps({"type": "end_of_turn"}))
+            # 다음 응답을 요청하기 전에 오래된 대화 항목을 정리
+            if self.context_budget is not None:
+                for event in self.context_budget.prune():
+                    await model_send(event)
+            await self._request_tool_response(model_send)
+        elif t == "input_audio_buffer.speech_stopped":
+            self._metrics.speech_stopped()
+            await send_output_chunk(codec.dumps({"type": t}))
+        elif t == "response.output_item.added":
+            item = data.get("item", {})
+            if item.get("type") == "message":
+                self._audio_item_id = item.get("id")
+                self._audio_started_at = None
+                self._audio_sent_ms = 0.0
+            elif item.get("type") == "function_call" and tool_executor.can_speculate(
+                item.get("name", "")
+            ):
+                self._speculations[item["call_id"]] = (
+                    item["name"],
+                    IncrementalJSONScanner(),
+                )
+            await send_output_chunk(codec.dumps({"type": t}))
+        elif t == "rate_limits.updated":
+            logger.debug("Rate limits: %s", data.get("rate_limits"))
+            if self.on_rate_limits is not None:
+                self.on_rate_limits(data.get("rate_limits", []))
+        elif t == "input_audio_buffer.committed":
             # 이러한 이벤트들도 클라이언트에 전달
-            await send_output_chunk(json.dumps({"type": t}))
+            await send_output_chunk(codec.dumps({"type": t}))
         elif t not in EVENTS_TO_IGNORE:
-            print("Unhandled event type:", t)
+            logger.debug("Unhandled event type: %s", t)
             # 처리되지 않은 이벤트 타입도 클라이언트에 전달
             await send_output_chunk(
-                json.dumps({"type": "unhandled_event", "event_type": t})
+                codec.dumps({"type": "unhandled_event", "event_type": t})
             )
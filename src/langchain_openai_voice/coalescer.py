@@ -0,0 +1,193 @@
+# Merges consecutive audio events into fewer websocket messages
+
+import asyncio
+import base64
+import time
+from typing import Any, Callable, Coroutine, Dict, List
+
+from pydantic import BaseModel, PrivateAttr
+
+from .utils import extract_string_field, sniff_event_type
+
+
+def merge_base64(chunks: List[str]) -> str:
+    """
+    Concatenates base64 payloads into a single payload.
+
+    Unpadded chunks encode a multiple of 3 bytes, so they can be joined as text; the
+    payloads are only decoded and re-encoded when a padded chunk is not the last one.
+
+    Args:
+        chunks (List[str]): The base64 payloads, in order.
+
+    Returns:
+        str: The merged base64 payload.
+    """
+    if not any(chunk.endswith("=") for chunk in chunks[:-1]):
+        return "".join(chunks)
+    pcm = b"".join(base64.b64decode(chunk) for chunk in chunks)
+    return base64.b64encode(pcm).decode("ascii")
+
+
+class AudioCoalescer(BaseModel):
+    """
+    Wraps a send coroutine and merges consecutive raw audio events of one type.
+
+    Audio events are held until `max_bytes` of audio is pending or the oldest one has
+    waited `max_delay_ms`, then sent as a single event carrying the merged payload and
+    the metadata of the first event. Any other event flushes the pending audio first,
+    so ordering is preserved and control events are never delayed.
+
+    Attributes:
+        send (Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]): The
+            wrapped send coroutine function.
+        event_type (str): The audio event type to merge.
+        payload_key (str): The key holding the base64 audio payload.
+        group_key (str | None): Only events with the same value for this key are
+            merged, e.g. `item_id` for output deltas.
+        max_bytes (int): Pending audio bytes that trigger an immediate flush.
+        max_delay_ms (float): The longest time an audio event is held.
+    """
+
+    send: Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]]
+    event_type: str
+    payload_key: str
+    group_key: str | None = None
+    max_bytes: int = 9600
+    max_delay_ms: float = 30.0
+
+    _events: List[str] = PrivateAttr(default_factory=list)
+    _payloads: List[str] = PrivateAttr(default_factory=list)
+    _pending_bytes: int = PrivateAttr(default=0)
+    _group: str | None = PrivateAttr(default=None)
+    _first_at: float = PrivateAttr(default=0.0)
+    _timer: asyncio.TimerHandle | None = PrivateAttr(default=None)
+    _timer_task: asyncio.Task | None = PrivateAttr(default=None)
+    _error: BaseException | None = PrivateAttr(default=None)
+    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    _stats: Dict[str, float] = PrivateAttr(
+        default_factory=lambda: {
+            "events_in": 0,
+            "events_out": 0,
+            "delay_total_ms": 0.0,
+            "delay_max_ms": 0.0,
+        }
+    )
+
+    async def __call__(self, event: Dict[str, Any] | str) -> None:
+        """
+        Sends an event, holding it for merging if it is an audio event.
+
+        Args:
+            event (Dict[str, Any] | str): The event to send.
+        """
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if isinstance(event, str) and sniff_event_type(event) == self.event_type:
+            payload = extract_string_field(event, self.payload_key)
+            if payload is not None:
+                await self._push(event, payload)
+                return
+        async with self._lock:
+            await self._flush_locked()
+            await self.send(event)
+
+    async def flush(self) -> None:
+        """
+        Sends any pending audio immediately.
+        """
+        async with self._lock:
+            await self._flush_locked()
+
+    def discard(self) -> int:
+        """
+        Drops pending audio without sending it.
+
+        Returns:
+            int: The number of dropped events.
+        """
+        dropped = len(self._events)
+        self._reset()
+        return dropped
+
+    async def aclose(self) -> None:
+        """
+        Flushes pending audio and stops the flush timer.
+        """
+        await self.flush()
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns merging statistics.
+
+        Returns:
+            Dict[str, float]: Events received and sent, and the added delay of the
+                oldest event of each merged batch (total, max and mean in ms).
+        """
+        stats = dict(self._stats)
+        stats["delay_mean_ms"] = stats["delay_total_ms"] / max(1, stats["events_out"])
+        return stats
+
+    async def _push(self, event: str, payload: str) -> None:
+        async with self._lock:
+            group = (
+                extract_string_field(event, self.group_key) if self.group_key else None
+            )
+            if self._events and group != self._group:
+                await self._flush_locked()
+            if not self._events:
+                self._group = group
+                self._first_at = time.perf_counter()
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.max_delay_ms / 1000, self._on_timer
+                )
+            self._events.append(event)
+            self._payloads.append(payload)
+            self._pending_bytes += len(payload) * 3 // 4
+            self._stats["events_in"] += 1
+            if self._pending_bytes >= self.max_bytes:
+                await self._flush_locked()
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._timer_task = asyncio.create_task(self._flush_from_timer())
+
+    async def _flush_from_timer(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            # 다음 send 호출에서 다시 발생시킴
+            self._error = e
+
+    async def _flush_locked(self) -> None:
+        if not self._events:
+            return
+        events, payloads, first_at = self._events, self._payloads, self._first_at
+        self._reset()
+        if len(events) == 1:
+            merged_event = events[0]
+        else:
+            first = events[0]
+            start = first.find(payloads[0])
+            merged_event = (
+                first[:start]
+                + merge_base64(payloads)
+                + first[start + len(payloads[0]) :]
+            )
+        delay_ms = (time.perf_counter() - first_at) * 1000
+        self._stats["events_out"] += 1
+        self._stats["delay_total_ms"] += delay_ms
+        self._stats["delay_max_ms"] = max(self._stats["delay_max_ms"], delay_ms)
+        await self.send(merged_event)
+
+    def _reset(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._events = []
+        self._payloads = []
+        self._pending_bytes = 0
+        self._group = None
@@ -0,0 +1,169 @@
+# JSON codec shared by the agent, websocket and tool executor
+#
+# The fastest installed backend is used: orjson, then msgspec, then the standard
+# library. Set VOICE_JSON_CODEC to "orjson", "msgspec" or "json" to pick one.
+
+import json
+import os
+from typing import Any, Callable, Dict
+
+
+class JsonCodec:
+    """
+    Encodes and decodes JSON events.
+
+    Decoding errors are raised as `ValueError` and unserializable values as
+    `TypeError`, whatever the backend.
+
+    Attributes:
+        name (str): The backend name.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Serializes an object to a JSON string.
+
+        Args:
+            obj (Any): The object to serialize.
+
+        Returns:
+            str: The JSON string.
+        """
+        return json.dumps(obj)
+
+    def loads(self, data: str | bytes) -> Any:
+        """
+        Parses a JSON document.
+
+        Args:
+            data (str | bytes): The JSON document.
+
+        Returns:
+            Any: The parsed value.
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj).decode("utf-8")
+
+    def loads(self, data: str | bytes) -> Any:
+        return self._loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._encode = msgspec.json.Encoder().encode
+        self._decode = msgspec.json.Decoder().decode
+        self._decode_error = msgspec.DecodeError
+
+    def dumps(self, obj: Any) -> str:
+        return self._encode(obj).decode("utf-8")
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return self._decode(data)
+        except self._decode_error as e:
+            raise ValueError(str(e)) from e
+
+
+def canonical_dumps(obj: Any) -> str:
+    """
+    Serializes an object to a canonical JSON string, for use as a cache key.
+
+    Keys are sorted and whitespace is removed. The standard library is always used
+    so the output does not depend on the installed backend.
+
+    Args:
+        obj (Any): The object to serialize.
+
+    Returns:
+        str: The canonical JSON string.
+    """
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+CODECS: Dict[str, Callable[[], JsonCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JsonCodec,
+}
+
+
+def available_codecs() -> Dict[str, JsonCodec]:
+    """
+    Instantiates every backend whose package is installed.
+
+    Returns:
+        Dict[str, JsonCodec]: The codecs indexed by name, fastest first.
+    """
+    codecs = {}
+    for name, factory in CODECS.items():
+        try:
+            codecs[name] = factory()
+        except ImportError:
+            continue
+    return codecs
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """
+    Returns a codec by name, or the fastest installed one.
+
+    Args:
+        name (str | None): "orjson", "msgspec" or "json". Defaults to the
+            VOICE_JSON_CODEC environment variable, then to the fastest backend.
+
+    Returns:
+        JsonCodec: The codec.
+
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the requested backend is not installed.
+    """
+    name = name or os.environ.get("VOICE_JSON_CODEC")
+    if name:
+        if name not in CODECS:
+            raise ValueError(
+                f"Unknown JSON codec {name}. Must be one of {list(CODECS)}"
+            )
+        return CODECS[name]()
+    return next(iter(available_codecs().values()))
+
+
+def set_codec(name: str | None = None) -> JsonCodec:
+    """
+    Switches the module-level codec used by `dumps` and `loads`.
+
+    Args:
+        name (str | None): The codec name, as accepted by `get_codec`.
+
+    Returns:
+        JsonCodec: The selected codec.
+    """
+    global codec, dumps, loads
+    codec = get_codec(name)
+    dumps = codec.dumps
+    loads = codec.loads
+    return codec
+
+
+codec: JsonCodec
+dumps: Callable[[Any], str]
+loads: Callable[[str | bytes], Any]
+set_codec()
@@ -3,14 +3,25 @@
 DEFAULT_MODEL = "gpt-4o-realtime-preview-2024-10-01"
 DEFAULT_URL = "wss://api.openai.com/v1/realtime"
 
+# Audio events relayed as the original raw frame, without a JSON round-trip
+INPUT_AUDIO_EVENT = "input_audio_buffer.append"
+OUTPUT_AUDIO_EVENT = "response.audio.delta"
+
+# Lower values are relayed first: tool results ahead of audio traffic
+STREAM_PRIORITIES = {
+    "tool_outputs": 0,
+    "output_speaker": 1,
+    "input_mic": 1,
+}
+
 EVENTS_TO_IGNORE = {
-    "response.function_call_arguments.delta",
-    "rate_limits.updated",
     "response.audio_transcript.delta",
     "response.created",
     "response.content_part.added",
     "response.content_part.done",
     "conversation.item.created",
+    "conversation.item.deleted",
+    "conversation.item.truncated",
     "response.audio.done",
     "session.created",
     "session.updated",
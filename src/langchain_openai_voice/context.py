@@ -0,0 +1,373 @@
+# Index of the upstream conversation items, kept within a token budget
+
+import logging
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, PrivateAttr
+
+from .metrics import CONTEXT_PRUNED, CONTEXT_TOKENS
+from .vad import BYTES_PER_MS
+
+logger = logging.getLogger(__name__)
+
+# Rough token costs, used only to pick what to prune; the budget itself is checked
+# against the usage reported by the model. Audio costs about 600 input and 1200
+# output tokens per minute.
+CHARS_PER_TOKEN = 4
+INPUT_AUDIO_TOKENS_PER_S = 10
+OUTPUT_AUDIO_TOKENS_PER_S = 20
+ITEM_OVERHEAD_TOKENS = 4
+
+SUMMARY_ID_PREFIX = "ctx_summary_"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+TRUNCATED_SUFFIX = " ...(truncated)"
+
+
+class ContextItem(BaseModel):
+    """
+    A conversation item as indexed by `ContextBudget`.
+
+    Attributes:
+        id (str): The item ID.
+        type (str): "message", "function_call" or "function_call_output".
+        role (str | None): The role of a message.
+        call_id (str | None): The call ID of a function call or its output.
+        name (str | None): The tool name of a function call.
+        text (str): The text, transcript, arguments or tool output.
+        audio_ms (float): The audio duration of the item.
+    """
+
+    id: str
+    type: str
+    role: str | None = None
+    call_id: str | None = None
+    name: str | None = None
+    text: str = ""
+    audio_ms: float = 0.0
+
+    @property
+    def tokens(self) -> float:
+        """The estimated token size of the item."""
+        if self.audio_ms > 0:
+            rate = (
+                OUTPUT_AUDIO_TOKENS_PER_S
+                if self.role == "assistant"
+                else INPUT_AUDIO_TOKENS_PER_S
+            )
+            return ITEM_OVERHEAD_TOKENS + self.audio_ms / 1000 * rate
+        return ITEM_OVERHEAD_TOKENS + len(self.text) / CHARS_PER_TOKEN
+
+
+class ContextBudget(BaseModel):
+    """
+    Keeps the upstream conversation within a token budget.
+
+    The model keeps every item of a session and reads all of them for each response,
+    so without pruning, latency and cost grow with the length of the conversation.
+    The budget indexes items from the server events with an estimated size. When the
+    tokens of the last response (as reported in `response.done`) exceed
+    `max_tokens`, `prune` returns the events that bring the conversation back to
+    `target_ratio` of the budget: large tool outputs are truncated first, then the
+    oldest items are deleted and their transcripts folded into one summary item at
+    the start of the conversation. The last `keep_recent` items are never touched.
+
+    Attributes:
+        max_tokens (int): The input and output tokens of a response above which
+            the conversation is pruned.
+        target_ratio (float): The fraction of `max_tokens` to prune down to.
+        keep_recent (int): The number of latest items never pruned.
+        max_tool_output_chars (int): Tool outputs longer than this are truncated.
+        summary_max_chars (int): The longest summary kept; older lines are dropped.
+            It is also capped to a quarter of the target tokens.
+        summary_line_chars (int): The longest line of the summary per item.
+    """
+
+    max_tokens: int = 16000
+    target_ratio: float = 0.75
+    keep_recent: int = 6
+    max_tool_output_chars: int = 1000
+    summary_max_chars: int = 2000
+    summary_line_chars: int = 200
+
+    _items: List[ContextItem] = PrivateAttr(default_factory=list)
+    _by_id: Dict[str, ContextItem] = PrivateAttr(default_factory=dict)
+    _pending_audio_ms: Dict[str, float] = PrivateAttr(default_factory=dict)
+    _speech_started_ms: float = PrivateAttr(default=0.0)
+    _speaking_item: str | None = PrivateAttr(default=None)
+    _summary: List[str] = PrivateAttr(default_factory=list)
+    _summary_id: str | None = PrivateAttr(default=None)
+    _summaries: int = PrivateAttr(default=0)
+    _context_tokens: int = PrivateAttr(default=0)
+    _last_response_tokens: int = PrivateAttr(default=0)
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"deleted": 0, "truncated": 0, "prunes": 0}
+    )
+
+    def reset(self) -> None:
+        """
+        Clears the index and statistics, e.g. for a new conversation.
+        """
+        self._items = []
+        self._by_id = {}
+        self._pending_audio_ms = {}
+        self._speech_started_ms = 0.0
+        self._speaking_item = None
+        self._summary = []
+        self._summary_id = None
+        self._summaries = 0
+        self._context_tokens = 0
+        self._last_response_tokens = 0
+        self._stats = {"deleted": 0, "truncated": 0, "prunes": 0}
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        """
+        Updates the index from a server event.
+
+        Args:
+            event (Dict[str, Any]): An event received from the model.
+        """
+        t = event.get("type")
+        if t == "conversation.item.created":
+            self._add(event["item"], event.get("previous_item_id"))
+        elif t == "conversation.item.deleted":
+            self._remove(event.get("item_id"))
+        elif t == "conversation.item.truncated":
+            item = self._by_id.get(event.get("item_id"))
+            if item is not None:
+                item.audio_ms = min(item.audio_ms, event.get("audio_end_ms", 0))
+        elif t == "input_audio_buffer.speech_started":
+            self._speech_started_ms = event.get("audio_start_ms", 0)
+        elif t == "input_audio_buffer.speech_stopped":
+            duration = max(0, event.get("audio_end_ms", 0) - self._speech_started_ms)
+            item = self._by_id.get(event.get("item_id"))
+            if item is not None:
+                item.audio_ms = duration
+            elif event.get("item_id"):
+                self._pending_audio_ms[event["item_id"]] = duration
+        elif t == "response.output_item.added":
+            if event.get("item", {}).get("type") == "message":
+                self._speaking_item = event["item"].get("id")
+        elif t == "response.function_call_arguments.done":
+            item = self._by_id.get(event.get("item_id"))
+            if item is not None:
+                item.text = event.get("arguments") or ""
+        elif t in (
+            "conversation.item.input_audio_transcription.completed",
+            "response.audio_transcript.done",
+        ):
+            item = self._by_id.get(event.get("item_id"))
+            if item is not None:
+                item.text = event.get("transcript") or ""
+        elif t == "response.done":
+            usage = event.get("response", {}).get("usage") or {}
+            tokens = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            if tokens:
+                self._context_tokens = self._last_response_tokens = tokens
+                CONTEXT_TOKENS.observe(tokens)
+
+    def audio_delta(self, size: int) -> None:
+        """
+        Counts an output audio delta towards the item being spoken.
+
+        Args:
+            size (int): The length of the raw `response.audio.delta` event, which is
+                almost all base64 audio.
+        """
+        item = self._by_id.get(self._speaking_item)
+        if item is not None:
+            item.audio_ms += size * 3 / 4 / BYTES_PER_MS
+
+    def prune(self) -> List[Dict[str, Any]]:
+        """
+        Returns the events that bring the conversation back under the budget.
+
+        Call it after `response.done`, before the next response is requested.
+
+        Returns:
+            List[Dict[str, Any]]: `conversation.item.delete` and
+                `conversation.item.create` events, or an empty list when the last
+                response was within the budget.
+        """
+        if self._context_tokens <= self.max_tokens:
+            return []
+        excess = self._context_tokens - self.max_tokens * self.target_ratio
+        recent = self._items[-self.keep_recent :] if self.keep_recent > 0 else []
+        protected = {item.call_id for item in recent if item.call_id}
+        candidates = [
+            item
+            for item in self._items[: len(self._items) - len(recent)]
+            if item.id != self._summary_id and item.call_id not in protected
+        ]
+        events: List[Dict[str, Any]] = []
+        truncated = set()
+
+        # 1. 오래된 큰 tool 결과는 앞부분만 남김
+        for item in candidates:
+            if excess <= 0:
+                break
+            if (
+                item.type == "function_call_output"
+                and len(item.text) > self.max_tool_output_chars
+            ):
+                before = item.tokens
+                output = item.text[: self.max_tool_output_chars] + TRUNCATED_SUFFIX
+                events += self._replace_output(item, output)
+                excess -= before - ITEM_OVERHEAD_TOKENS - len(output) / CHARS_PER_TOKEN
+                truncated.add(item.call_id)
+                self._stats["truncated"] += 1
+                CONTEXT_PRUNED.inc(action="truncated")
+
+        # 2. 가장 오래된 항목부터 삭제하고 요약으로 대체
+        lines: List[str] = []
+        for item in candidates:
+            if excess <= 0:
+                break
+            if item.id not in self._by_id or item.call_id in truncated:
+                continue
+            group = (
+                [i for i in candidates if i.call_id == item.call_id]
+                if item.call_id
+                else [item]
+            )
+            for deleted in group:
+                if deleted.id not in self._by_id:
+                    continue
+                line = self._summary_line(deleted)
+                if line:
+                    lines.append(line)
+                excess -= deleted.tokens
+                events.append(
+                    {"type": "conversation.item.delete", "item_id": deleted.id}
+                )
+                self._remove(deleted.id)
+                self._stats["deleted"] += 1
+                CONTEXT_PRUNED.inc(action="deleted")
+        if lines:
+            events += self._replace_summary(lines)
+
+        self._stats["prunes"] += 1
+        logger.info(
+            "Pruned conversation at %d tokens: %d events",
+            self._context_tokens,
+            len(events),
+        )
+        # 다음 response.done까지는 다시 prune하지 않음
+        self._context_tokens = 0
+        return events
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns context statistics.
+
+        Returns:
+            Dict[str, float]: The items indexed, their estimated tokens, the tokens
+                of the last response, and the items deleted and truncated so far.
+        """
+        return {
+            "items": len(self._items),
+            "estimated_tokens": round(sum(item.tokens for item in self._items)),
+            "last_response_tokens": self._last_response_tokens,
+            **self._stats,
+        }
+
+    def _add(self, raw: Dict[str, Any], previous_item_id: str | None) -> None:
+        item = ContextItem(
+            id=raw["id"],
+            type=raw.get("type", "message"),
+            role=raw.get("role"),
+            call_id=raw.get("call_id"),
+            name=raw.get("name"),
+        )
+        if item.type == "function_call":
+            item.text = raw.get("arguments") or ""
+        elif item.type == "function_call_output":
+            item.text = raw.get("output") or ""
+        else:
+            item.text = " ".join(
+                part.get("text") or part.get("transcript") or ""
+                for part in raw.get("content") or []
+            ).strip()
+        item.audio_ms = self._pending_audio_ms.pop(item.id, 0.0)
+        if item.id in self._by_id:
+            self._remove(item.id)
+        previous = self._by_id.get(previous_item_id)
+        if previous is not None:
+            index = self._items.index(previous) + 1
+        elif item.id.startswith(SUMMARY_ID_PREFIX):
+            # 요약은 root(대화의 맨 앞)에 추가됨
+            index = 0
+        else:
+            index = len(self._items)
+        self._items.insert(index, item)
+        self._by_id[item.id] = item
+
+    def _remove(self, item_id: str | None) -> None:
+        item = self._by_id.pop(item_id, None)
+        if item is not None:
+            self._items.remove(item)
+
+    def _replace_output(self, item: ContextItem, output: str) -> List[Dict[str, Any]]:
+        index = self._items.index(item)
+        previous_item_id = self._items[index - 1].id if index > 0 else "root"
+        self._remove(item.id)
+        return [
+            {"type": "conversation.item.delete", "item_id": item.id},
+            {
+                "type": "conversation.item.create",
+                "previous_item_id": previous_item_id,
+                "item": {
+                    "type": "function_call_output",
+                    "call_id": item.call_id,
+                    "output": output,
+                },
+            },
+        ]
+
+    def _summary_line(self, item: ContextItem) -> str | None:
+        text = item.text.replace("\n", " ")
+        if len(text) > self.summary_line_chars:
+            text = text[: self.summary_line_chars] + "..."
+        if item.type == "function_call":
+            return f"tool call: {item.name}({text})"
+        if item.type == "function_call_output":
+            return f"tool result: {text}"
+        if text:
+            return f"{item.role or 'user'}: {text}"
+        return None
+
+    def _replace_summary(self, lines: List[str]) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        if self._summary_id is not None:
+            events.append(
+                {"type": "conversation.item.delete", "item_id": self._summary_id}
+            )
+            self._remove(self._summary_id)
+        summary = self._summary + lines
+        # 요약이 budget의 대부분을 차지하지 않도록 목표치의 1/4 이하로 제한
+        limit = min(
+            self.summary_max_chars,
+            int(self.max_tokens * self.target_ratio / 4 * CHARS_PER_TOKEN),
+        )
+        while summary and sum(len(line) + 1 for line in summary) > limit:
+            summary.pop(0)
+        self._summary = summary
+        self._summaries += 1
+        self._summary_id = f"{SUMMARY_ID_PREFIX}{self._summaries}"
+        events.append(
+            {
+                "type": "conversation.item.create",
+                "previous_item_id": "root",
+                "item": {
+                    "id": self._summary_id,
+                    "type": "message",
+                    "role": "system",
+                    "content": [
+                        {
+                            "type": "input_text",
+                            "text": "\n".join([SUMMARY_HEADER, *summary]),
+                        }
+                    ],
+                },
+            }
+        )
+        return events
@@ -0,0 +1,182 @@
+# Execution policies that keep blocking and CPU-heavy tools off the event loop
+
+import asyncio
+import importlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Literal, Tuple
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+
+class ToolExecutionPolicy(BaseModel):
+    """
+    Describes where a tool runs.
+
+    Attributes:
+        mode (Literal["async", "thread", "process"]): "async" awaits `tool.ainvoke`
+            on the event loop, "thread" runs `tool.invoke` in a dedicated bounded
+            thread pool, and "process" runs it in the process pool. Process mode
+            requires picklable arguments and results, and a tool that is either
+            importable from its module or picklable itself.
+        pool (str): The thread pool to use in "thread" mode. Tools sharing a pool
+            compete for its threads, so slow tools can be isolated from fast ones.
+        target (str | None): "module:attribute" import path of the tool, used by
+            worker processes in "process" mode. Inferred for `@tool` functions.
+        speculative (bool): Start the tool as soon as its streamed arguments form
+            a complete JSON object, before the model finishes the function call.
+            The result is discarded if the final arguments differ, so only enable
+            it for side-effect-free, idempotent tools.
+    """
+
+    mode: Literal["async", "thread", "process"] = "async"
+    pool: str = "default"
+    target: str | None = None
+    speculative: bool = False
+
+
+def _invoke_timed(tool: BaseTool, args: Any) -> Tuple[float, Any]:
+    # time.monotonic()은 프로세스 간에도 같은 시계라서 대기 시간 계산에 사용 가능
+    started = time.monotonic()
+    return started, tool.invoke(args)
+
+
+@lru_cache(maxsize=None)
+def _import_tool(target: str) -> BaseTool:
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _invoke_target_timed(target: str, args: Any) -> Tuple[float, Any]:
+    started = time.monotonic()
+    return started, _import_tool(target).invoke(args)
+
+
+def process_target(tool: BaseTool, policy: ToolExecutionPolicy) -> str | None:
+    """
+    Returns the import path a worker process uses to load a tool.
+
+    Tools created with `@tool` have a generated argument schema that cannot be
+    pickled, so they are re-imported in the worker from the module of their function.
+
+    Args:
+        tool (BaseTool): The tool.
+        policy (ToolExecutionPolicy): Its execution policy.
+
+    Returns:
+        str | None: "module:attribute", or None if the tool itself is to be pickled.
+    """
+    if policy.target:
+        return policy.target
+    func = getattr(tool, "func", None)
+    if func is not None and getattr(func, "__module__", None):
+        return f"{func.__module__}:{func.__name__}"
+    return None
+
+
+class ToolExecutionPools(BaseModel):
+    """
+    Thread and process pools shared by the tool executors of a process.
+
+    Pools are created on first use. For each pool, the time calls spend waiting for
+    a free worker is recorded.
+
+    Attributes:
+        thread_pool_sizes (Dict[str, int]): Worker threads per named thread pool.
+            Pools not listed use the size of the "default" pool.
+        process_pool_size (int): Worker processes of the process pool.
+    """
+
+    thread_pool_sizes: Dict[str, int] = Field(default_factory=lambda: {"default": 8})
+    process_pool_size: int = 2
+
+    _executors: Dict[str, Executor] = PrivateAttr(default_factory=dict)
+    _stats: Dict[str, Dict[str, float]] = PrivateAttr(default_factory=dict)
+
+    def _executor(self, policy: ToolExecutionPolicy) -> Tuple[str, Executor]:
+        name = "process" if policy.mode == "process" else f"thread:{policy.pool}"
+        executor = self._executors.get(name)
+        if executor is None:
+            if policy.mode == "process":
+                executor = ProcessPoolExecutor(max_workers=self.process_pool_size)
+            else:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.thread_pool_sizes.get(
+                        policy.pool, self.thread_pool_sizes.get("default", 8)
+                    ),
+                    thread_name_prefix=f"tool-{policy.pool}",
+                )
+            self._executors[name] = executor
+            self._stats[name] = {
+                "submitted": 0,
+                "completed": 0,
+                "wait_total_s": 0.0,
+                "wait_max_s": 0.0,
+            }
+        return name, executor
+
+    async def run(self, tool: BaseTool, args: Any, policy: ToolExecutionPolicy) -> Any:
+        """
+        Runs a tool according to its execution policy.
+
+        Args:
+            tool (BaseTool): The tool to run.
+            args (Any): The parsed tool arguments.
+            policy (ToolExecutionPolicy): Where to run it.
+
+        Returns:
+            Any: The tool result.
+        """
+        if policy.mode == "async":
+            return await tool.ainvoke(args)
+
+        name, executor = self._executor(policy)
+        stats = self._stats[name]
+        stats["submitted"] += 1
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            target = process_target(tool, policy) if policy.mode == "process" else None
+            if target is not None:
+                future = loop.run_in_executor(
+                    executor, _invoke_target_timed, target, args
+                )
+            else:
+                future = loop.run_in_executor(executor, _invoke_timed, tool, args)
+            started, result = await future
+        finally:
+            stats["completed"] += 1
+        wait = max(0.0, started - submitted)
+        stats["wait_total_s"] += wait
+        stats["wait_max_s"] = max(stats["wait_max_s"], wait)
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-pool statistics.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each pool, calls submitted and
+                completed, calls in flight, and total/max/mean queue wait in seconds.
+        """
+        result = {}
+        for name, stats in self._stats.items():
+            result[name] = {
+                **stats,
+                "in_flight": stats["submitted"] - stats["completed"],
+                "wait_mean_s": stats["wait_total_s"] / max(1, stats["completed"]),
+            }
+        return result
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Shuts down every pool.
+
+        Args:
+            wait (bool): Whether to wait for running calls to finish.
+        """
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._executors.clear()
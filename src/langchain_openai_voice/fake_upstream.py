@@ -0,0 +1,603 @@
+# Local stand-in for the OpenAI Realtime API used for benchmarks and offline runs
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+import websockets
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .constants import OUTPUT_AUDIO_EVENT
+from .utils import extract_string_field, sniff_event_type
+
+# 24kHz, mono, PCM16
+BYTES_PER_MS = 48
+
+
+class FakeRealtimeServer(BaseModel):
+    """
+    A local websocket server that speaks the subset of the OpenAI Realtime protocol
+    consumed by `OpenAIVoiceReactAgent.aconnect`.
+
+    It simulates server-side VAD by counting appended input audio: once `speech_ms`
+    of audio has been received, it emits the speech/commit/transcription events and
+    streams a synthetic audio response. Every `tool_call_every`-th response is a
+    function call instead, answered with audio once the tool output arrives.
+    Conversation items are kept with a rough token size, reported as the usage of
+    each response, and can be deleted; with `latency_per_1k_tokens_ms`, the first
+    delta of a response is delayed in proportion to the conversation size.
+
+    With a `script`, for example from `recording.upstream_script`, it replays
+    recorded upstream events instead, waiting for the tool outputs each one
+    depends on, and ignores everything else the client sends.
+
+    Point an agent at it through the `url` field, e.g. `ws://127.0.0.1:8765`.
+
+    Attributes:
+        host (str): The interface to bind.
+        port (int): The port to bind. 0 picks a free port.
+        speech_ms (int): Input audio (in ms) that triggers a simulated end of speech.
+        response_deltas (int): Number of `response.audio.delta` events per response.
+        delta_bytes (int): PCM bytes carried by each audio delta.
+        delta_interval_ms (float): Delay between consecutive audio deltas.
+        first_delta_delay_ms (float): Delay between `response.created` and the first delta.
+        tool_call_every (int): Emit a function call every N responses. 0 disables.
+        tool_name (str): The tool name used for simulated function calls.
+        tool_arguments (str): The JSON arguments used for simulated function calls.
+        argument_delta_interval_ms (float): Delay between consecutive function call
+            argument deltas, and between the last one and the done event.
+        latency_per_1k_tokens_ms (float): Extra first-delta delay per 1000 tokens
+            of conversation.
+        barge_in_ms (int): Input audio (in ms) received during a response that
+            counts as the user speaking over it. 0 ignores audio while responding.
+        rate_limit_requests (int): Responses allowed per rate limit window across
+            all connections. Each response reports the budget left in a
+            `rate_limits.updated` event, and responses over it get a
+            `rate_limit_exceeded` error instead. 0 disables the limit.
+        rate_limit_window_s (float): The length of the rate limit window.
+        connect_delay_ms (float): Delay added to every handshake, standing in for
+            the TLS and websocket setup cost of the real API.
+        script (List[Tuple[float, int, str]] | None): Events to replay, as (seconds
+            after the anchor, tool outputs to wait for, raw event) tuples.
+        speed (float): The replay speed of the script. 0 sends events as fast as
+            possible.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 0
+    speech_ms: int = 1000
+    response_deltas: int = 25
+    delta_bytes: int = 4800
+    delta_interval_ms: float = 20.0
+    first_delta_delay_ms: float = 200.0
+    tool_call_every: int = 0
+    tool_name: str = "tavily_search_results_json"
+    tool_arguments: str = Field(default='{"query": "weather in Seoul"}')
+    argument_delta_interval_ms: float = 0.0
+    latency_per_1k_tokens_ms: float = 0.0
+    barge_in_ms: int = 0
+    rate_limit_requests: int = 0
+    rate_limit_window_s: float = 10.0
+    connect_delay_ms: float = 0.0
+    script: List[Tuple[float, int, str]] | None = None
+    speed: float = 1.0
+
+    _server: Any = PrivateAttr(default=None)
+    _event_counter: int = PrivateAttr(default=0)
+    _delta_payload: str = PrivateAttr(default="")
+    _delta_log: Dict[str, Tuple[List[int], List[float]]] = PrivateAttr(
+        default_factory=dict
+    )
+    _script_finished: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    _window_started: float = PrivateAttr(default=0.0)
+    _window_used: int = PrivateAttr(default=0)
+
+    @property
+    def url(self) -> str:
+        """The websocket URL of the running server."""
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """
+        Starts listening. When `port` is 0, it is updated with the bound port.
+        """
+        pcm = bytes((i * 7) & 0xFF for i in range(self.delta_bytes))
+        self._delta_payload = base64.b64encode(pcm).decode("ascii")
+        self._server = await websockets.serve(
+            self._handle,
+            self.host,
+            self.port,
+            max_size=None,
+            compression=None,
+            process_request=self._delay_handshake,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def aclose(self) -> None:
+        """
+        Stops the server and closes every open session.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeRealtimeServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def delta_log(self, tag: str) -> Tuple[List[int], List[float]]:
+        """
+        Returns the audio send log for the session tagged `tag`.
+
+        The tag is the `instructions` value of the session's `session.update`, which
+        lets a client correlate its own received audio with upstream send times.
+
+        Args:
+            tag (str): The session tag.
+
+        Returns:
+            Tuple[List[int], List[float]]: Cumulative PCM bytes sent after each delta,
+                and the `time.perf_counter()` at which each delta was sent.
+        """
+        return self._delta_log.setdefault(tag, ([], []))
+
+    async def script_finished(self) -> None:
+        """
+        Waits until a session has sent the last event of the script.
+        """
+        await self._script_finished.wait()
+
+    async def _delay_handshake(self, path: str, headers: Any) -> None:
+        if self.connect_delay_ms > 0:
+            await asyncio.sleep(self.connect_delay_ms / 1000)
+
+    def _event(self, event_type: str, **fields: Any) -> str:
+        self._event_counter += 1
+        return json.dumps(
+            {"type": event_type, "event_id": f"event_{self._event_counter}", **fields}
+        )
+
+    async def _handle(self, websocket: Any) -> None:
+        if self.script is not None:
+            await self._handle_scripted(websocket)
+            return
+        session: Dict[str, Any] = {
+            "tag": "",
+            "buffered": 0,
+            "speaking": False,
+            "responses": 0,
+            "response_task": None,
+            "items": 0,
+            "context": {},
+            "barge_in": 0,
+        }
+        await websocket.send(self._event("session.created", session={}))
+        try:
+            async for raw in websocket:
+                await self._on_client_event(websocket, session, json.loads(raw))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            task = session["response_task"]
+            if task is not None:
+                task.cancel()
+
+    async def _handle_scripted(self, websocket: Any) -> None:
+        session: Dict[str, Any] = {"tag": "", "tool_outputs": 0}
+        tool_output = asyncio.Event()
+        # 클라이언트의 첫 이벤트(session.update) 이후에 재생을 시작해서 tag를 알 수 있게 함
+        started = asyncio.Event()
+        player = asyncio.create_task(
+            self._play_script(websocket, session, tool_output, started)
+        )
+        try:
+            async for raw in websocket:
+                event = json.loads(raw)
+                started.set()
+                t = event.get("type")
+                if t == "session.update" and "instructions" in event.get("session", {}):
+                    session["tag"] = event["session"]["instructions"] or ""
+                elif (
+                    t == "conversation.item.create"
+                    and event.get("item", {}).get("type") == "function_call_output"
+                ):
+                    session["tool_outputs"] += 1
+                    tool_output.set()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            player.cancel()
+
+    async def _play_script(
+        self,
+        websocket: Any,
+        session: Dict[str, Any],
+        tool_output: asyncio.Event,
+        started: asyncio.Event,
+    ) -> None:
+        await started.wait()
+        released = time.perf_counter()
+        gate = 0
+        try:
+            for delay, wait_outputs, raw in self.script or []:
+                if wait_outputs > gate:
+                    while session["tool_outputs"] < wait_outputs:
+                        tool_output.clear()
+                        await tool_output.wait()
+                    gate = wait_outputs
+                    released = time.perf_counter()
+                if self.speed > 0:
+                    send_at = released + delay / self.speed
+                    await asyncio.sleep(max(0.0, send_at - time.perf_counter()))
+                await websocket.send(raw)
+                if sniff_event_type(raw) == OUTPUT_AUDIO_EVENT:
+                    sizes, sent_at = self.delta_log(session["tag"])
+                    delta = extract_string_field(raw, "delta") or ""
+                    sizes.append((sizes[-1] if sizes else 0) + len(delta) * 3 // 4)
+                    sent_at.append(time.perf_counter())
+        except websockets.ConnectionClosed:
+            return
+        self._script_finished.set()
+
+    async def _on_client_event(
+        self, websocket: Any, session: Dict[str, Any], event: Dict[str, Any]
+    ) -> None:
+        t = event.get("type")
+        if t == "session.update":
+            # 부분 업데이트에 instructions가 없으면 기존 tag 유지
+            if "instructions" in event.get("session", {}):
+                session["tag"] = event["session"]["instructions"] or ""
+            await websocket.send(
+                self._event("session.updated", session=event.get("session", {}))
+            )
+        elif t == "input_audio_buffer.append":
+            if self._responding(session) and not session["speaking"]:
+                # 응답 중에는 barge_in_ms 이상 들어온 오디오만 끼어들기로 간주
+                session["barge_in"] += len(event.get("audio", "")) * 3 // 4
+                if (
+                    self.barge_in_ms <= 0
+                    or session["barge_in"] < self.barge_in_ms * BYTES_PER_MS
+                ):
+                    return
+            if not session["speaking"]:
+                session["speaking"] = True
+                await websocket.send(
+                    self._event("input_audio_buffer.speech_started", audio_start_ms=0)
+                )
+            session["buffered"] += len(event.get("audio", "")) * 3 // 4
+            if session["buffered"] >= self.speech_ms * BYTES_PER_MS:
+                await self._end_of_speech(websocket, session)
+        elif t == "input_audio_buffer.commit":
+            await self._end_of_speech(websocket, session)
+        elif t == "input_audio_buffer.clear":
+            session["buffered"] = 0
+            await websocket.send(self._event("input_audio_buffer.cleared"))
+        elif t == "conversation.item.create":
+            session["items"] += 1
+            item = {"id": f"item_{session['items']}", **event.get("item", {})}
+            session["context"][item["id"]] = len(json.dumps(item)) // 4
+            await websocket.send(self._event("conversation.item.created", item=item))
+        elif t == "conversation.item.delete":
+            session["context"].pop(event.get("item_id"), None)
+            await websocket.send(
+                self._event("conversation.item.deleted", item_id=event.get("item_id"))
+            )
+        elif t == "conversation.item.truncate":
+            await websocket.send(
+                self._event(
+                    "conversation.item.truncated",
+                    item_id=event.get("item_id"),
+                    content_index=event.get("content_index", 0),
+                    audio_end_ms=event.get("audio_end_ms", 0),
+                )
+            )
+        elif t == "response.create":
+            self._start_response(websocket, session, allow_tool_call=False)
+        elif t == "response.cancel":
+            task = session["response_task"]
+            if task is not None and not task.done():
+                task.cancel()
+
+    def _responding(self, session: Dict[str, Any]) -> bool:
+        task = session["response_task"]
+        return task is not None and not task.done()
+
+    async def _end_of_speech(self, websocket: Any, session: Dict[str, Any]) -> None:
+        session["speaking"] = False
+        session["buffered"] = 0
+        session["items"] += 1
+        item_id = f"item_{session['items']}"
+        # 입력 오디오는 대략 초당 10 token
+        session["context"][item_id] = 4 + self.speech_ms // 100
+        for event in (
+            self._event("input_audio_buffer.speech_stopped", audio_end_ms=0),
+            self._event("input_audio_buffer.committed", item_id=item_id),
+            self._event(
+                "conversation.item.created",
+                item={
+                    "id": item_id,
+                    "type": "message",
+                    "role": "user",
+                    "content": [{"type": "input_audio", "transcript": None}],
+                },
+            ),
+            self._event(
+                "conversation.item.input_audio_transcription.completed",
+                item_id=item_id,
+                content_index=0,
+                transcript="안녕하세요",
+            ),
+        ):
+            await websocket.send(event)
+        self._start_response(websocket, session, allow_tool_call=True)
+
+    def _start_response(
+        self, websocket: Any, session: Dict[str, Any], allow_tool_call: bool
+    ) -> None:
+        if self._responding(session):
+            return
+        session["responses"] += 1
+        session["barge_in"] = 0
+        tool_call = (
+            allow_tool_call
+            and self.tool_call_every > 0
+            and session["responses"] % self.tool_call_every == 0
+        )
+        session["response_task"] = asyncio.create_task(
+            self._respond(websocket, session, tool_call)
+        )
+
+    async def _respond(
+        self, websocket: Any, session: Dict[str, Any], tool_call: bool
+    ) -> None:
+        response_id = f"resp_{session['responses']}"
+        session["items"] += 1
+        item_id = f"item_{session['items']}"
+        status = "completed"
+        input_tokens = len(session["tag"]) // 4 + sum(session["context"].values())
+        # 출력 오디오는 대략 초당 20 token
+        output_tokens = (
+            4 + len(self.tool_arguments) // 4
+            if tool_call
+            else 4 + self.response_deltas * self.delta_bytes // BYTES_PER_MS // 50
+        )
+        rate_limits = self._take_request()
+        if rate_limits is None:
+            status = "failed"
+            output_tokens = 0
+        session["context"][item_id] = output_tokens
+        try:
+            await websocket.send(
+                self._event("response.created", response={"id": response_id})
+            )
+            if rate_limits is None:
+                await websocket.send(
+                    self._event(
+                        "error",
+                        error={
+                            "type": "rate_limit_exceeded",
+                            "code": "rate_limit_exceeded",
+                            "message": "Rate limit reached for requests",
+                        },
+                    )
+                )
+            else:
+                if rate_limits:
+                    await websocket.send(
+                        self._event("rate_limits.updated", rate_limits=rate_limits)
+                    )
+                if tool_call:
+                    await self._respond_tool_call(websocket, response_id, item_id)
+                else:
+                    await self._respond_audio(
+                        websocket, session, response_id, item_id, input_tokens
+                    )
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except websockets.ConnectionClosed:
+            return
+        if websocket.closed:
+            return
+        await websocket.send(
+            self._event(
+                "response.done",
+                response={
+                    "id": response_id,
+                    "status": status,
+                    "usage": {
+                        "total_tokens": input_tokens + output_tokens,
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                    },
+                },
+            )
+        )
+
+    def _take_request(self) -> List[Dict[str, Any]] | None:
+        # 모든 연결이 하나의 요청 한도를 나눠 씀 (None: 한도 초과)
+        if self.rate_limit_requests <= 0:
+            return []
+        now = time.monotonic()
+        if now - self._window_started >= self.rate_limit_window_s:
+            self._window_started = now
+            self._window_used = 0
+        if self._window_used >= self.rate_limit_requests:
+            return None
+        self._window_used += 1
+        return [
+            {
+                "name": "requests",
+                "limit": self.rate_limit_requests,
+                "remaining": self.rate_limit_requests - self._window_used,
+                "reset_seconds": round(
+                    self._window_started + self.rate_limit_window_s - now, 3
+                ),
+            }
+        ]
+
+    async def _respond_tool_call(
+        self, websocket: Any, response_id: str, item_id: str
+    ) -> None:
+        call_id = f"call_{item_id}"
+        await websocket.send(
+            self._event(
+                "response.output_item.added",
+                response_id=response_id,
+                output_index=0,
+                item={
+                    "id": item_id,
+                    "type": "function_call",
+                    "name": self.tool_name,
+                    "call_id": call_id,
+                },
+            )
+        )
+        await websocket.send(
+            self._event(
+                "conversation.item.created",
+                item={
+                    "id": item_id,
+                    "type": "function_call",
+                    "name": self.tool_name,
+                    "call_id": call_id,
+                    "arguments": "",
+                },
+            )
+        )
+        for i in range(0, len(self.tool_arguments), 8):
+            if i and self.argument_delta_interval_ms > 0:
+                await asyncio.sleep(self.argument_delta_interval_ms / 1000)
+            await websocket.send(
+                self._event(
+                    "response.function_call_arguments.delta",
+                    response_id=response_id,
+                    item_id=item_id,
+                    output_index=0,
+                    call_id=call_id,
+                    delta=self.tool_arguments[i : i + 8],
+                )
+            )
+        if self.argument_delta_interval_ms > 0:
+            await asyncio.sleep(self.argument_delta_interval_ms / 1000)
+        await websocket.send(
+            self._event(
+                "response.function_call_arguments.done",
+                response_id=response_id,
+                item_id=item_id,
+                output_index=0,
+                call_id=call_id,
+                name=self.tool_name,
+                arguments=self.tool_arguments,
+            )
+        )
+
+    async def _respond_audio(
+        self,
+        websocket: Any,
+        session: Dict[str, Any],
+        response_id: str,
+        item_id: str,
+        input_tokens: int,
+    ) -> None:
+        item = {"id": item_id, "type": "message", "role": "assistant", "content": []}
+        await websocket.send(
+            self._event(
+                "response.output_item.added",
+                response_id=response_id,
+                output_index=0,
+                item=item,
+            )
+        )
+        await websocket.send(self._event("conversation.item.created", item=item))
+        delay_ms = (
+            self.first_delta_delay_ms
+            + input_tokens / 1000 * self.latency_per_1k_tokens_ms
+        )
+        await asyncio.sleep(delay_ms / 1000)
+        sizes, sent_at = self.delta_log(session["tag"])
+        for _ in range(self.response_deltas):
+            await websocket.send(
+                self._event(
+                    "response.audio.delta",
+                    response_id=response_id,
+                    item_id=item_id,
+                    output_index=0,
+                    content_index=0,
+                    delta=self._delta_payload,
+                )
+            )
+            sizes.append((sizes[-1] if sizes else 0) + self.delta_bytes)
+            sent_at.append(time.perf_counter())
+            await asyncio.sleep(self.delta_interval_ms / 1000)
+        await websocket.send(
+            self._event(
+                "response.audio.done",
+                response_id=response_id,
+                item_id=item_id,
+                output_index=0,
+                content_index=0,
+            )
+        )
+        await websocket.send(
+            self._event(
+                "response.audio_transcript.done",
+                response_id=response_id,
+                item_id=item_id,
+                output_index=0,
+                content_index=0,
+                transcript="네, 알겠습니다.",
+            )
+        )
+
+
+async def _serve_forever(server: FakeRealtimeServer) -> None:
+    async with server:
+        print(f"Fake Realtime API listening on {server.url}")
+        await asyncio.Future()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI Realtime API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speech-ms", type=int, default=1000)
+    parser.add_argument("--response-deltas", type=int, default=25)
+    parser.add_argument("--delta-bytes", type=int, default=4800)
+    parser.add_argument("--delta-interval-ms", type=float, default=20.0)
+    parser.add_argument("--tool-call-every", type=int, default=0)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    parser.add_argument("--barge-in-ms", type=int, default=0)
+    parser.add_argument("--argument-delta-interval-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-requests", type=int, default=0)
+    parser.add_argument("--rate-limit-window-s", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server = FakeRealtimeServer(
+        host=args.host,
+        port=args.port,
+        speech_ms=args.speech_ms,
+        response_deltas=args.response_deltas,
+        delta_bytes=args.delta_bytes,
+        delta_interval_ms=args.delta_interval_ms,
+        tool_call_every=args.tool_call_every,
+        connect_delay_ms=args.connect_delay_ms,
+        barge_in_ms=args.barge_in_ms,
+        argument_delta_interval_ms=args.argument_delta_interval_ms,
+        rate_limit_requests=args.rate_limit_requests,
+        rate_limit_window_s=args.rate_limit_window_s,
+    )
+    try:
+        asyncio.run(_serve_forever(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+# Process-wide metrics in the Prometheus text format, and per-session recorders
+#
+# Metrics are updated from the event loop only, so no locking is done. With several
+# server workers, each process exposes its own values.
+
+import bisect
+import math
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Base class of the metric types.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text.
+        labelnames (Tuple[str, ...]): The label names, in order.
+    """
+
+    type_name = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """
+        Returns the samples of the metric.
+
+        Returns:
+            Iterable[Tuple[str, str, float]]: (name suffix, formatted labels, value)
+                triples.
+        """
+        return []
+
+    def render(self) -> List[str]:
+        """
+        Renders the metric in the Prometheus text exposition format.
+
+        Returns:
+            List[str]: The lines of the metric.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing value.
+    """
+
+    type_name = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increments the counter.
+
+        Args:
+            amount (float): The increment.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, value in self._values.items():
+            yield "_total", _format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increments the gauge.
+
+        Args:
+            amount (float): The increment.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Decrements the gauge.
+
+        Args:
+            amount (float): The decrement.
+            **labels: The label values.
+        """
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Sets the gauge.
+
+        Args:
+            value (float): The new value.
+            **labels: The label values.
+        """
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, value in self._values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """
+    Counts observations in cumulative buckets, with their sum and count.
+
+    Attributes:
+        buckets (Tuple[float, ...]): The upper bounds of the buckets, ascending.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨별 [bucket별 개수..., +Inf 개수], 합계
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Records an observation.
+
+        Args:
+            value (float): The observed value.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, self._sums[key]
+            yield "_count", labels, cumulative
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    """
+    A collection of metrics rendered together.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """
+        Adds a metric to the registry.
+
+        Args:
+            metric (M): The metric.
+
+        Returns:
+            M: The same metric, for chaining.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition document.
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+ACTIVE_SESSIONS = REGISTRY.register(
+    Gauge("voice_active_sessions", "Conversations currently connected upstream.")
+)
+ACTIVE_SESSIONS.set(0)
+SESSIONS = REGISTRY.register(
+    Counter("voice_sessions", "Conversations started.", ["outcome"])
+)
+TIME_TO_FIRST_AUDIO = REGISTRY.register(
+    Histogram(
+        "voice_time_to_first_audio_seconds",
+        "Time from the end of user speech to the first audio delta of the reply.",
+        buckets=(0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+    )
+)
+TOOL_DURATION = REGISTRY.register(
+    Histogram(
+        "voice_tool_duration_seconds",
+        "Tool call latency, including time waiting for a concurrency slot.",
+        ["tool", "outcome"],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+)
+FRAMES = REGISTRY.register(
+    Counter("voice_frames", "Websocket frames relayed.", ["direction"])
+)
+FRAME_BYTES = REGISTRY.register(
+    Counter(
+        "voice_frame_bytes",
+        "Websocket payload size relayed (characters for text frames).",
+        ["direction"],
+    )
+)
+MIC_AUDIO = REGISTRY.register(
+    Counter(
+        "voice_mic_audio_ms",
+        "Mic audio received from clients, by silence gate decision.",
+        ["decision"],
+    )
+)
+UPSTREAM_ERRORS = REGISTRY.register(
+    Counter(
+        "voice_upstream_errors",
+        "Error events and connection failures of the OpenAI API.",
+        ["type"],
+    )
+)
+
+CONTEXT_TOKENS = REGISTRY.register(
+    Histogram(
+        "voice_context_tokens",
+        "Input and output tokens of each response, as reported by the model.",
+        buckets=(1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+    )
+)
+CONTEXT_PRUNED = REGISTRY.register(
+    Counter(
+        "voice_context_pruned_items",
+        "Conversation items pruned to stay within the context budget.",
+        ["action"],
+    )
+)
+TRANSCRIPT_EVENTS = REGISTRY.register(
+    Counter(
+        "voice_transcript_rows",
+        "Transcript and session rows persisted or dropped.",
+        ["result"],
+    )
+)
+TOOL_SPECULATIONS = REGISTRY.register(
+    Counter(
+        "voice_tool_speculations",
+        "Tool calls started from streamed arguments, by whether the final "
+        "arguments matched.",
+        ["result"],
+    )
+)
+INTERRUPTIONS = REGISTRY.register(
+    Counter("voice_interruptions", "Replies interrupted by user speech.")
+)
+DISCARDED_AUDIO = REGISTRY.register(
+    Counter(
+        "voice_discarded_audio_ms",
+        "Reply audio dropped or cut off because the user interrupted.",
+    )
+)
+
+
+class SessionMetrics(BaseModel):
+    """
+    Records the metrics of one conversation, both into the process-wide metrics
+    and into a per-session summary.
+
+    Directions are named from the relay's point of view: "client_in",
+    "client_out", "upstream_in" and "upstream_out".
+
+    Attributes:
+        frames (Dict[str, int]): Frames relayed per direction.
+        bytes (Dict[str, int]): Payload size relayed per direction.
+        time_to_first_audio (List[float]): Seconds from the end of user speech to
+            the first audio delta, per reply.
+        tool_calls (Dict[str, int]): Finished tool calls per outcome.
+        upstream_errors (int): Upstream error events and connection failures.
+        interruptions (int): Replies interrupted by user speech.
+        discarded_audio_ms (float): Reply audio dropped or cut off by interruptions.
+    """
+
+    frames: Dict[str, int] = Field(default_factory=dict)
+    bytes: Dict[str, int] = Field(default_factory=dict)
+    time_to_first_audio: List[float] = Field(default_factory=list)
+    tool_calls: Dict[str, int] = Field(default_factory=dict)
+    upstream_errors: int = 0
+    interruptions: int = 0
+    discarded_audio_ms: float = 0.0
+
+    _speech_stopped_at: float | None = PrivateAttr(default=None)
+
+    def frame(self, direction: str, size: int) -> None:
+        """
+        Records a relayed frame.
+
+        Args:
+            direction (str): The direction of the frame.
+            size (int): The payload size.
+        """
+        self.frames[direction] = self.frames.get(direction, 0) + 1
+        self.bytes[direction] = self.bytes.get(direction, 0) + size
+        FRAMES.inc(direction=direction)
+        FRAME_BYTES.inc(size, direction=direction)
+
+    def speech_stopped(self) -> None:
+        """
+        Marks the end of user speech, starting the time-to-first-audio clock.
+        """
+        self._speech_stopped_at = time.perf_counter()
+
+    def audio_delta(self) -> None:
+        """
+        Records an audio delta sent to the client, observing the time to first
+        audio if it is the first one since the end of user speech.
+        """
+        if self._speech_stopped_at is None:
+            return
+        elapsed = time.perf_counter() - self._speech_stopped_at
+        self._speech_stopped_at = None
+        self.time_to_first_audio.append(elapsed)
+        TIME_TO_FIRST_AUDIO.observe(elapsed)
+
+    def tool_call(self, tool: str, outcome: str, duration: float) -> None:
+        """
+        Records a finished tool call.
+
+        Args:
+            tool (str): The tool name.
+            outcome (str): "ok", "error", "timeout" or "cancelled".
+            duration (float): The call latency in seconds.
+        """
+        self.tool_calls[outcome] = self.tool_calls.get(outcome, 0) + 1
+        TOOL_DURATION.observe(duration, tool=tool, outcome=outcome)
+
+    def upstream_error(self, error_type: str) -> None:
+        """
+        Records an upstream error event or connection failure.
+
+        Args:
+            error_type (str): The error type.
+        """
+        self.upstream_errors += 1
+        UPSTREAM_ERRORS.inc(type=error_type)
+
+    def interruption(self) -> None:
+        """
+        Records a reply interrupted by user speech.
+        """
+        self.interruptions += 1
+        INTERRUPTIONS.inc()
+
+    def audio_discarded(self, duration_ms: float) -> None:
+        """
+        Records reply audio that was not played because of an interruption.
+
+        Args:
+            duration_ms (float): The audio duration in milliseconds.
+        """
+        self.discarded_audio_ms += duration_ms
+        DISCARDED_AUDIO.inc(duration_ms)
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Returns the metrics of the session.
+
+        Returns:
+            Dict[str, object]: Frames and bytes per direction, time to first audio
+                of each reply in seconds, tool calls per outcome, upstream errors,
+                interruptions and discarded reply audio.
+        """
+        return {
+            "frames": dict(self.frames),
+            "bytes": dict(self.bytes),
+            "time_to_first_audio_s": list(self.time_to_first_audio),
+            "tool_calls": dict(self.tool_calls),
+            "upstream_errors": self.upstream_errors,
+            "interruptions": self.interruptions,
+            "discarded_audio_ms": round(self.discarded_audio_ms, 1),
+        }
@@ -0,0 +1,211 @@
+# Pool of pre-connected, pre-configured OpenAI real-time API sessions
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Set, Tuple
+
+from pydantic import BaseModel, PrivateAttr, SecretStr
+
+from . import codec
+from .constants import DEFAULT_MODEL, DEFAULT_URL
+from .websocket import WebSocketClientProtocol, open_connection
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamPool(BaseModel):
+    """
+    Keeps a number of upstream sessions connected and configured ahead of time.
+
+    Each pooled connection has completed the websocket handshake and a
+    `session.update` with `session`, so a new conversation can start without waiting
+    for either. Taken connections are replaced in the background, and idle ones are
+    closed after `max_idle` seconds and reopened, so they never hit the server-side
+    session limit. When the pool is empty, callers open a connection themselves.
+
+    Attributes:
+        api_key (SecretStr): The API key for authenticating with OpenAI.
+        model (str): The model of the pooled sessions.
+        url (str): The URL for the OpenAI API.
+        session (Dict[str, Any]): The session configuration sent to new pooled
+            connections, e.g. from `OpenAIVoiceReactAgent.session_config()`. It can
+            be replaced at any time; connections already pooled keep theirs.
+        size (int): The number of idle connections to keep.
+        max_idle (float): Seconds an idle connection is kept before being replaced.
+        connect_timeout (float): Seconds allowed to open and configure a connection.
+    """
+
+    api_key: SecretStr
+    model: str = DEFAULT_MODEL
+    url: str = DEFAULT_URL
+    session: Dict[str, Any]
+    size: int = 2
+    max_idle: float = 300.0
+    connect_timeout: float = 10.0
+
+    _idle: Deque[Tuple[WebSocketClientProtocol, float, Dict[str, Any]]] = PrivateAttr(
+        default_factory=deque
+    )
+    _opening: Set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _closing: Set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _wakeup: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    _task: asyncio.Task | None = PrivateAttr(default=None)
+    _failures: int = PrivateAttr(default=0)
+    _stats: Dict[str, float] = PrivateAttr(
+        default_factory=lambda: {
+            "hits": 0,
+            "misses": 0,
+            "opened": 0,
+            "expired": 0,
+            "failed": 0,
+            "connect_total_s": 0.0,
+        }
+    )
+
+    async def start(self) -> None:
+        """
+        Starts filling the pool in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def aclose(self) -> None:
+        """
+        Stops refilling and closes every idle connection.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in self._opening:
+            task.cancel()
+        await asyncio.gather(*self._opening, return_exceptions=True)
+        idle, self._idle = self._idle, deque()
+        for websocket, _, _ in idle:
+            self._close(websocket)
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def acquire(
+        self, model: str, url: str
+    ) -> Tuple[WebSocketClientProtocol, Dict[str, Any]] | None:
+        """
+        Takes an idle connection out of the pool.
+
+        Args:
+            model (str): The model the caller needs.
+            url (str): The URL the caller needs.
+
+        Returns:
+            Tuple[WebSocketClientProtocol, Dict[str, Any]] | None: The connection and
+                the session configuration already applied to it, or None if no
+                matching connection is ready.
+        """
+        if model != self.model or url != self.url:
+            return None
+        now = time.monotonic()
+        while self._idle:
+            websocket, opened_at, session = self._idle.popleft()
+            if websocket.open and now - opened_at < self.max_idle:
+                self._stats["hits"] += 1
+                self._wakeup.set()
+                return websocket, session
+            self._stats["expired"] += 1
+            self._close(websocket)
+        self._stats["misses"] += 1
+        self._wakeup.set()
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns pool statistics.
+
+        Returns:
+            Dict[str, float]: Connections idle and opening, acquisitions served from
+                the pool (hits) or not (misses), connections opened, expired and
+                failed, and the mean time to open and configure one in seconds.
+        """
+        stats = dict(self._stats)
+        stats["idle"] = len(self._idle)
+        stats["opening"] = len(self._opening)
+        stats["connect_mean_s"] = stats["connect_total_s"] / max(1, stats["opened"])
+        return stats
+
+    async def _maintain(self) -> None:
+        while True:
+            self._wakeup.clear()
+            self._expire()
+            missing = self.size - len(self._idle) - len(self._opening)
+            for _ in range(max(0, missing)):
+                task = asyncio.create_task(self._open())
+                self._opening.add(task)
+                task.add_done_callback(self._opening.discard)
+            # 연속으로 실패하면 재시도 간격을 늘림
+            delay = min(30.0, 0.5 * 2**self._failures) if self._failures else None
+            if delay is not None:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.max_idle / 4)
+            except asyncio.TimeoutError:
+                pass
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        kept: Deque[Tuple[WebSocketClientProtocol, float, Dict[str, Any]]] = deque()
+        for websocket, opened_at, session in self._idle:
+            if websocket.open and now - opened_at < self.max_idle:
+                kept.append((websocket, opened_at, session))
+            else:
+                self._stats["expired"] += 1
+                self._close(websocket)
+        self._idle = kept
+
+    def _close(self, websocket: WebSocketClientProtocol) -> None:
+        # 닫는 중인 연결은 aclose에서 기다림
+        task = asyncio.create_task(websocket.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _open(self) -> None:
+        started = time.monotonic()
+        session = self.session
+        try:
+            websocket = await asyncio.wait_for(
+                self._open_configured(session), self.connect_timeout
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failures += 1
+            self._stats["failed"] += 1
+            logger.warning("Failed to open pooled upstream connection: %s", e)
+            self._wakeup.set()
+            return
+        self._failures = 0
+        self._stats["opened"] += 1
+        self._stats["connect_total_s"] += time.monotonic() - started
+        self._idle.append((websocket, time.monotonic(), session))
+
+    async def _open_configured(
+        self, session: Dict[str, Any]
+    ) -> WebSocketClientProtocol:
+        websocket = await open_connection(
+            api_key=self.api_key.get_secret_value(), model=self.model, url=self.url
+        )
+        try:
+            await websocket.send(
+                codec.dumps({"type": "session.update", "session": session})
+            )
+            # session.created, session.updated를 여기서 소비해서 대화에 섞이지 않게 함
+            async for raw_event in websocket:
+                event = codec.loads(raw_event)
+                if event.get("type") == "session.updated":
+                    return websocket
+                if event.get("type") == "error":
+                    raise RuntimeError(str(event.get("error")))
+            raise ConnectionError("connection closed before session.updated")
+        except BaseException:
+            await websocket.close()
+            raise
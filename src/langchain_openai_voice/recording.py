@@ -0,0 +1,308 @@
+# Recording of relayed events, and helpers to replay a recording offline
+#
+# A recording is newline-delimited JSON, gzip-compressed when the path ends with
+# ".gz". The first line is a header; every other line is one event:
+#   {"t": <seconds since start>, "s": <stream key>, "e": <event>}
+
+import asyncio
+import gzip
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import IO, Any, Deque, Dict, List, Tuple
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, PrivateAttr
+
+from . import codec
+from .constants import OUTPUT_AUDIO_EVENT
+from .utils import extract_string_field, sniff_event_type
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+RecordedEvent = Tuple[float, str, Dict[str, Any] | str]
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", buffering=1 << 20)
+
+
+class SessionRecorder(BaseModel):
+    """
+    Appends the events of one conversation to a recording file.
+
+    `record` only formats the line and puts it on a queue; a background thread
+    writes it, so disk latency never reaches the event loop. When the queue is full,
+    events are dropped and counted rather than blocking the relay.
+
+    Attributes:
+        path (str): The recording file. A ".gz" suffix enables gzip compression.
+        max_queue (int): Lines buffered for the writer thread.
+    """
+
+    path: str
+    max_queue: int = 10000
+
+    _queue: queue.Queue = PrivateAttr()
+    _thread: threading.Thread | None = PrivateAttr(default=None)
+    _started_at: float = PrivateAttr(default=0.0)
+    _recorded: int = PrivateAttr(default=0)
+    _dropped: int = PrivateAttr(default=0)
+
+    def start(self, header: Dict[str, Any]) -> None:
+        """
+        Starts the writer thread and writes the header.
+
+        Args:
+            header (Dict[str, Any]): Session information, e.g. the model and the
+                session configuration, stored in the first line.
+        """
+        self._queue = queue.Queue(self.max_queue)
+        self._started_at = time.perf_counter()
+        first_line = codec.dumps(
+            {
+                "recording": RECORDING_VERSION,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                **header,
+            }
+        )
+        self._queue.put(first_line + "\n")
+        self._thread = threading.Thread(
+            target=self._write, name="session-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, stream: str, event: Dict[str, Any] | str) -> None:
+        """
+        Records an event.
+
+        Args:
+            stream (str): The stream the event came from, e.g. "input_mic".
+            event (Dict[str, Any] | str): The event, parsed or as raw JSON.
+        """
+        if self._thread is None:
+            return
+        # 원본 JSON 이벤트는 다시 직렬화하지 않고 그대로 이어 붙임
+        # 이벤트로 보이지 않는 문자열은 한 줄의 JSON이 되도록 다시 직렬화 (JSON이 아니면 문자열로)
+        if not isinstance(event, str):
+            event = codec.dumps(event)
+        elif "\n" in event or sniff_event_type(event) is None:
+            try:
+                event = codec.dumps(codec.loads(event))
+            except ValueError:
+                event = codec.dumps(event)
+        t = time.perf_counter() - self._started_at
+        line = f'{{"t":{t:.6f},"s":"{stream}","e":{event}}}\n'
+        try:
+            self._queue.put_nowait(line)
+            self._recorded += 1
+        except queue.Full:
+            self._dropped += 1
+
+    async def aclose(self) -> None:
+        """
+        Writes the remaining events and closes the file.
+        """
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        # 큐가 가득 차 있어도 종료 신호는 반드시 전달
+        await asyncio.to_thread(self._queue.put, None)
+        await asyncio.to_thread(thread.join)
+        if self._dropped:
+            logger.warning(
+                "Dropped %d events while recording %s", self._dropped, self.path
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns recording statistics.
+
+        Returns:
+            Dict[str, int]: Events recorded, dropped and waiting to be written.
+        """
+        return {
+            "recorded": self._recorded,
+            "dropped": self._dropped,
+            "pending": self._queue.qsize() if self._thread is not None else 0,
+        }
+
+    def _write(self) -> None:
+        with _open(self.path, "w") as f:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    break
+                f.write(line)
+
+
+def load_recording(path: str) -> Tuple[Dict[str, Any], List[RecordedEvent]]:
+    """
+    Reads a recording.
+
+    Args:
+        path (str): The recording file.
+
+    Returns:
+        Tuple[Dict[str, Any], List[RecordedEvent]]: The header, and the events as
+            (seconds since start, stream key, event) tuples. Audio deltas are kept
+            as raw JSON strings.
+
+    Raises:
+        ValueError: If the file is not a recording of a supported version.
+    """
+    with _open(path, "r") as f:
+        header = codec.loads(f.readline())
+        if header.get("recording") != RECORDING_VERSION:
+            raise ValueError(f"{path} is not a version {RECORDING_VERSION} recording")
+        events: List[RecordedEvent] = []
+        for line in f:
+            record = codec.loads(line)
+            event = record["e"]
+            if isinstance(event, dict) and event.get("type") == OUTPUT_AUDIO_EVENT:
+                event = codec.dumps(event)
+            events.append((record["t"], record["s"], event))
+    return header, events
+
+
+def upstream_script(events: List[RecordedEvent]) -> List[Tuple[float, int, str]]:
+    """
+    Turns the upstream events of a recording into a script for `FakeRealtimeServer`.
+
+    An upstream event recorded after the n-th tool output is held until n tool
+    outputs have been received, then sent at its recorded delay after that output.
+    Events before the first tool output are timed from the start of the session.
+    This keeps the replay faithful when tools run faster or slower than recorded.
+
+    Args:
+        events (List[RecordedEvent]): The events of a recording.
+
+    Returns:
+        List[Tuple[float, int, str]]: (seconds after the anchor, tool outputs to
+            wait for, raw event) tuples, in order.
+    """
+    script = []
+    anchor = 0.0
+    outputs = 0
+    for t, stream, event in events:
+        if stream == "tool_outputs":
+            anchor = t
+            outputs += 1
+        elif stream == "output_speaker":
+            raw = event if isinstance(event, str) else codec.dumps(event)
+            script.append((max(0.0, t - anchor), outputs, raw))
+    return script
+
+
+def recorded_audio_bytes(events: List[RecordedEvent]) -> int:
+    """
+    Returns the PCM bytes of the audio deltas in a recording.
+
+    Args:
+        events (List[RecordedEvent]): The events of a recording.
+
+    Returns:
+        int: The decoded size of every `response.audio.delta` payload.
+    """
+    total = 0
+    for _, stream, event in events:
+        if stream == "output_speaker" and isinstance(event, str):
+            if sniff_event_type(event) == OUTPUT_AUDIO_EVENT:
+                delta = extract_string_field(event, "delta")
+                total += len(delta or "") * 3 // 4
+    return total
+
+
+class RecordedTool(BaseTool):
+    """
+    A tool that answers with the outputs of a recording instead of running.
+
+    Calls are matched by arguments; repeated calls with the same arguments get the
+    recorded outputs in order. Each answer is delayed by the recorded tool latency
+    divided by `speed` (0 answers immediately).
+
+    Attributes:
+        outputs (Dict[str, Deque[Tuple[str, float]]]): Recorded (output, latency)
+            pairs indexed by canonical arguments.
+        speed (float): The replay speed.
+    """
+
+    outputs: Dict[str, Deque[Tuple[str, float]]]
+    speed: float = 1.0
+
+    def _run(self, **kwargs: Any) -> Any:
+        # thread/process 실행 정책이 지정된 도구는 동기 경로로 호출됨
+        output, latency = self._next_output(kwargs)
+        if self.speed > 0:
+            time.sleep(latency / self.speed)
+        return self._result(output)
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        output, latency = self._next_output(kwargs)
+        if self.speed > 0:
+            await asyncio.sleep(latency / self.speed)
+        return self._result(output)
+
+    def _next_output(self, kwargs: Dict[str, Any]) -> Tuple[str, float]:
+        recorded = self.outputs.get(codec.canonical_dumps(kwargs))
+        if not recorded:
+            raise ValueError(f"no recorded output for {self.name}({kwargs})")
+        return recorded.popleft()
+
+    @staticmethod
+    def _result(output: str) -> Any:
+        if output.startswith("Error: "):
+            raise RuntimeError(output[len("Error: ") :])
+        try:
+            return codec.loads(output)
+        except ValueError:
+            return output
+
+    @classmethod
+    def from_recording(
+        cls, header: Dict[str, Any], events: List[RecordedEvent], speed: float = 1.0
+    ) -> List["RecordedTool"]:
+        """
+        Builds one tool per tool definition of a recording.
+
+        Args:
+            header (Dict[str, Any]): The recording header.
+            events (List[RecordedEvent]): The events of the recording.
+            speed (float): The replay speed.
+
+        Returns:
+            List[RecordedTool]: The tools, answering with the recorded outputs.
+        """
+        calls: Dict[str, Tuple[str, str, float]] = {}
+        outputs: Dict[str, Dict[str, Deque[Tuple[str, float]]]] = defaultdict(
+            lambda: defaultdict(deque)
+        )
+        for t, stream, event in events:
+            if stream == "output_speaker" and not isinstance(event, str):
+                if event.get("type") == "response.function_call_arguments.done":
+                    try:
+                        args = codec.canonical_dumps(codec.loads(event["arguments"]))
+                    except ValueError:
+                        continue
+                    calls[event["call_id"]] = (event["name"], args, t)
+            elif stream == "tool_outputs":
+                call = calls.pop(event["item"]["call_id"], None)
+                if call is not None:
+                    name, args, called_at = call
+                    outputs[name][args].append((event["item"]["output"], t - called_at))
+        return [
+            cls(
+                name=definition["name"],
+                description=definition.get("description", ""),
+                outputs=dict(outputs[definition["name"]]),
+                speed=speed,
+            )
+            for definition in header.get("session", {}).get("tools", [])
+        ]
@@ -0,0 +1,177 @@
+# Registry of tools that are imported and constructed on first use
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, PrivateAttr
+
+from . import codec
+
+ToolFactory = Callable[[], BaseTool] | str
+
+
+def tool_definition(tool: BaseTool) -> Dict[str, Any]:
+    """
+    Converts a tool to a Realtime API function definition.
+
+    Args:
+        tool (BaseTool): The tool.
+
+    Returns:
+        Dict[str, Any]: The definition, with the full JSON Schema of the tool
+            arguments as `parameters`.
+    """
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    function = convert_to_openai_tool(tool)["function"]
+    return {
+        "type": "function",
+        "name": function["name"],
+        "description": function.get("description", ""),
+        "parameters": function.get("parameters", {"type": "object", "properties": {}}),
+    }
+
+
+class ToolRegistry(BaseModel):
+    """
+    Tools registered by name and built the first time a session needs them.
+
+    Importing a tool integration and constructing the tool can take longer than
+    the rest of the server startup, and most tools are not needed until a model
+    calls them. Each tool is registered with a factory, either a callable or a
+    "module:attribute" import path whose attribute is a tool or returns one, and
+    is built once per process. Tool definitions and their serialized form are
+    computed once and reused by every session.
+    """
+
+    _factories: Dict[str, ToolFactory] = PrivateAttr(default_factory=dict)
+    _tools: Dict[str, BaseTool] = PrivateAttr(default_factory=dict)
+    # (도구 정의, 직렬화된 도구 정의). 세션마다 읽으므로 private 속성 하나로 묶음
+    _definitions: Tuple[List[Dict[str, Any]], str] | None = PrivateAttr(default=None)
+    # 첫 세션과 백그라운드 preload가 동시에 도구를 만들지 않도록 함
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+
+    def register(self, name: str, factory: ToolFactory) -> None:
+        """
+        Registers a tool without building it.
+
+        Args:
+            name (str): The tool name, which must match the built tool.
+            factory (ToolFactory): A callable returning the tool, or a
+                "module:attribute" import path of the tool or of such a callable.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._tools.pop(name, None)
+            self._definitions = None
+
+    @property
+    def names(self) -> List[str]:
+        """The registered tool names, in registration order."""
+        return list(self._factories)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether every tool and its definition is built."""
+        return self._definitions is not None
+
+    def get(self, name: str) -> BaseTool:
+        """
+        Returns a tool, building it on first use.
+
+        Args:
+            name (str): The tool name.
+
+        Returns:
+            BaseTool: The tool.
+
+        Raises:
+            KeyError: If no tool is registered under the name.
+            ValueError: If the factory builds a tool with another name.
+        """
+        tool = self._tools.get(name)
+        if tool is not None:
+            return tool
+        with self._lock:
+            tool = self._tools.get(name)
+            if tool is None:
+                tool = self._build(name, self._factories[name])
+                self._tools[name] = tool
+        return tool
+
+    def tools(self) -> List[BaseTool]:
+        """
+        Returns every registered tool, building the ones not built yet.
+
+        Returns:
+            List[BaseTool]: The tools, in registration order.
+        """
+        return [self.get(name) for name in self._factories]
+
+    def tools_by_name(self) -> Dict[str, BaseTool]:
+        """
+        Returns every registered tool indexed by name.
+
+        Returns:
+            Dict[str, BaseTool]: The tools.
+        """
+        return {name: self.get(name) for name in self._factories}
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """
+        Returns the Realtime API definitions of every tool.
+
+        The list is computed once and the same object is returned afterwards, so it
+        must not be modified.
+
+        Returns:
+            List[Dict[str, Any]]: The function definitions.
+        """
+        cached = self._definitions
+        if cached is None:
+            with self._lock:
+                if self._definitions is None:
+                    definitions = [tool_definition(t) for t in self.tools()]
+                    self._definitions = (definitions, codec.dumps(definitions))
+                cached = self._definitions
+        return cached[0]
+
+    def load(self) -> None:
+        """
+        Builds every tool and its definition ahead of the first session.
+        """
+        self.definitions()
+
+    def session_update(self, session: Dict[str, Any]) -> str:
+        """
+        Serializes a `session.update` event.
+
+        When `tools` are the cached definitions, their serialized form is reused and
+        only the other settings are serialized.
+
+        Args:
+            session (Dict[str, Any]): The session settings.
+
+        Returns:
+            str: The raw JSON event.
+        """
+        cached = self._definitions
+        if cached is None or session.get("tools") is not cached[0]:
+            return codec.dumps({"type": "session.update", "session": session})
+        settings = {key: value for key, value in session.items() if key != "tools"}
+        head = codec.dumps({"type": "session.update", "session": settings})
+        # 마지막 "}}" 앞에 미리 직렬화해 둔 tools를 끼워 넣음
+        separator = "," if settings else ""
+        return f'{head[:-2]}{separator}"tools":{cached[1]}}}}}'
+
+    @staticmethod
+    def _build(name: str, factory: ToolFactory) -> BaseTool:
+        if isinstance(factory, str):
+            module_name, _, attribute = factory.partition(":")
+            factory = getattr(importlib.import_module(module_name), attribute)
+        tool = factory if isinstance(factory, BaseTool) else factory()
+        if tool.name != name:
+            raise ValueError(f"tool registered as {name} is named {tool.name}")
+        return tool
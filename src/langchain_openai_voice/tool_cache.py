@@ -0,0 +1,146 @@
+# Shared cache of tool results with TTL, LRU eviction and single-flight lookups
+
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .codec import canonical_dumps
+
+CacheKey = Tuple[str, str]
+
+
+class ToolResultCache(BaseModel):
+    """
+    A cache of serialized tool results keyed on tool name and canonical arguments.
+
+    One instance is meant to be shared by every session of a process. Concurrent
+    identical calls are deduplicated: only the first one runs the tool, and the
+    others wait for its result. A caller being cancelled does not cancel the shared
+    call, so its result is still cached. Failed calls are never cached.
+
+    Attributes:
+        max_entries (int): The number of results kept before evicting the least
+            recently used one.
+        default_ttl (float): Seconds a result stays valid. 0 disables caching.
+        ttl_by_tool (Dict[str, float]): Per-tool TTLs overriding the default.
+    """
+
+    max_entries: int = 1024
+    default_ttl: float = 300.0
+    ttl_by_tool: Dict[str, float] = Field(default_factory=dict)
+
+    _entries: "OrderedDict[CacheKey, Tuple[float, str]]" = PrivateAttr(
+        default_factory=OrderedDict
+    )
+    _inflight: Dict[CacheKey, asyncio.Future] = PrivateAttr(default_factory=dict)
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+    )
+
+    @staticmethod
+    def make_key(tool_name: str, args: Any) -> CacheKey:
+        """
+        Builds the cache key of a tool call.
+
+        Args:
+            tool_name (str): The tool name.
+            args (Any): The parsed tool arguments.
+
+        Returns:
+            CacheKey: The tool name and its canonical JSON arguments.
+        """
+        return tool_name, canonical_dumps(args)
+
+    def ttl_for(self, tool_name: str) -> float:
+        """
+        Returns the TTL of a tool's results.
+
+        Args:
+            tool_name (str): The tool name.
+
+        Returns:
+            float: The TTL in seconds. 0 means the tool is not cached.
+        """
+        return self.ttl_by_tool.get(tool_name, self.default_ttl)
+
+    async def get_or_compute(
+        self,
+        tool_name: str,
+        args: Any,
+        compute: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        Returns the cached result of a tool call, computing it on a miss.
+
+        Args:
+            tool_name (str): The tool name.
+            args (Any): The parsed tool arguments.
+            compute (Callable[[], Awaitable[str]]): Runs the tool and returns its
+                serialized result.
+
+        Returns:
+            str: The serialized tool result.
+
+        Raises:
+            Exception: Whatever `compute` raises.
+        """
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0:
+            return await compute()
+
+        key = self.make_key(tool_name, args)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return result
+            del self._entries[key]
+            self._stats["expirations"] += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            future = asyncio.ensure_future(compute())
+            self._inflight[key] = future
+            future.add_done_callback(partial(self._on_computed, key, ttl))
+        return await asyncio.shield(future)
+
+    def _on_computed(self, key: CacheKey, ttl: float, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._entries[key] = (time.monotonic() + ttl, future.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """
+        Drops every cached result.
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns cache counters.
+
+        Returns:
+            Dict[str, int]: Hits, misses, coalesced lookups, evictions, expirations
+                and the current number of entries.
+        """
+        return {**self._stats, "entries": len(self._entries)}
@@ -1,35 +1,109 @@
 # Class for managing tool execution and returning results as a stream
 
 import asyncio
-import json
-from typing import AsyncIterator
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Tuple
 
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, PrivateAttr
+from pydantic import BaseModel, Field, PrivateAttr
+
+from . import codec
+from .execution import ToolExecutionPolicy, ToolExecutionPools
+from .metrics import TOOL_SPECULATIONS, SessionMetrics
+from .tool_cache import ToolResultCache
+from .tracing import TOOL_NAME
+from .utils import serialize_result
+
+
+def function_call_output(call_id: str, output: str) -> dict:
+    """
+    Builds the event that returns a tool result to the model.
+
+    Args:
+        call_id (str): The id of the function call being answered.
+        output (str): The serialized tool result.
+
+    Returns:
+        dict: A `conversation.item.create` event.
+    """
+    return {
+        "type": "conversation.item.create",
+        "item": {
+            "id": call_id,
+            "call_id": call_id,
+            "type": "function_call_output",
+            "output": output,
+        },
+    }
+
+
+def _arguments_key(arguments: str) -> str | None:
+    try:
+        return codec.canonical_dumps(codec.loads(arguments))
+    except ValueError:
+        return None
 
 
 class VoiceToolExecutor(BaseModel):
     """
     A class for managing tool execution and emitting function call outputs as a stream.
 
-    This class can accept function calls, execute them, and emit the results as a stream.
+    Tool calls are started as soon as they are added and run concurrently, up to
+    `max_concurrency` at a time; further calls wait in FIFO order. Each call is
+    bounded by a timeout, and failures, timeouts and unknown tools are reported to
+    the model as error outputs instead of ending the session.
+
+    Tools whose policy is `speculative` can be started with `speculate` before the
+    call is final. When `add_tool_call` later receives the same arguments, the
+    running call is adopted instead of starting a new one; otherwise it is
+    cancelled.
 
     Attributes:
         tools_by_name (dict[str, BaseTool]): A dictionary of tools indexed by their names.
+        max_concurrency (int): The maximum number of tools running at once.
+        default_timeout (float | None): Seconds a tool may run. None disables it.
+        tool_timeouts (dict[str, float]): Per-tool timeouts overriding the default.
+        ordered (bool): Emit results in the order the calls were added, instead of
+            as soon as each one completes.
+        cache (ToolResultCache | None): An optional cache of tool results, usually
+            shared by every session of the process.
+        policies (dict[str, ToolExecutionPolicy]): Per-tool execution policies.
+            Tools without one, or every tool when `pools` is None, are awaited
+            with `ainvoke` on the event loop.
+        pools (ToolExecutionPools | None): The thread and process pools used by
+            the execution policies, usually shared by every session.
+        metrics (SessionMetrics | None): Records the latency and outcome of each
+            tool call.
     """
 
     tools_by_name: dict[str, BaseTool]
-    _trigger_future: asyncio.Future = PrivateAttr(default_factory=asyncio.Future)
-    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    max_concurrency: int = 4
+    default_timeout: float | None = 30.0
+    tool_timeouts: dict[str, float] = Field(default_factory=dict)
+    ordered: bool = False
+    cache: ToolResultCache | None = None
+    policies: dict[str, ToolExecutionPolicy] = Field(default_factory=dict)
+    pools: ToolExecutionPools | None = None
+    metrics: SessionMetrics | None = None
 
-    async def _trigger_func(self) -> dict:
-        """
-        Waits for and returns the next tool call.
+    _semaphore: asyncio.Semaphore = PrivateAttr()
+    _results: asyncio.Queue = PrivateAttr(default_factory=asyncio.Queue)
+    _tasks: Dict[int, asyncio.Task] = PrivateAttr(default_factory=dict)
+    # 호출이 추가된 순서와, ordered 모드에서 다음에 내보낼 순서
+    _next_seq: int = PrivateAttr(default=0)
+    _emit_seq: int = PrivateAttr(default=0)
+    _closed: bool = PrivateAttr(default=False)
+    # 인자가 확정되기 전에 시작한 호출: call_id -> (정규화된 인자, task)
+    _speculative: Dict[str, Tuple[str | None, asyncio.Task]] = PrivateAttr(
+        default_factory=dict
+    )
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"speculated": 0, "hits": 0, "misses": 0}
+    )
 
-        Returns:
-            dict: A dictionary representing the next tool call.
-        """
-        return await self._trigger_future
+    def model_post_init(self, __context: Any) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
 
     async def add_tool_call(self, tool_call: dict) -> None:
         """
@@ -37,15 +111,101 @@ class VoiceToolExecutor(BaseModel):
 
         Args:
             tool_call (dict): A dictionary representing the tool call to be added.
+        """
+        if self._closed:
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        task = self._adopt_speculation(tool_call)
+        try:
+            if task is None:
+                task = await self._create_tool_call_task(tool_call)
+        except ValueError as e:
+            # immediately yield error, do not add task
+            self._results.put_nowait(
+                (seq, function_call_output(tool_call["call_id"], f"Error: {str(e)}"))
+            )
+            return
+        self._tasks[seq] = task
+        task.add_done_callback(partial(self._on_task_done, seq))
 
-        Raises:
-            ValueError: If a tool call is already in progress.
+    def can_speculate(self, tool_name: str) -> bool:
+        """
+        Returns whether a tool may be started before its call is final.
+
+        Args:
+            tool_name (str): The tool name.
+
+        Returns:
+            bool: True if the tool exists and its policy is speculative.
+        """
+        policy = self.policies.get(tool_name)
+        return (
+            not self._closed
+            and policy is not None
+            and policy.speculative
+            and tool_name in self.tools_by_name
+        )
+
+    async def speculate(self, tool_call: dict) -> None:
+        """
+        Starts a tool call whose arguments may still change.
+
+        Its output is only emitted once `add_tool_call` confirms it with the same
+        arguments. Calls to tools that cannot speculate, or with invalid arguments,
+        are ignored.
+
+        Args:
+            tool_call (dict): The tool call, with the arguments streamed so far.
+        """
+        call_id = tool_call["call_id"]
+        if call_id in self._speculative or not self.can_speculate(tool_call["name"]):
+            return
+        try:
+            task = await self._create_tool_call_task(tool_call)
+        except ValueError:
+            return
+        self._speculative[call_id] = (_arguments_key(tool_call["arguments"]), task)
+        self._stats["speculated"] += 1
+
+    def cancel_speculations(self) -> int:
+        """
+        Cancels tool calls started speculatively and not confirmed yet.
+
+        Returns:
+            int: The number of cancelled speculative calls.
+        """
+        speculations = list(self._speculative.values())
+        self._speculative.clear()
+        for _, task in speculations:
+            task.cancel()
+        return len(speculations)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns speculation statistics.
+
+        Returns:
+            Dict[str, int]: Tool calls started speculatively, and how many were
+                adopted (hits) or cancelled because the arguments changed (misses).
         """
-        async with self._lock:
-            if self._trigger_future.done():
-                raise ValueError("Tool call adding already in progress")
+        return dict(self._stats)
 
-            self._trigger_future.set_result(tool_call)
+    def _adopt_speculation(self, tool_call: dict) -> asyncio.Task | None:
+        speculation = self._speculative.pop(tool_call["call_id"], None)
+        if speculation is None:
+            return None
+        arguments, task = speculation
+        if arguments is not None and arguments == _arguments_key(
+            tool_call["arguments"]
+        ):
+            self._stats["hits"] += 1
+            TOOL_SPECULATIONS.inc(result="hit")
+            return task
+        task.cancel()
+        self._stats["misses"] += 1
+        TOOL_SPECULATIONS.inc(result="miss")
+        return None
 
     async def _create_tool_call_task(self, tool_call: dict) -> asyncio.Task[dict]:
         """
@@ -62,7 +222,6 @@ class VoiceToolExecutor(BaseModel):
         """
         tool = self.tools_by_name.get(tool_call["name"])
         if tool is None:
-            # immediately yield error, do not add task
             raise ValueError(
                 f"tool {tool_call['name']} not found. "
                 f"Must be one of {list(self.tools_by_name.keys())}"
@@ -70,32 +229,95 @@ class VoiceToolExecutor(BaseModel):
 
         # try to parse args
         try:
-            args = json.loads(tool_call["arguments"])
-        except json.JSONDecodeError:
+            args = codec.loads(tool_call["arguments"])
+        except ValueError:
             raise ValueError(
                 f"failed to parse arguments `{tool_call['arguments']}`. Must be valid JSON."
             )
 
+        timeout = self.tool_timeouts.get(tool.name, self.default_timeout)
+
+        async def invoke() -> str:
+            async with self._semaphore:
+                result = await asyncio.wait_for(self._invoke(tool, args), timeout)
+            # not json serializable results fall back to str
+            return serialize_result(result)
+
         async def run_tool() -> dict:
-            result = await tool.ainvoke(args)
+            # 이 task 안에서만 적용됨 (event loop 지연을 일으킨 도구를 찾기 위함)
+            TOOL_NAME.set(tool.name)
+            started = time.perf_counter()
+            outcome = "ok"
             try:
-                result_str = json.dumps(result)
-            except TypeError:
-                # not json serializable, use str
-                result_str = str(result)
-            return {
-                "type": "conversation.item.create",
-                "item": {
-                    "id": tool_call["call_id"],
-                    "call_id": tool_call["call_id"],
-                    "type": "function_call_output",
-                    "output": result_str,
-                },
-            }
-
-        task = asyncio.create_task(run_tool())
+                if self.cache is None:
+                    result_str = await invoke()
+                else:
+                    result_str = await self.cache.get_or_compute(
+                        tool.name, args, invoke
+                    )
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                result_str = f"Error: tool {tool.name} timed out after {timeout}s"
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except Exception as e:
+                outcome = "error"
+                result_str = f"Error: {str(e)}"
+            finally:
+                if self.metrics is not None:
+                    self.metrics.tool_call(
+                        tool.name, outcome, time.perf_counter() - started
+                    )
+            return function_call_output(tool_call["call_id"], result_str)
+
+        task = asyncio.create_task(run_tool(), name=f"tool:{tool.name}")
         return task
 
+    async def _invoke(self, tool: BaseTool, args: Any) -> Any:
+        """
+        Runs a tool according to its execution policy.
+
+        Args:
+            tool (BaseTool): The tool to run.
+            args (Any): The parsed tool arguments.
+
+        Returns:
+            Any: The tool result.
+        """
+        policy = self.policies.get(tool.name)
+        if policy is None or self.pools is None:
+            return await tool.ainvoke(args)
+        return await self.pools.run(tool, args, policy)
+
+    def _on_task_done(self, seq: int, task: asyncio.Task) -> None:
+        self._tasks.pop(seq, None)
+        # 취소된 호출은 None으로 표시해서 순서대로 내보낼 때 건너뜀
+        self._results.put_nowait((seq, None if task.cancelled() else task.result()))
+
+    def cancel_all(self) -> int:
+        """
+        Cancels every queued and running tool call. Their results are never emitted.
+
+        Returns:
+            int: The number of cancelled tool calls.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        self.cancel_speculations()
+        return len(tasks)
+
+    async def aclose(self) -> None:
+        """
+        Cancels in-flight tool calls and stops accepting new ones.
+        """
+        self._closed = True
+        tasks = list(self._tasks.values())
+        tasks += [task for _, task in self._speculative.values()]
+        self.cancel_all()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     async def output_iterator(self) -> AsyncIterator[dict]:
         """
         An async iterator that yields events from tool executions.
@@ -103,30 +325,16 @@ class VoiceToolExecutor(BaseModel):
         Yields:
             dict: Events generated from tool executions.
         """
-        trigger_task = asyncio.create_task(self._trigger_func())
-        tasks = set([trigger_task])
+        completed: Dict[int, dict | None] = {}
         while True:
-            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-            for task in done:
-                tasks.remove(task)
-                if task == trigger_task:
-                    async with self._lock:
-                        self._trigger_future = asyncio.Future()
-                    trigger_task = asyncio.create_task(self._trigger_func())
-                    tasks.add(trigger_task)
-                    tool_call = task.result()
-                    try:
-                        new_task = await self._create_tool_call_task(tool_call)
-                        tasks.add(new_task)
-                    except ValueError as e:
-                        yield {
-                            "type": "conversation.item.create",
-                            "item": {
-                                "id": tool_call["call_id"],
-                                "call_id": tool_call["call_id"],
-                                "type": "function_call_output",
-                                "output": (f"Error: {str(e)}"),
-                            },
-                        }
-                else:
-                    yield task.result()
+            seq, output = await self._results.get()
+            if not self.ordered:
+                if output is not None:
+                    yield output
+                continue
+            completed[seq] = output
+            while self._emit_seq in completed:
+                output = completed.pop(self._emit_seq)
+                self._emit_seq += 1
+                if output is not None:
+                    yield output
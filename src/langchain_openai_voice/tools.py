@@ -1,7 +1,12 @@
 # Define the tools that can be used by the agent
+#
+# Tools are registered by name and only imported and constructed when a session
+# first needs them, so importing this module does not load the integrations.
 
-from langchain_core.tools import tool
-from langchain_community.tools import TavilySearchResults
+from langchain_core.tools import BaseTool, tool
+
+from .execution import ToolExecutionPolicy
+from .registry import ToolRegistry
 
 
 # NOTE. Tool example
@@ -9,15 +14,35 @@ from langchain_community.tools import TavilySearchResults
 # def add(a: int, b: int):
 #     """Add two numbers. Please let the user know that you're adding the numbers BEFORE you call the tool"""
 #     return a + b
+#
+# TOOLS.register(add.name, add)
+#
+# 동기 함수나 CPU를 많이 쓰는 도구는 TOOL_POLICIES에 등록해서 event loop 밖에서 실행
+# TOOL_POLICIES = {add.name: ToolExecutionPolicy(mode="process")}
+
+TAVILY_SEARCH = "tavily_search_results_json"
+
+
+def tavily_search() -> BaseTool:
+    from langchain_community.tools import TavilySearchResults
+
+    return TavilySearchResults(
+        max_results=5,
+        include_answer=True,
+        description=(
+            "This is a search tool for accessing the internet.\n\n"
+            "Let the user know you're asking your friend Tavily for help before you call the tool."
+        ),
+    )
+
 
+TOOLS = ToolRegistry()
+TOOLS.register(TAVILY_SEARCH, tavily_search)
 
-tavily_tool = TavilySearchResults(
-    max_results=5,
-    include_answer=True,
-    description=(
-        "This is a search tool for accessing the internet.\n\n"
-        "Let the user know you're asking your friend Tavily for help before you call the tool."
-    ),
-)
+# Seconds a tool result may be served from the shared cache (0 disables it)
+TOOL_CACHE_TTLS = {TAVILY_SEARCH: 300.0}
 
-TOOLS = [tavily_tool]
+# Where each tool runs: "async" (event loop), "thread" (named thread pool) or
+# "process" (process pool, picklable tools only)
+# speculative=True starts a read-only tool while its arguments are still streaming
+TOOL_POLICIES = {TAVILY_SEARCH: ToolExecutionPolicy(mode="async", speculative=True)}
@@ -0,0 +1,11 @@
+# Context variables naming the conversation and tool that work on the event loop
+# belongs to
+#
+# `OpenAIVoiceReactAgent.aconnect` sets the session id and each tool call sets its
+# tool name, so tasks and callbacks they start inherit both. Monitoring code can
+# read them from a callback's context to tell which conversation blocked the loop.
+
+from contextvars import ContextVar
+
+SESSION_ID: ContextVar[str | None] = ContextVar("voice_session_id", default=None)
+TOOL_NAME: ContextVar[str | None] = ContextVar("voice_tool_name", default=None)
@@ -0,0 +1,368 @@
+# Durable store of conversation transcripts, tool calls and session metadata
+#
+# Writes are queued and committed in batches by a background thread into SQLite
+# (WAL mode), so the event loop never waits for the disk. Any number of sessions
+# share one store.
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from . import codec
+from .metrics import TRANSCRIPT_EVENTS
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    "id TEXT PRIMARY KEY, started_at REAL NOT NULL, ended_at REAL, "
+    "metadata TEXT NOT NULL, outcome TEXT, stats TEXT)",
+    "CREATE INDEX IF NOT EXISTS sessions_started_at ON sessions (started_at)",
+    "CREATE TABLE IF NOT EXISTS events ("
+    "session_id TEXT NOT NULL, seq INTEGER NOT NULL, t REAL NOT NULL, "
+    "kind TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (session_id, seq))",
+)
+
+# 큐에 들어가는 작업: (SQL, 인자) 또는 flush 완료를 알릴 threading.Event
+_Write = Tuple[str, Tuple[Any, ...]]
+
+
+class TranscriptStore(BaseModel):
+    """
+    Persists what was said and done in each conversation.
+
+    `begin_session`, `record` and `end_session` only put a row on a bounded queue;
+    a background thread commits queued rows in batches, one transaction per batch.
+    When the queue is full, rows are dropped and counted rather than blocking the
+    relay. Rows still queued are written by `aclose`. If the writer thread stops
+    on an error, later rows are dropped and counted.
+
+    Event kinds recorded by the agent are "user" and "assistant" transcripts,
+    "tool_call" and "tool_output".
+
+    Attributes:
+        path (str): The SQLite database file.
+        max_queue (int): Rows buffered for the writer thread.
+        batch_size (int): The most rows committed in one transaction.
+        wait_timeout (float): The longest `flush` and `aclose` wait for the writer
+            thread, in seconds.
+    """
+
+    path: str
+    max_queue: int = 10000
+    batch_size: int = 500
+    wait_timeout: float = 10.0
+
+    _queue: queue.Queue = PrivateAttr()
+    _loop: asyncio.AbstractEventLoop | None = PrivateAttr(default=None)
+    _thread: threading.Thread | None = PrivateAttr(default=None)
+    _seqs: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _read_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _reader: sqlite3.Connection | None = PrivateAttr(default=None)
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"written": 0, "dropped": 0, "batches": 0}
+    )
+
+    def start(self) -> None:
+        """
+        Creates the tables and starts the writer thread. Must be called from the
+        event loop that records the conversations.
+        """
+        if self._thread is not None:
+            return
+        # 지표와 통계는 event loop에서만 갱신하므로 writer thread는 결과를 loop로 넘김
+        self._loop = asyncio.get_running_loop()
+        conn = self._connect()
+        try:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+        self._queue = queue.Queue(self.max_queue)
+        self._thread = threading.Thread(
+            target=self._write, name="transcript-store", daemon=True
+        )
+        self._thread.start()
+
+    def begin_session(self, session_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Records the start of a conversation.
+
+        Args:
+            session_id (str): The conversation id.
+            metadata (Dict[str, Any]): e.g. the model and the instructions.
+        """
+        self._seqs[session_id] = 0
+        self._put(
+            "INSERT OR REPLACE INTO sessions (id, started_at, metadata) "
+            "VALUES (?, ?, ?)",
+            (session_id, time.time(), codec.dumps(metadata)),
+        )
+
+    def record(self, session_id: str, kind: str, data: Dict[str, Any]) -> None:
+        """
+        Records an event of a conversation.
+
+        Args:
+            session_id (str): The conversation id.
+            kind (str): The event kind, e.g. "user" or "tool_call".
+            data (Dict[str, Any]): The event details.
+        """
+        seq = self._seqs.get(session_id, 0)
+        self._seqs[session_id] = seq + 1
+        self._put(
+            "INSERT OR REPLACE INTO events (session_id, seq, t, kind, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (session_id, seq, time.time(), kind, codec.dumps(data)),
+        )
+
+    def end_session(
+        self, session_id: str, outcome: str, stats: Dict[str, Any] | None = None
+    ) -> None:
+        """
+        Records the end of a conversation.
+
+        Args:
+            session_id (str): The conversation id.
+            outcome (str): How it ended, e.g. "closed" or "upstream_error".
+            stats (Dict[str, Any] | None): e.g. `SessionMetrics.summary()`.
+        """
+        self._seqs.pop(session_id, None)
+        self._put(
+            "UPDATE sessions SET ended_at = ?, outcome = ?, stats = ? WHERE id = ?",
+            (time.time(), outcome, codec.dumps(stats or {}), session_id),
+        )
+
+    async def flush(self) -> None:
+        """
+        Waits until every row queued so far is committed, at most `wait_timeout`
+        seconds.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        if not await asyncio.to_thread(self._wait_writer, done):
+            logger.warning("Timed out waiting for transcript rows to be written")
+
+    async def aclose(self) -> None:
+        """
+        Writes the remaining rows and stops the writer thread.
+        """
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        if thread.is_alive():
+            # 큐가 가득 차 있어도 종료 신호는 전달 (writer가 멈춰 있으면 기다리지 않음)
+            try:
+                await asyncio.to_thread(
+                    self._queue.put, None, timeout=self.wait_timeout
+                )
+            except queue.Full:
+                pass
+            await asyncio.to_thread(thread.join, self.wait_timeout)
+            if thread.is_alive():
+                logger.warning("Timed out writing the remaining transcript rows")
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+        if self._stats["dropped"]:
+            logger.warning(
+                "Dropped %d transcript rows for %s", self._stats["dropped"], self.path
+            )
+
+    async def list_sessions(
+        self, limit: int = 50, before: float | None = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns past conversations, most recent first.
+
+        Args:
+            limit (int): The most conversations returned.
+            before (float | None): Only conversations started before this Unix time,
+                e.g. the `started_at` of the last one of the previous page.
+
+        Returns:
+            List[Dict[str, Any]]: The id, start and end times, outcome, number of
+                events and metadata of each conversation.
+        """
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT s.id, s.started_at, s.ended_at, s.outcome, s.metadata, "
+            "(SELECT COUNT(*) FROM events e WHERE e.session_id = s.id) "
+            "FROM sessions s WHERE s.started_at < ? "
+            "ORDER BY s.started_at DESC LIMIT ?",
+            (before if before is not None else float("inf"), limit),
+        )
+        return [
+            {
+                "id": session_id,
+                "started_at": started_at,
+                "ended_at": ended_at,
+                "outcome": outcome,
+                "events": events,
+                "metadata": codec.loads(metadata),
+            }
+            for session_id, started_at, ended_at, outcome, metadata, events in rows
+        ]
+
+    async def get_session(self, session_id: str) -> Dict[str, Any] | None:
+        """
+        Returns one conversation with all its events.
+
+        Args:
+            session_id (str): The conversation id.
+
+        Returns:
+            Dict[str, Any] | None: The conversation as in `list_sessions`, with its
+                statistics and its events in order, or None if it is unknown.
+        """
+        sessions = await asyncio.to_thread(
+            self._query,
+            "SELECT started_at, ended_at, outcome, metadata, stats "
+            "FROM sessions WHERE id = ?",
+            (session_id,),
+        )
+        if not sessions:
+            return None
+        started_at, ended_at, outcome, metadata, stats = sessions[0]
+        events = await asyncio.to_thread(
+            self._query,
+            "SELECT t, kind, data FROM events WHERE session_id = ? ORDER BY seq",
+            (session_id,),
+        )
+        return {
+            "id": session_id,
+            "started_at": started_at,
+            "ended_at": ended_at,
+            "outcome": outcome,
+            "metadata": codec.loads(metadata),
+            "stats": codec.loads(stats) if stats else None,
+            "events": [
+                {"t": t, "kind": kind, **codec.loads(data)} for t, kind, data in events
+            ],
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns persistence statistics.
+
+        Returns:
+            Dict[str, int]: Rows written and dropped, batches committed and rows
+                waiting to be written.
+        """
+        stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize() if self._thread is not None else 0
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _put(self, sql: str, params: Tuple[Any, ...]) -> None:
+        if self._thread is None:
+            return
+        if not self._thread.is_alive():
+            self._count("dropped", 1)
+            return
+        try:
+            self._queue.put_nowait((sql, params))
+        except queue.Full:
+            self._count("dropped", 1)
+
+    def _wait_writer(self, done: threading.Event) -> bool:
+        try:
+            self._queue.put(done, timeout=self.wait_timeout)
+        except queue.Full:
+            return False
+        return done.wait(self.wait_timeout)
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        # 읽기는 writer와 별도 connection을 사용해서 batch commit을 기다리지 않음
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            return self._reader.execute(sql, params).fetchall()
+
+    def _write(self) -> None:
+        try:
+            self._write_batches()
+        except Exception:
+            logger.exception("Transcript writer for %s stopped", self.path)
+        # 이후의 기록은 _put에서 버리고, 기다리는 flush는 바로 깨움
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not None:
+                self._count_threadsafe("dropped", 1)
+
+    def _write_batches(self) -> None:
+        conn = self._connect()
+        try:
+            stop = False
+            while not stop:
+                batch: List[_Write] = []
+                flushed: List[threading.Event] = []
+                item = self._queue.get()
+                # 이미 쌓여 있는 작업을 모아서 한 transaction으로 commit
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        flushed.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._commit(conn, batch)
+                for done in flushed:
+                    done.set()
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Write]) -> None:
+        try:
+            conn.execute("BEGIN")
+            for sql, params in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            logger.exception("Failed to write %d transcript rows", len(batch))
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._count_threadsafe("dropped", len(batch))
+            return
+        self._count_threadsafe("written", len(batch))
+
+    def _count(self, result: str, rows: int) -> None:
+        self._stats[result] += rows
+        if result == "written":
+            self._stats["batches"] += 1
+        TRANSCRIPT_EVENTS.inc(rows, result=result)
+
+    def _count_threadsafe(self, result: str, rows: int) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._count, result, rows)
+        except RuntimeError:
+            # 종료 중에 loop가 이미 닫힌 경우
+            pass
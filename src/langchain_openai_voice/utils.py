@@ -1,11 +1,19 @@
 # Define utility functions used throughout the project
 
 import asyncio
-import json
-from typing import AsyncIterator, TypeVar, Any, Dict
+import logging
+import re
+from typing import AsyncIterator, Generic, TypeVar, Any, Dict, List
+
+from . import codec
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
+_EVENT_TYPE_PREFIX = re.compile(r'\s*\{\s*"type"\s*:\s*"([^"\\]+)"')
+_JSON_STRUCTURE = re.compile(r'[{}\[\]"\\]')
+
 
 async def amerge(**streams: AsyncIterator[T]) -> AsyncIterator[tuple[str, T]]:
     """
@@ -39,6 +47,229 @@ async def amerge(**streams: AsyncIterator[T]) -> AsyncIterator[tuple[str, T]]:
                 raise e
 
 
+def sniff_event_type(data: str) -> str | None:
+    """
+    Reads the event type from a raw JSON event without parsing the whole frame.
+
+    Only a leading `"type"` key is recognized, which is how both the Realtime API and
+    the browser client serialize their events. Any other layout returns None, and the
+    caller is expected to fall back to a full parse.
+
+    Args:
+        data (str): The raw JSON event.
+
+    Returns:
+        str | None: The event type, or None if it is not the first key.
+    """
+    match = _EVENT_TYPE_PREFIX.match(data)
+    return match.group(1) if match else None
+
+
+class StreamMultiplexer(Generic[T]):
+    """
+    Merges multiple asynchronous streams through one long-lived pump task per source.
+
+    Each pump reads its stream into a bounded queue and blocks when the queue is full,
+    so a slow consumer applies backpressure to the sources instead of buffering them
+    without limit. Items are yielded from the lowest priority value first; sources
+    sharing a priority are served round-robin.
+
+    Args:
+        streams (Dict[str, AsyncIterator[T]]): The streams to merge, indexed by key.
+        priorities (Dict[str, int] | None): Priority of each key, lower first.
+            Missing keys default to 0.
+        maxsize (int): The queue size of each source.
+    """
+
+    def __init__(
+        self,
+        streams: Dict[str, AsyncIterator[T]],
+        priorities: Dict[str, int] | None = None,
+        maxsize: int = 64,
+    ):
+        self._streams = streams
+        self._queues: Dict[str, asyncio.Queue[T]] = {
+            key: asyncio.Queue(maxsize) for key in streams
+        }
+        priorities = priorities or {}
+        levels: Dict[int, List[str]] = {}
+        for key in streams:
+            levels.setdefault(priorities.get(key, 0), []).append(key)
+        self._levels = [levels[p] for p in sorted(levels)]
+        self._cursors = [0] * len(self._levels)
+        self._ready = asyncio.Event()
+        self._pumps: List[asyncio.Task] = []
+        self._active = set(streams)
+        self._error: tuple[str, BaseException] | None = None
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Returns the number of items waiting in each source queue.
+
+        Returns:
+            Dict[str, int]: Queue depths indexed by stream key.
+        """
+        return {key: queue.qsize() for key, queue in self._queues.items()}
+
+    async def __aiter__(self) -> AsyncIterator[tuple[str, T]]:
+        """
+        Yields items from all streams until every stream is exhausted.
+
+        Yields:
+            tuple[str, T]: A tuple containing the stream key and the yielded value.
+
+        Raises:
+            Exception: If an error occurs in any of the input streams, once the items
+                read from that stream before the error have been yielded.
+        """
+        self._pumps = [
+            asyncio.create_task(self._pump(key, stream))
+            for key, stream in self._streams.items()
+        ]
+        try:
+            while True:
+                item = self._next_nowait()
+                if item is not None:
+                    yield item
+                    continue
+                if self._error is not None:
+                    raise self._error[1]
+                if not self._active:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Cancels every pump task.
+        """
+        for pump in self._pumps:
+            pump.cancel()
+
+    def _next_nowait(self) -> tuple[str, T] | None:
+        for level_index, keys in enumerate(self._levels):
+            start = self._cursors[level_index]
+            for offset in range(len(keys)):
+                key = keys[(start + offset) % len(keys)]
+                queue = self._queues[key]
+                if not queue.empty():
+                    self._cursors[level_index] = (start + offset + 1) % len(keys)
+                    return key, queue.get_nowait()
+        return None
+
+    async def _pump(self, key: str, stream: AsyncIterator[T]) -> None:
+        queue = self._queues[key]
+        try:
+            async for item in stream:
+                await queue.put(item)
+                self._ready.set()
+        except Exception as e:
+            if self._error is None:
+                self._error = (key, e)
+        finally:
+            self._active.discard(key)
+            self._ready.set()
+
+
+def extract_string_field(data: str, key: str) -> str | None:
+    """
+    Reads a top-level string value from a raw JSON event without parsing it.
+
+    Intended for values that never contain escape sequences, such as ids and
+    base64 audio payloads, in flat events whose type is already known.
+
+    Args:
+        data (str): The raw JSON event.
+        key (str): The key to look up.
+
+    Returns:
+        str | None: The string value, or None if the key is not found.
+    """
+    quoted = f'"{key}"'
+    start = data.find(quoted)
+    while start >= 0:
+        i = start + len(quoted)
+        while data[i : i + 1].isspace():
+            i += 1
+        if data[i : i + 1] == ":":
+            i = data.find('"', i) + 1
+            end = data.find('"', i)
+            return data[i:end] if i > 0 and end >= 0 else None
+        start = data.find(quoted, i)
+    return None
+
+
+class IncrementalJSONScanner:
+    """
+    Tells when JSON text streamed in chunks forms a complete object.
+
+    Each chunk is scanned once for brackets, quotes and escapes, so the text is not
+    re-parsed on every chunk. Completion only means the brackets are balanced; the
+    caller still parses `text` to validate it.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self._trailing = False
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Adds a chunk of text.
+
+        Args:
+            chunk (str): The next chunk.
+
+        Returns:
+            bool: Whether the text is a complete object. Text after the closing
+                brace, other than whitespace, makes it incomplete for good.
+        """
+        self._chunks.append(chunk)
+        if self._started and self._depth == 0:
+            if chunk.strip():
+                self._trailing = True
+                self.complete = False
+            return self.complete
+        # 이스케이프 문자 바로 다음 글자는 구조 문자로 보지 않음
+        skip_to = 1 if self._escaped else 0
+        self._escaped = False
+        for match in _JSON_STRUCTURE.finditer(chunk):
+            position = match.start()
+            if position < skip_to:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == "\\":
+                    skip_to = position + 2
+                    self._escaped = skip_to > len(chunk)
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                self._started = True
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if chunk[position + 1 :].strip():
+                        self._trailing = True
+                    break
+        self.complete = self._started and self._depth == 0 and not self._trailing
+        return self.complete
+
+
 def parse_json_safely(data: str) -> Dict[str, Any]:
     """
     Safely parses a JSON string into a dictionary.
@@ -50,9 +281,9 @@ def parse_json_safely(data: str) -> Dict[str, Any]:
         Dict[str, Any]: The parsed JSON as a dictionary. Returns an empty dictionary if parsing fails.
     """
     try:
-        return json.loads(data)
-    except json.JSONDecodeError:
-        print(f"Error decoding JSON: {data}")
+        return codec.loads(data)
+    except ValueError:
+        logger.warning("Error decoding JSON: %.200s", data)
         return {}
 
 
@@ -67,6 +298,6 @@ def serialize_result(result: Any) -> str:
         str: The serialized result as a JSON string. If serialization fails, returns the string representation of the result.
     """
     try:
-        return json.dumps(result)
+        return codec.dumps(result)
     except TypeError:
         return str(result)
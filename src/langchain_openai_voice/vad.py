@@ -0,0 +1,189 @@
+# Energy / zero-crossing silence gate for mic audio sent to the model
+#
+# NumPy is used when installed; otherwise frames are analyzed with the standard
+# library, which is slower but keeps the gate usable without extra dependencies.
+
+import array
+import base64
+import binascii
+import math
+import sys
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from .utils import extract_string_field
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# 24kHz, mono, PCM16
+BYTES_PER_MS = 48
+
+
+def frame_features(pcm: bytes) -> Tuple[float, float]:
+    """
+    Computes the level and zero-crossing rate of a PCM16 frame.
+
+    Args:
+        pcm (bytes): Little-endian 16-bit mono samples.
+
+    Returns:
+        Tuple[float, float]: The RMS level in dBFS, and the fraction of consecutive
+            samples that change sign.
+    """
+    count = len(pcm) // 2
+    if count == 0:
+        return -math.inf, 0.0
+    if np is not None:
+        samples = np.frombuffer(pcm, dtype="<i2", count=count)
+        as_float = samples.astype(np.float32)
+        energy = float(np.dot(as_float, as_float)) / count
+        crossings = int(np.count_nonzero(np.diff(np.signbit(samples))))
+    else:
+        samples = array.array("h")
+        samples.frombytes(pcm[: count * 2])
+        if sys.byteorder == "big":
+            samples.byteswap()
+        energy = sum(s * s for s in samples) / count
+        crossings = sum(1 for a, b in zip(samples, samples[1:]) if (a < 0) != (b < 0))
+    if energy <= 0:
+        return -math.inf, 0.0
+    dbfs = 10 * math.log10(energy / 32768**2)
+    return dbfs, crossings / max(1, count - 1)
+
+
+class SilenceGate(BaseModel):
+    """
+    Drops silent mic frames before they are sent to the model.
+
+    A frame is speech when its level reaches `threshold_db` and its zero-crossing
+    rate is at most `max_zcr` (broadband noise crosses zero far more often than
+    voiced speech), or when it is `loud_margin_db` above the threshold. After the
+    last speech frame, `hangover_ms` of audio is still forwarded, so the server-side
+    VAD hears the silence it needs to end the turn; keep it above the server's
+    `silence_duration_ms`. The last `pre_roll_ms` of suppressed audio is sent just
+    before a speech onset, so the first syllable is not clipped.
+
+    Attributes:
+        threshold_db (float): The speech level threshold in dBFS.
+        max_zcr (float): The highest zero-crossing rate of a quiet speech frame.
+        loud_margin_db (float): Frames this far above the threshold are speech
+            whatever their zero-crossing rate.
+        hangover_ms (float): Audio forwarded after the last speech frame.
+        pre_roll_ms (float): Suppressed audio replayed before a speech onset.
+        keep_every (int): Forward one suppressed frame in every N instead of
+            dropping them all, e.g. to keep the input timeline moving. 0 drops all.
+    """
+
+    threshold_db: float = -45.0
+    max_zcr: float = 0.35
+    loud_margin_db: float = 15.0
+    hangover_ms: float = 800.0
+    pre_roll_ms: float = 300.0
+    keep_every: int = 0
+
+    _pre_roll: Deque[Tuple[str, float]] = PrivateAttr(default_factory=deque)
+    _pre_roll_duration: float = PrivateAttr(default=0.0)
+    _hangover_left: float = PrivateAttr(default=0.0)
+    _suppressed_run: int = PrivateAttr(default=0)
+    _stats: Dict[str, float] = PrivateAttr(
+        default_factory=lambda: {
+            "frames_in": 0,
+            "frames_out": 0,
+            "audio_ms_in": 0.0,
+            "audio_ms_out": 0.0,
+        }
+    )
+
+    def reset(self) -> None:
+        """
+        Clears the gate state and statistics, e.g. for a new conversation.
+        """
+        self._pre_roll.clear()
+        self._pre_roll_duration = 0.0
+        self._hangover_left = 0.0
+        self._suppressed_run = 0
+        self._stats = {
+            "frames_in": 0,
+            "frames_out": 0,
+            "audio_ms_in": 0.0,
+            "audio_ms_out": 0.0,
+        }
+
+    def process(self, event: str) -> List[str]:
+        """
+        Passes a raw `input_audio_buffer.append` event through the gate.
+
+        Events whose audio cannot be decoded are forwarded unchanged.
+
+        Args:
+            event (str): The raw JSON event.
+
+        Returns:
+            List[str]: The events to send now, in order. Empty while suppressing.
+        """
+        payload = extract_string_field(event, "audio")
+        try:
+            pcm = base64.b64decode(payload) if payload is not None else None
+        except (binascii.Error, ValueError):
+            pcm = None
+        if pcm is None:
+            return [event]
+
+        duration = len(pcm) / BYTES_PER_MS
+        self._stats["frames_in"] += 1
+        self._stats["audio_ms_in"] += duration
+
+        dbfs, zcr = frame_features(pcm)
+        speech = dbfs >= self.threshold_db + self.loud_margin_db or (
+            dbfs >= self.threshold_db and zcr <= self.max_zcr
+        )
+        if speech:
+            self._hangover_left = self.hangover_ms
+            self._suppressed_run = 0
+            return self._forward_pre_roll() + self._forward(event, duration)
+        if self._hangover_left > 0:
+            self._hangover_left -= duration
+            return self._forward(event, duration)
+
+        self._suppressed_run += 1
+        if self.keep_every > 0 and self._suppressed_run % self.keep_every == 0:
+            return self._forward(event, duration)
+        self._pre_roll.append((event, duration))
+        self._pre_roll_duration += duration
+        while self._pre_roll and self._pre_roll_duration > self.pre_roll_ms:
+            _, dropped = self._pre_roll.popleft()
+            self._pre_roll_duration -= dropped
+        return []
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns suppression statistics.
+
+        Returns:
+            Dict[str, float]: Frames and milliseconds of audio received and
+                forwarded, and the fraction of audio suppressed.
+        """
+        stats = dict(self._stats)
+        audio_in = stats["audio_ms_in"]
+        stats["suppression_ratio"] = (
+            1 - stats["audio_ms_out"] / audio_in if audio_in > 0 else 0.0
+        )
+        return stats
+
+    def _forward(self, event: str, duration: float) -> List[str]:
+        self._stats["frames_out"] += 1
+        self._stats["audio_ms_out"] += duration
+        return [event]
+
+    def _forward_pre_roll(self) -> List[str]:
+        events = []
+        for event, duration in self._pre_roll:
+            events.extend(self._forward(event, duration))
+        self._pre_roll.clear()
+        self._pre_roll_duration = 0.0
+        return events
@@ -1,20 +1,54 @@
 # Function for managing WebSocket connection with the OpenAI real-time API
 
-import json
 import websockets
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, AsyncIterator, Any, Callable, Coroutine, Dict
-from .utils import parse_json_safely
-from .constants import DEFAULT_URL
+from websockets.client import WebSocketClientProtocol
+from . import codec
+from .utils import parse_json_safely, sniff_event_type
+from .constants import DEFAULT_URL, OUTPUT_AUDIO_EVENT
+from .metrics import SessionMetrics
+
+
+async def open_connection(
+    *, api_key: str, model: str, url: str
+) -> WebSocketClientProtocol:
+    """
+    Opens a WebSocket connection to the OpenAI real-time API.
+
+    Args:
+        api_key (str): The API key for authenticating with OpenAI.
+        model (str): The name of the OpenAI model to use.
+        url (str): The URL for the OpenAI API.
+
+    Returns:
+        WebSocketClientProtocol: The open connection. The caller must close it.
+
+    Raises:
+        websockets.exceptions.WebSocketException: If the handshake fails.
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "OpenAI-Beta": "realtime=v1",
+    }
+
+    url = f"{url or DEFAULT_URL}?model={model}"
+
+    return await websockets.connect(url, extra_headers=headers)
 
 
 @asynccontextmanager
 async def connect(
-    *, api_key: str, model: str, url: str
+    *,
+    api_key: str,
+    model: str,
+    url: str,
+    websocket: WebSocketClientProtocol | None = None,
+    metrics: SessionMetrics | None = None,
 ) -> AsyncGenerator[
     tuple[
         Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]],
-        AsyncIterator[Dict[str, Any]],
+        AsyncIterator[Dict[str, Any] | str],
     ],
     None,
 ]:
@@ -28,9 +62,13 @@ async def connect(
         api_key (str): The API key for authenticating with OpenAI.
         model (str): The name of the OpenAI model to use.
         url (str): The URL for the OpenAI API.
+        websocket (WebSocketClientProtocol | None): An already open connection, e.g.
+            one taken from an `UpstreamPool`, used instead of opening a new one.
+            It is closed on exit either way.
+        metrics (SessionMetrics | None): Records the frames sent and received.
 
     Yields:
-        tuple[Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]], AsyncIterator[Dict[str, Any]]]:
+        tuple[Callable[[Dict[str, Any] | str], Coroutine[Any, Any, None]], AsyncIterator[Dict[str, Any] | str]]:
             A tuple containing:
             - A function for sending events to the API.
             - An async iterator for receiving events from the API.
@@ -38,14 +76,10 @@ async def connect(
     Raises:
         websockets.exceptions.WebSocketException: If there's an error in establishing or maintaining the WebSocket connection.
     """
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "OpenAI-Beta": "realtime=v1",
-    }
+    if websocket is None:
+        websocket = await open_connection(api_key=api_key, model=model, url=url)
 
-    url = f"{url or DEFAULT_URL}?model={model}"
-
-    async with websockets.connect(url, extra_headers=headers) as websocket:
+    try:
 
         async def send_event(event: Dict[str, Any] | str) -> None:
             """
@@ -54,17 +88,29 @@ async def connect(
             Args:
                 event (Dict[str, Any] | str): The event to send, either as a dictionary or a JSON string.
             """
-            formatted_event = json.dumps(event) if isinstance(event, dict) else event
+            formatted_event = codec.dumps(event) if isinstance(event, dict) else event
             await websocket.send(formatted_event)
+            if metrics is not None:
+                metrics.frame("upstream_out", len(formatted_event))
 
-        async def event_stream() -> AsyncIterator[Dict[str, Any]]:
+        async def event_stream() -> AsyncIterator[Dict[str, Any] | str]:
             """
             Creates an async iterator for receiving events from the OpenAI API.
 
+            Audio deltas are yielded as the raw JSON string so they can be relayed
+            without being parsed and re-serialized.
+
             Yields:
-                Dict[str, Any]: Parsed JSON events received from the API.
+                Dict[str, Any] | str: Parsed JSON events, or raw audio delta events.
             """
             async for raw_event in websocket:
-                yield parse_json_safely(raw_event)
+                if metrics is not None:
+                    metrics.frame("upstream_in", len(raw_event))
+                if sniff_event_type(raw_event) == OUTPUT_AUDIO_EVENT:
+                    yield raw_event
+                else:
+                    yield parse_json_safely(raw_event)
 
         yield send_event, event_stream()
+    finally:
+        await websocket.close()
@@ -1,21 +1,118 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
+from langchain_openai_voice.pool import UpstreamPool
+from langchain_openai_voice.tools import TOOLS
 from starlette.applications import Starlette
-from starlette.routing import Route, WebSocketRoute, Mount
-from starlette.staticfiles import StaticFiles
+from starlette.routing import Route, WebSocketRoute
+
+from server.router.websocket import (
+    ADMISSION,
+    RESUMABLE_SESSIONS,
+    TOOL_POOLS,
+    TRANSCRIPT_STORE,
+    create_agent,
+    listen_endpoint,
+    websocket_endpoint,
+)
+from server.router.instructions import (
+    current_instructions,
+    get_instructions,
+    update_instructions,
+)
+from server.router.admin import LOOP_MONITOR, profile, tasks
+from server.router.home import ASSETS, homepage, static_asset
+from server.router.metrics import metrics
+from server.router.transcripts import get_session, list_sessions
+from server.backend.log_queue import setup_logging
+from server.backend.store import SettingsStore
 
-from server.router.websocket import websocket_endpoint
-from server.router.instructions import get_instructions, update_instructions
-from server.router.home import homepage
+logger = logging.getLogger(__name__)
 
 routes = [
     Route("/", homepage),
     WebSocketRoute("/ws", websocket_endpoint),
+    WebSocketRoute("/ws/listen/{session_id}", listen_endpoint),
     Route("/api/instructions", get_instructions, methods=["GET"]),
     Route("/api/instructions", update_instructions, methods=["POST"]),
-    Mount("/static", StaticFiles(directory="src/server/static"), name="static"),
+    Route("/api/sessions", list_sessions, methods=["GET"]),
+    Route("/api/sessions/{session_id}", get_session, methods=["GET"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/admin/tasks", tasks, methods=["GET"]),
+    Route("/admin/profile", profile, methods=["GET"]),
+    Route("/static/{path:path}", static_asset, methods=["GET"]),
 ]
 
-app = Starlette(debug=True, routes=routes)
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    log_listener = setup_logging()
+    LOOP_MONITOR.start()
+    # index.html과 static 파일은 한 번 읽어서 압축해 둔 뒤 메모리에서 제공
+    await asyncio.to_thread(ASSETS.load)
+    watcher = asyncio.create_task(ASSETS.watch()) if ASSETS.reload else None
+    # 첫 세션이 도구 import와 schema 계산을 기다리지 않도록 백그라운드에서 미리 준비
+    preload = asyncio.create_task(asyncio.to_thread(TOOLS.load))
+    preload.add_done_callback(_log_preload_error)
+    settings = SettingsStore()
+    settings.start()
+    app.state.settings = settings
+    # 기본 지시사항으로 미리 연결해 둔 upstream 세션 풀 (REALTIME_POOL_SIZE > 0 일 때만)
+    pool = None
+    pool_size = int(os.environ.get("REALTIME_POOL_SIZE", "0"))
+    if pool_size > 0:
+        # 풀의 session 설정에 도구 정의가 필요하므로 준비될 때까지 기다림 (event loop 밖에서)
+        await asyncio.gather(preload, return_exceptions=True)
+        agent = create_agent(current_instructions(app))
+        pool = UpstreamPool(
+            api_key=agent.api_key,
+            model=agent.model,
+            url=agent.url,
+            session=agent.session_config(),
+            size=pool_size,
+            max_idle=float(os.environ.get("REALTIME_POOL_MAX_IDLE", "300")),
+        )
+        await pool.start()
+
+        # 지시사항이 바뀌면 이후 새로 여는 연결부터 반영
+        def on_settings_changed(values):
+            pool.session = {**pool.session, "instructions": current_instructions(app)}
+
+        settings.subscribe(on_settings_changed)
+    app.state.upstream_pool = pool
+    ADMISSION.start()
+    if TRANSCRIPT_STORE is not None:
+        TRANSCRIPT_STORE.start()
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        await RESUMABLE_SESSIONS.aclose()
+        await ADMISSION.aclose()
+        # 종료된 세션의 마지막 기록까지 저장한 뒤 닫음
+        if TRANSCRIPT_STORE is not None:
+            await TRANSCRIPT_STORE.aclose()
+        if pool is not None:
+            await pool.aclose()
+        TOOL_POOLS.shutdown()
+        settings.close()
+        await LOOP_MONITOR.aclose()
+        log_listener.stop()
+
+
+def _log_preload_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Failed to preload tools: %s", task.exception())
+
+
+# 운영 환경(server/serve.py)에서는 VOICE_DEBUG=0으로 실행됨
+app = Starlette(
+    debug=os.environ.get("VOICE_DEBUG", "1") == "1", routes=routes, lifespan=lifespan
+)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="localhost", port=3000)
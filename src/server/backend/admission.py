@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Set, Tuple
+
+from langchain_openai_voice.metrics import REGISTRY, Counter, Gauge, Histogram
+
+from server.backend.store import STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+ADMISSIONS = REGISTRY.register(
+    Counter(
+        "voice_admissions",
+        "New conversations by admission result.",
+        ["result"],
+    )
+)
+ADMISSION_ACTIVE = REGISTRY.register(
+    Gauge("voice_admission_active", "Conversations holding an upstream session slot.")
+)
+ADMISSION_QUEUED = REGISTRY.register(
+    Gauge("voice_admission_queued", "New conversations waiting for a slot.")
+)
+ADMISSION_WAIT = REGISTRY.register(
+    Histogram(
+        "voice_admission_wait_seconds",
+        "Time new conversations waited for a slot, including rejected ones.",
+        buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+    )
+)
+RATE_LIMIT_REMAINING = REGISTRY.register(
+    Gauge(
+        "voice_upstream_rate_limit_remaining",
+        "Remaining upstream budget from the latest rate_limits.updated event.",
+        ["name"],
+    )
+)
+
+# 거절된 브라우저가 다시 연결하기까지 기다릴 최소 시간 (초)
+RETRY_AFTER_S = 5.0
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# 여러 worker 프로세스가 같은 한도를 나눠 쓰기 위한 lease 테이블 (SQLite WAL)
+# worker가 비정상 종료해도 갱신되지 않은 lease는 ttl이 지나면 사라짐
+class SharedLeases:
+    def __init__(self, path: str = STORE_PATH, ttl: float = 30.0) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS admission_leases ("
+                "id TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def try_acquire(self, lease: str, limit: int) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # BEGIN IMMEDIATE로 다른 worker와 동시에 한도를 넘기지 않도록 함
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM admission_leases WHERE expires_at < ?", (now,)
+                )
+                (count,) = conn.execute(
+                    "SELECT COUNT(*) FROM admission_leases"
+                ).fetchone()
+                if limit > 0 and count >= limit:
+                    conn.execute("COMMIT")
+                    return False
+                conn.execute(
+                    "INSERT INTO admission_leases (id, expires_at) VALUES (?, ?)",
+                    (lease, now + self.ttl),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def renew(self, leases: List[str]) -> None:
+        if not leases:
+            return
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE admission_leases SET expires_at = ? WHERE id = ?",
+                [(time.time() + self.ttl, lease) for lease in leases],
+            )
+
+    def release(self, lease: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM admission_leases WHERE id = ?", (lease,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 새 대화(upstream 세션)의 시작을 제한함
+# - max_sessions: 동시에 열 수 있는 upstream 세션 수 (0이면 제한 없음)
+# - upstream이 rate_limits.updated로 알려준 남은 요청/token 수가 최소값보다 적으면
+#   reset될 때까지 새 대화를 시작하지 않음
+# 자리가 없으면 최대 max_queue개까지 순서대로 max_wait초 동안 기다리고, 그 이상은 거절함
+class AdmissionController:
+    def __init__(
+        self,
+        max_sessions: int = 0,
+        max_queue: int = 100,
+        max_wait: float = 30.0,
+        min_remaining_requests: int = 1,
+        min_remaining_tokens: int = 0,
+        shared: SharedLeases | None = None,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.min_remaining = {
+            "requests": min_remaining_requests,
+            "tokens": min_remaining_tokens,
+        }
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self._active: Set[str] = set()
+        self._waiters: Deque[asyncio.Event] = deque()
+        # name -> (remaining, reset 시각)
+        self._rate_limits: Dict[str, Tuple[float, float]] = {}
+        self._renewer: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.shared is not None and self._renewer is None:
+            self._renewer = asyncio.create_task(self._renew())
+
+    async def aclose(self) -> None:
+        if self._renewer is not None:
+            self._renewer.cancel()
+            await asyncio.gather(self._renewer, return_exceptions=True)
+            self._renewer = None
+        if self.shared is not None:
+            leases, self._active = list(self._active), set()
+            for lease in leases:
+                await asyncio.to_thread(self.shared.release, lease)
+            self.shared.close()
+
+    def observe_rate_limits(self, rate_limits: List[Dict[str, Any]]) -> None:
+        # rate limit은 조직 단위라서 어느 세션의 이벤트든 최신 값이 전체 상태임
+        now = time.monotonic()
+        for limit in rate_limits:
+            name = limit.get("name")
+            remaining = limit.get("remaining")
+            if name is None or remaining is None:
+                continue
+            reset_at = now + float(limit.get("reset_seconds") or 0)
+            self._rate_limits[name] = (float(remaining), reset_at)
+            RATE_LIMIT_REMAINING.set(float(remaining), name=name)
+        self._wake()
+
+    def throttled_for(self) -> float:
+        now = time.monotonic()
+        wait = 0.0
+        for name, minimum in self.min_remaining.items():
+            state = self._rate_limits.get(name)
+            if state is None or minimum <= 0:
+                continue
+            remaining, reset_at = state
+            if remaining < minimum and reset_at > now:
+                wait = max(wait, reset_at - now)
+        return wait
+
+    async def acquire(
+        self, on_queued: Callable[[int], Awaitable[None]] | None = None
+    ) -> str:
+        started = time.monotonic()
+        lease = uuid.uuid4().hex
+        if not self._waiters and await self._try_admit(lease):
+            ADMISSIONS.inc(result="admitted")
+            ADMISSION_WAIT.observe(0.0)
+            return lease
+        if len(self._waiters) >= self.max_queue:
+            ADMISSIONS.inc(result="rejected")
+            ADMISSION_WAIT.observe(0.0)
+            raise AdmissionRejected("Server is busy", self._retry_after())
+
+        waiter = asyncio.Event()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.inc()
+        try:
+            if on_queued is not None:
+                await on_queued(len(self._waiters))
+            while True:
+                # 순서를 지키기 위해 맨 앞의 대기자만 자리를 확인함
+                if self._waiters[0] is waiter and await self._try_admit(lease):
+                    break
+                remaining = started + self.max_wait - time.monotonic()
+                if remaining <= 0:
+                    ADMISSIONS.inc(result="timeout")
+                    ADMISSION_WAIT.observe(time.monotonic() - started)
+                    raise AdmissionRejected(
+                        "Server is busy, try again later", self._retry_after()
+                    )
+                # 다른 worker의 반납이나 rate limit reset은 알림이 없으므로 주기적으로 확인
+                waiter.clear()
+                try:
+                    await asyncio.wait_for(
+                        waiter.wait(), min(remaining, self.poll_interval)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            # 기다리는 동안 브라우저가 떠난 경우
+            ADMISSIONS.inc(result="abandoned")
+            ADMISSION_WAIT.observe(time.monotonic() - started)
+            raise
+        finally:
+            self._waiters.remove(waiter)
+            ADMISSION_QUEUED.dec()
+            self._wake()
+        ADMISSIONS.inc(result="admitted")
+        ADMISSION_WAIT.observe(time.monotonic() - started)
+        return lease
+
+    def release(self, lease: str) -> None:
+        if lease not in self._active:
+            return
+        self._active.discard(lease)
+        ADMISSION_ACTIVE.set(len(self._active))
+        if self.shared is not None:
+            asyncio.get_running_loop().run_in_executor(None, self.shared.release, lease)
+        self._wake()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": len(self._active),
+            "queued": len(self._waiters),
+            "throttled_for_s": self.throttled_for(),
+        }
+
+    async def _try_admit(self, lease: str) -> bool:
+        if self.throttled_for() > 0:
+            return False
+        if self.max_sessions > 0 and len(self._active) >= self.max_sessions:
+            return False
+        if self.shared is not None:
+            # 자리를 확인하는 동안 다른 코루틴이 같은 자리를 가져가지 않도록 먼저 예약
+            self._active.add(lease)
+            try:
+                admitted = await asyncio.to_thread(
+                    self.shared.try_acquire, lease, self.max_sessions
+                )
+            except BaseException:
+                self._active.discard(lease)
+                raise
+            if not admitted:
+                self._active.discard(lease)
+                return False
+        self._active.add(lease)
+        ADMISSION_ACTIVE.set(len(self._active))
+        return True
+
+    def _retry_after(self) -> float:
+        return max(RETRY_AFTER_S, self.throttled_for())
+
+    def _wake(self) -> None:
+        if self._waiters:
+            self._waiters[0].set()
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.shared.ttl / 3)
+            try:
+                await asyncio.to_thread(self.shared.renew, list(self._active))
+            except sqlite3.Error:
+                logger.exception("Failed to renew admission leases")
@@ -0,0 +1,49 @@
+import base64
+import logging
+import struct
+
+from langchain_openai_voice.constants import INPUT_AUDIO_EVENT, OUTPUT_AUDIO_EVENT
+from langchain_openai_voice.utils import extract_string_field, sniff_event_type
+
+logger = logging.getLogger(__name__)
+
+# 바이너리 오디오 프레임: kind (u8), reserved (3 bytes), sequence (u32 LE), PCM16 payload
+# 8바이트 헤더라서 브라우저에서 payload를 Int16Array로 바로 볼 수 있음
+FRAME_HEADER = struct.Struct("<B3xI")
+INPUT_AUDIO_FRAME = 1
+OUTPUT_AUDIO_FRAME = 2
+
+
+def decode_input_frame(frame: bytes) -> str | None:
+    # 잘못된 프레임 하나 때문에 세션의 입력이 끊기지 않도록 버리고 None을 반환
+    if len(frame) < FRAME_HEADER.size:
+        logger.warning("Dropping binary frame of %d bytes", len(frame))
+        return None
+    kind, _ = FRAME_HEADER.unpack_from(frame)
+    if kind != INPUT_AUDIO_FRAME:
+        logger.warning("Dropping binary frame of unexpected kind %d", kind)
+        return None
+    audio = base64.b64encode(memoryview(frame)[FRAME_HEADER.size :]).decode("ascii")
+    return '{"type":"' + INPUT_AUDIO_EVENT + '","audio":"' + audio + '"}'
+
+
+def encode_output_frame(sequence: int, audio_base64: str) -> bytes:
+    return FRAME_HEADER.pack(OUTPUT_AUDIO_FRAME, sequence) + base64.b64decode(
+        audio_base64
+    )
+
+
+class BinaryAudioEncoder:
+    """Encodes audio deltas as binary frames and leaves every other event as text."""
+
+    def __init__(self):
+        self.sequence = 0
+
+    def __call__(self, chunk: str) -> str | bytes:
+        if sniff_event_type(chunk) == OUTPUT_AUDIO_EVENT:
+            delta = extract_string_field(chunk, "delta")
+            if delta is not None:
+                frame = encode_output_frame(self.sequence, delta)
+                self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+                return frame
+        return chunk
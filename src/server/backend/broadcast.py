@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Set, Tuple
+
+from langchain_openai_voice.constants import OUTPUT_AUDIO_EVENT
+from langchain_openai_voice.metrics import REGISTRY, Counter, Gauge
+from langchain_openai_voice.utils import sniff_event_type
+from starlette.websockets import WebSocket
+
+from server.backend.utils import Message, send_message
+
+logger = logging.getLogger(__name__)
+
+LISTENERS = REGISTRY.register(
+    Gauge("voice_listeners", "Read-only websockets listening to a live session.")
+)
+LISTENER_DROPS = REGISTRY.register(
+    Counter(
+        "voice_listener_drops",
+        "Messages dropped for slow listeners, and listeners disconnected.",
+        ["kind"],
+    )
+)
+
+
+# 세션 출력을 구독하는 읽기 전용 websocket 하나
+# 느린 listener 때문에 통화 당사자가 느려지지 않도록, 보내는 쪽은 큐에 넣기만 하고
+# listener마다 별도 task가 전송함
+class Listener:
+    def __init__(
+        self, websocket: WebSocket, max_audio: int = 50, max_pending: int = 1000
+    ) -> None:
+        self.websocket = websocket
+        self.max_audio = max_audio
+        self.max_pending = max_pending
+        self._pending: Deque[Tuple[bool, Message]] = deque()
+        self._audio_pending = 0
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.dropped_audio = 0
+
+    def offer(self, message: Message, audio: bool) -> None:
+        if self.closed:
+            return
+        if audio and self._audio_pending >= self.max_audio:
+            # 오디오는 밀리면 버리고, transcript 등 제어 이벤트는 유지
+            self.dropped_audio += 1
+            LISTENER_DROPS.inc(kind="audio")
+            return
+        if len(self._pending) >= self.max_pending:
+            # 제어 이벤트까지 쌓일 정도로 느리면 연결을 끊음
+            LISTENER_DROPS.inc(kind="listener")
+            self.close()
+            return
+        self._pending.append((audio, message))
+        self._audio_pending += audio
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def run(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._pending and not self.closed:
+                audio, message = self._pending.popleft()
+                self._audio_pending -= audio
+                await send_message(self.websocket, message)
+            if self.closed:
+                return
+
+
+class BroadcastHub:
+    def __init__(self) -> None:
+        self._listeners: Set[Listener] = set()
+
+    def __len__(self) -> int:
+        return len(self._listeners)
+
+    def publish(self, message: Message) -> None:
+        if not self._listeners:
+            return
+        # 메시지는 통화 당사자에게 보낸 것과 같은 객체를 공유 (listener별로 다시 인코딩하지 않음)
+        audio = isinstance(message, bytes) or (
+            sniff_event_type(message) == OUTPUT_AUDIO_EVENT
+        )
+        for listener in self._listeners:
+            listener.offer(message, audio)
+
+    async def serve(self, listener: Listener) -> None:
+        self._listeners.add(listener)
+        LISTENERS.inc()
+        try:
+            await listener.run()
+        finally:
+            self._listeners.discard(listener)
+            LISTENERS.dec()
+            if listener.dropped_audio:
+                logger.info(
+                    "Dropped %d audio messages for a slow listener",
+                    listener.dropped_audio,
+                )
+
+    def close(self) -> None:
+        for listener in list(self._listeners):
+            listener.close()
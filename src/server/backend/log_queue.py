@@ -0,0 +1,26 @@
+import logging
+import logging.handlers
+import os
+import queue
+
+# 로그 출력(stdout)은 별도 thread에서 처리해서 event loop가 막히지 않도록 함
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(os.environ.get("VOICE_LOG_LEVEL", "INFO").upper())
+
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import Counter as Tally, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from langchain_openai_voice.metrics import REGISTRY, Counter, Gauge, Histogram
+from langchain_openai_voice.tracing import SESSION_ID, TOOL_NAME
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = REGISTRY.register(
+    Histogram(
+        "voice_event_loop_lag_seconds",
+        "How late the event loop woke a periodic timer.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+)
+LOOP_LAG_MAX = REGISTRY.register(
+    Gauge(
+        "voice_event_loop_lag_max_seconds",
+        "Recent maximum event loop lag, decaying by 1% per sample.",
+    )
+)
+SLOW_CALLBACKS = REGISTRY.register(
+    Counter(
+        "voice_slow_callbacks",
+        "Event loop callbacks that ran longer than the slow callback threshold.",
+        ["tool"],
+    )
+)
+
+# 스택에 남길 최대 frame 수
+MAX_FRAMES = 30
+
+
+def _frame_line(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_filename}:{frame.f_lineno} in {code.co_name}"
+
+
+def coroutine_stack(coro: Any) -> List[str]:
+    # task.get_stack()은 가장 바깥 frame만 주므로 await 사슬을 직접 따라감 (바깥 -> 안쪽)
+    lines = []
+    while coro is not None and len(lines) < MAX_FRAMES:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None)
+        frame = frame or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            lines.append(_frame_line(frame))
+        coro = (
+            getattr(coro, "cr_await", None)
+            or getattr(coro, "ag_await", None)
+            or getattr(coro, "gi_yieldfrom", None)
+        )
+    return lines
+
+
+def thread_stack(frame) -> List[str]:
+    return [
+        f"{entry.filename}:{entry.lineno} in {entry.name}"
+        for entry in traceback.extract_stack(frame, limit=MAX_FRAMES)
+    ]
+
+
+# 모든 세션이 하나의 event loop를 공유하므로, loop를 막는 코드를 찾기 위한 감시
+# - 주기적인 timer가 얼마나 늦게 깨어났는지(lag)를 기록
+# - 오래 걸린 callback을 그 callback의 contextvar(session id, 도구 이름)와 함께 기록하고,
+#   감시 thread가 loop가 막혀 있는 동안의 스택을 잡아 둠
+# - task를 만든 세션을 기록해서 세션별 task 스택과 sampling profile을 제공
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = 0.25,
+        slow_callback: float = 0.1,
+        max_slow_callbacks: int = 100,
+    ) -> None:
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=max_slow_callbacks)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+        self._sampler: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._profile_lock = threading.Lock()
+        # 실행 중인 callback의 시작 시각과, 감시 thread가 그 동안 잡은 스택
+        self._callback_started: float | None = None
+        self._stall: Tuple[float, List[str]] | None = None
+        self._original_run = None
+        self._previous_factory = None
+        # task -> 만든 세션 id
+        self._owners: "weakref.WeakKeyDictionary[asyncio.Task, str]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._max_lag = 0.0
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._create_task)
+        self._sampler = asyncio.create_task(self._sample_lag())
+        if self.slow_callback > 0:
+            self._patch_handles()
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def aclose(self) -> None:
+        if self._loop is None:
+            return
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        self._loop.set_task_factory(self._previous_factory)
+        self._loop = None
+        self._stop.set()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag_ms": round(self._max_lag * 1000, 2),
+            "slow_callback_ms": self.slow_callback * 1000,
+            "slow_callbacks": len(self.slow_callbacks),
+            "tasks": len(asyncio.all_tasks()),
+        }
+
+    def tasks_by_session(self) -> Dict[str, List[Dict[str, Any]]]:
+        # 세션 없이 만들어진 task (서버 전체의 task)는 "" 아래에 모음
+        sessions: Dict[str, List[Dict[str, Any]]] = {}
+        for task in asyncio.all_tasks():
+            coro = task.get_coro()
+            sessions.setdefault(self._owners.get(task, ""), []).append(
+                {
+                    "name": task.get_name(),
+                    "coro": getattr(coro, "__qualname__", repr(coro)),
+                    "stack": coroutine_stack(coro),
+                }
+            )
+        return sessions
+
+    def profile(self, seconds: float, interval: float) -> Dict[str, int] | None:
+        # 다른 thread에서 event loop thread의 스택을 주기적으로 샘플링 (blocking, to_thread로 실행)
+        # 결과는 flamegraph 도구가 읽는 "바깥;...;안쪽" 형식의 스택별 샘플 수
+        if self._thread_id is None or not self._profile_lock.acquire(blocking=False):
+            return None
+        try:
+            samples: Tally = Tally()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(self._thread_id)
+                if frame is not None:
+                    stack = []
+                    while frame is not None and len(stack) < MAX_FRAMES * 2:
+                        code = frame.f_code
+                        stack.append(
+                            f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+                        )
+                        frame = frame.f_back
+                    samples[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+            return dict(samples.most_common())
+        finally:
+            self._profile_lock.release()
+
+    def _create_task(self, loop, coro, **kwargs) -> asyncio.Future:
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        session_id = SESSION_ID.get()
+        if session_id is not None:
+            self._owners[task] = session_id
+        return task
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.observe(lag)
+            self._max_lag = max(self._max_lag * 0.99, lag)
+            LOOP_LAG_MAX.set(self._max_lag)
+
+    def _patch_handles(self) -> None:
+        # 모든 callback(task의 각 단계 포함)은 Handle._run을 거치므로 여기서 시간을 잼
+        # (uvloop처럼 Handle을 자체 구현하는 loop에서는 lag만 기록됨)
+        monitor = self
+        threshold = self.slow_callback
+        run = self._original_run = asyncio.events.Handle._run
+        perf_counter = time.perf_counter
+
+        def _run(handle):
+            monitor._callback_started = started = perf_counter()
+            try:
+                run(handle)
+            finally:
+                monitor._callback_started = None
+            elapsed = perf_counter() - started
+            if elapsed >= threshold:
+                monitor._report(handle, started, elapsed)
+
+        asyncio.events.Handle._run = _run
+
+    def _report(self, handle: asyncio.Handle, started: float, elapsed: float) -> None:
+        context = handle._context
+        session_id = context.get(SESSION_ID)
+        tool = context.get(TOOL_NAME)
+        stall = self._stall
+        stack = stall[1] if stall is not None and stall[0] == started else []
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(elapsed * 1000, 1),
+            "session_id": session_id,
+            "tool": tool,
+            "callback": repr(handle),
+            "stack": stack,
+        }
+        self.slow_callbacks.append(entry)
+        SLOW_CALLBACKS.inc(tool=tool or "")
+        logger.warning(
+            "Event loop blocked for %.0f ms (session %s, tool %s) at %s",
+            elapsed * 1000,
+            session_id or "-",
+            tool or "-",
+            stack[-1] if stack else entry["callback"],
+        )
+
+    def _watch(self) -> None:
+        # callback이 threshold보다 오래 실행 중이면 그 순간의 loop thread 스택을 기록
+        while not self._stop.wait(self.slow_callback / 2):
+            started = self._callback_started
+            if started is None or time.perf_counter() - started < self.slow_callback:
+                continue
+            if self._stall is not None and self._stall[0] == started:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stall = (started, thread_stack(frame))
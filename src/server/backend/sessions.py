@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import logging
+import secrets
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Callable, Deque, Dict, Tuple
+
+from langchain_openai_voice import OpenAIVoiceReactAgent, codec
+from langchain_openai_voice.metrics import REGISTRY, Counter
+from langchain_openai_voice.tracing import SESSION_ID
+from langchain_openai_voice.utils import sniff_event_type
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from server.backend.broadcast import BroadcastHub
+from server.backend.utils import Message, send_message, websocket_stream
+
+logger = logging.getLogger(__name__)
+
+RESUMES = REGISTRY.register(
+    Counter(
+        "voice_session_resumes",
+        "Browser reconnects that asked to resume a conversation.",
+        ["result"],
+    )
+)
+
+# 브라우저가 정상 종료(1000)한 경우에만 대화를 바로 끝내고,
+# 그 외의 끊김은 grace period 동안 upstream 연결과 agent 상태를 유지함
+NORMAL_CLOSURE = 1000
+# 다른 연결이 대화를 이어받아서 이전 연결을 닫을 때의 close code
+RESUMED_ELSEWHERE = 4000
+ACK_EVENT = "session.ack"
+
+
+def _ack_seq(message: str) -> int | None:
+    try:
+        seq = codec.loads(message).get("seq", 0)
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(seq, int) or isinstance(seq, bool) or seq < 0:
+        return None
+    return seq
+
+
+class ResumableSession:
+    def __init__(
+        self,
+        token: str,
+        agent: OpenAIVoiceReactAgent,
+        encode: Callable[[str], Message] | None,
+        grace_period: float,
+        buffer_bytes: int,
+        on_close: Callable[["ResumableSession"], None],
+    ) -> None:
+        self.token = token
+        self.agent = agent
+        self.encode = encode
+        self.binary_audio = encode is not None
+        self.grace_period = grace_period
+        self.buffer_bytes = buffer_bytes
+        self._on_close = on_close
+        self._inbox: asyncio.Queue[str] = asyncio.Queue(256)
+        # 브라우저로 보낸 메시지를 (seq, message)로 보관하는 ring buffer
+        self._buffer: Deque[Tuple[int, Message]] = deque()
+        self._buffered_bytes = 0
+        self._next_seq = 0
+        self._websocket: WebSocket | None = None
+        self._expiry: asyncio.TimerHandle | None = None
+        self.task: asyncio.Task | None = None
+        # 통화를 듣기만 하는 websocket들 (감독, QA)
+        self.listeners = BroadcastHub()
+
+    def start(self) -> None:
+        # 대화를 실행하는 task 자체도 이 세션의 것으로 표시 (loop monitor)
+        context = contextvars.copy_context()
+        context.run(SESSION_ID.set, self.agent.session_id)
+        self.task = context.run(
+            asyncio.create_task,
+            self.agent.aconnect(self._input_stream(), self.send),
+            name=f"session:{self.agent.session_id}",
+        )
+        self.task.add_done_callback(self._finished)
+
+    async def _input_stream(self) -> AsyncIterator[str]:
+        # 브라우저 소켓이 바뀌어도 agent 입장에서는 하나의 입력 스트림
+        while True:
+            yield await self._inbox.get()
+
+    async def send(self, chunk: str) -> None:
+        message = self.encode(chunk) if self.encode is not None else chunk
+        seq = self._next_seq
+        self._next_seq += 1
+        if self.grace_period > 0:
+            self._buffer.append((seq, message))
+            self._buffered_bytes += len(message)
+            while self._buffered_bytes > self.buffer_bytes and len(self._buffer) > 1:
+                _, dropped = self._buffer.popleft()
+                self._buffered_bytes -= len(dropped)
+        self.listeners.publish(message)
+        websocket = self._websocket
+        if websocket is None:
+            return
+        try:
+            await send_message(websocket, message)
+        except Exception:
+            # 보내지 못한 메시지는 buffer에 남아 있으므로 재연결 시 다시 전송됨
+            self.detach(websocket)
+
+    def acknowledge(self, seq: int) -> None:
+        # 브라우저가 받았다고 확인한 메시지는 더 이상 보관하지 않음
+        while self._buffer and self._buffer[0][0] < seq:
+            _, dropped = self._buffer.popleft()
+            self._buffered_bytes -= len(dropped)
+
+    async def attach(
+        self, websocket: WebSocket, last_seq: int, configured: Dict
+    ) -> int:
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        previous, self._websocket = self._websocket, None
+        if previous is not None and previous is not websocket:
+            # 이전 연결이 반쯤 열린 채 남아 있어도 두 연결이 같은 대화에 입력하지 않도록 닫음
+            try:
+                await previous.close(code=RESUMED_ELSEWHERE)
+            except Exception as e:
+                logger.info("Failed to close the previous connection: %s", e)
+        last_seq = max(0, min(last_seq, self._next_seq))
+        self.acknowledge(last_seq)
+        start = self._buffer[0][0] if self._buffer else self._next_seq
+        seq = start = max(start, last_seq)
+        if start > last_seq:
+            logger.warning("Lost %d messages while disconnected", start - last_seq)
+        await websocket.send_json({**configured, "seq": start})
+        # replay 중에 새로 쌓인 메시지까지 보낸 뒤에 소켓을 연결해야 순서가 유지됨
+        while seq < self._next_seq:
+            first = self._buffer[0][0] if self._buffer else self._next_seq
+            seq = max(seq, first)
+            for seq, message in list(islice(self._buffer, seq - first, None)):
+                await send_message(websocket, message)
+                seq += 1
+        self._websocket = websocket
+        return seq - start
+
+    def detach(self, websocket: WebSocket) -> None:
+        if self._websocket is not websocket:
+            return
+        self._websocket = None
+        if self.task is None or self.task.done():
+            return
+        if self.grace_period <= 0:
+            self.close()
+            return
+        logger.info(
+            "Browser disconnected, keeping session for %.0f s", self.grace_period
+        )
+        self._expiry = asyncio.get_running_loop().call_later(
+            self.grace_period, self.close
+        )
+
+    def close(self) -> None:
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        if self.task is not None:
+            self.task.cancel()
+
+    async def serve(self, websocket: WebSocket) -> None:
+        pump = asyncio.create_task(self._pump(websocket))
+        try:
+            await asyncio.wait({pump, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            pump.cancel()
+
+    async def _pump(self, websocket: WebSocket) -> None:
+        try:
+            async for message in websocket_stream(websocket):
+                if sniff_event_type(message) == ACK_EVENT:
+                    seq = _ack_seq(message)
+                    if seq is None:
+                        logger.warning("Ignoring malformed %s", ACK_EVENT)
+                    else:
+                        self.acknowledge(seq)
+                    continue
+                await self._inbox.put(message)
+        except WebSocketDisconnect as e:
+            if self._websocket is not websocket:
+                # 이미 다른 소켓으로 재연결된 경우
+                return
+            if e.code == NORMAL_CLOSURE:
+                self.close()
+            else:
+                self.detach(websocket)
+        except Exception as e:
+            # 소켓을 더 읽을 수 없으면 끊긴 것으로 보고 재연결을 기다림
+            logger.warning("Error reading from browser: %s", e)
+            self.detach(websocket)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        self._buffer.clear()
+        self.listeners.close()
+        self._on_close(self)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Session ended with an error: %s", task.exception())
+
+
+class SessionRegistry:
+    def __init__(self, grace_period: float, buffer_bytes: int) -> None:
+        self.grace_period = grace_period
+        self.buffer_bytes = buffer_bytes
+        self._sessions: Dict[str, ResumableSession] = {}
+
+    def create(
+        self,
+        agent: OpenAIVoiceReactAgent,
+        encode: Callable[[str], Message] | None = None,
+    ) -> ResumableSession:
+        session = ResumableSession(
+            secrets.token_urlsafe(16),
+            agent,
+            encode,
+            grace_period=self.grace_period,
+            buffer_bytes=self.buffer_bytes,
+            on_close=lambda s: self._sessions.pop(s.token, None),
+        )
+        self._sessions[session.token] = session
+        return session
+
+    def get(self, token: str | None) -> ResumableSession | None:
+        if not token or self.grace_period <= 0:
+            return None
+        return self._sessions.get(token)
+
+    def find(self, session_id: str) -> ResumableSession | None:
+        # resume token은 비밀이므로, 듣기용으로는 공개된 session_id로 찾음
+        for session in self._sessions.values():
+            if session.agent.session_id == session_id:
+                return session
+        return None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def aclose(self) -> None:
+        sessions = list(self._sessions.values())
+        for session in sessions:
+            session.close()
+        await asyncio.gather(
+            *(s.task for s in sessions if s.task is not None), return_exceptions=True
+        )
@@ -0,0 +1,196 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parents[1] / "static"
+STATIC_PREFIX = "/static/"
+
+# 압축해서 보낼 media type (이미지 등은 이미 압축되어 있음)
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+# 다른 asset을 가리키는 URL: "/static/..." (HTML, CSS, JS) 와 JS의 상대 경로 import
+ABSOLUTE_REFERENCE = re.compile(r"""(?<=["'(])/static/[^"'()?#\s]+(?=["')])""")
+RELATIVE_IMPORT = re.compile(
+    r"""(?<=\bfrom\s["'])\.{1,2}/[^"'?#]+(?=["'])|"""
+    r"""(?<=\bimport\(["'])\.{1,2}/[^"'?#]+(?=["'])"""
+)
+
+# 개발 모드에서 파일 변경을 확인하는 간격 (초)
+RELOAD_CHECK_S = 0.5
+
+
+class Asset:
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.body = body
+        self.media_type = media_type
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        # content-encoding -> 압축된 body (원본보다 작은 경우만)
+        self.encoded: Dict[str, bytes] = {}
+        if media_type.split(";")[0] not in COMPRESSIBLE_TYPES:
+            return
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.encoded["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.encoded["br"] = compressed
+
+    def etag(self, encoding: str | None) -> str:
+        # 같은 내용이라도 인코딩마다 다른 표현이므로 ETag를 구분
+        return f'"{self.version}-{encoding}"' if encoding else f'"{self.version}"'
+
+
+def _media_type(path: str) -> str:
+    if path.endswith((".js", ".mjs")):
+        media_type = "text/javascript"
+    else:
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/json":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+# static 디렉터리의 파일을 시작할 때 한 번 읽어서 압축해 두고 메모리에서 제공
+# HTML/CSS/JS 안의 다른 asset URL에는 내용 hash(?v=...)를 붙여서, 내용이 바뀌면 URL도
+# 바뀌도록 함 (그래서 ?v=가 맞는 요청은 immutable로 캐시할 수 있음)
+# reload=True(개발 모드)이면 watch()가 event loop 밖에서 변경을 확인하고 다시 읽음
+class StaticAssets:
+    def __init__(self, directory: Path = STATIC_DIR, reload: bool = False) -> None:
+        self.directory = directory
+        self.reload = reload
+        self._assets: Dict[str, Asset] | None = None
+        self._mtimes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        started = time.perf_counter()
+        mtimes = self._scan()
+        sources = {
+            path: (self.directory / path).read_bytes() for path in sorted(mtimes)
+        }
+        assets: Dict[str, Asset] = {}
+        for path in sources:
+            self._build(path, sources, assets, set())
+        with self._lock:
+            self._assets = assets
+            self._mtimes = mtimes
+        logger.info(
+            "Loaded %d static assets (%d KB) in %.0f ms",
+            len(assets),
+            sum(len(asset.body) for asset in assets.values()) // 1024,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def get(self, path: str) -> Asset | None:
+        if self._assets is None:
+            # 보통은 lifespan에서 미리 읽어 둠
+            self.load()
+        return self._assets.get(path)
+
+    def url(self, path: str) -> str:
+        asset = self.get(path)
+        url = STATIC_PREFIX + path
+        return f"{url}?v={asset.version}" if asset is not None else url
+
+    def refresh(self) -> None:
+        # 파일이 바뀌었으면 다시 읽음 (blocking, to_thread로 실행)
+        with self._lock:
+            if self._assets is not None and self._scan() == self._mtimes:
+                return
+        self.load()
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(RELOAD_CHECK_S)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except (OSError, UnicodeDecodeError):
+                logger.exception("Failed to reload static assets")
+
+    def _scan(self) -> Dict[str, int]:
+        mtimes = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            for name in files:
+                if name.startswith("."):
+                    continue
+                full = os.path.join(root, name)
+                path = os.path.relpath(full, self.directory).replace(os.sep, "/")
+                mtimes[path] = os.stat(full).st_mtime_ns
+        return mtimes
+
+    def _build(
+        self,
+        path: str,
+        sources: Dict[str, bytes],
+        assets: Dict[str, Asset],
+        building: Set[str],
+    ) -> Asset:
+        asset = assets.get(path)
+        if asset is not None:
+            return asset
+        media_type = _media_type(path)
+        body = sources[path]
+        if media_type.startswith(("text/html", "text/css", "text/javascript")):
+            # 참조하는 asset을 먼저 만들어야 그 hash를 URL에 넣을 수 있음
+            building.add(path)
+            body = self._fingerprint(path, body, sources, assets, building)
+            building.discard(path)
+        asset = assets[path] = Asset(body, media_type)
+        return asset
+
+    def _fingerprint(
+        self,
+        path: str,
+        body: bytes,
+        sources: Dict[str, bytes],
+        assets: Dict[str, Asset],
+        building: Set[str],
+    ) -> bytes:
+        text = body.decode("utf-8")
+        replacements: List[Tuple[re.Pattern, bool]] = [(ABSOLUTE_REFERENCE, False)]
+        if path.endswith(".js"):
+            replacements.append((RELATIVE_IMPORT, True))
+
+        for pattern, relative in replacements:
+
+            def versioned(match: re.Match, relative: bool = relative) -> str:
+                url = match.group(0)
+                if relative:
+                    target = posixpath.normpath(
+                        posixpath.join(posixpath.dirname(path), url)
+                    )
+                else:
+                    target = url[len(STATIC_PREFIX) :]
+                # 없는 파일이나 순환 참조는 그대로 둠
+                if target not in sources or target in building:
+                    return url
+                version = self._build(target, sources, assets, building).version
+                return f"{url}?v={version}"
+
+            text = pattern.sub(versioned, text)
+        return text.encode("utf-8")
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 모든 worker 프로세스가 공유하는 설정 저장소 (SQLite WAL)
+# 값은 메모리에 캐시해 두고, 다른 프로세스의 변경은 PRAGMA data_version으로 감지함
+STORE_PATH = os.environ.get("VOICE_STATE_DB", "voice_state.sqlite3")
+
+
+class SettingsStore:
+    def __init__(self, path: str = STORE_PATH, poll_interval: float = 0.5) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._values: Dict[str, str] = {}
+        self._listeners: List[Callable[[Dict[str, str]], None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._values = self._load(self._conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        return dict(conn.execute("SELECT key, value FROM settings"))
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        # 캐시에서 바로 읽으므로 event loop에서 호출해도 I/O가 없음
+        return self._values.get(key, default)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._write, key, value)
+
+    def _write(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (key, value, time.time()),
+            )
+            values = self._load(self._conn)
+        self._apply(values)
+
+    def subscribe(self, listener: Callable[[Dict[str, str]], None]) -> None:
+        # listener는 값이 바뀔 때마다 event loop에서 호출됨
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._watcher = threading.Thread(
+            target=self._watch, name="settings-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        self._conn.close()
+
+    def _watch(self) -> None:
+        # data_version은 다른 connection이 commit할 때만 바뀌므로 별도 connection 사용
+        conn = self._connect()
+        try:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            while not self._stop.wait(self.poll_interval):
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    version = current
+                    self._apply(self._load(conn))
+        except sqlite3.Error:
+            logger.exception("Settings watcher stopped")
+        finally:
+            conn.close()
+
+    def _apply(self, values: Dict[str, str]) -> None:
+        if values == self._values:
+            return
+        if self._loop is None:
+            self._values = values
+            return
+        self._loop.call_soon_threadsafe(self._notify, values)
+
+    def _notify(self, values: Dict[str, str]) -> None:
+        if values == self._values:
+            return
+        self._values = values
+        for listener in self._listeners:
+            try:
+                listener(dict(values))
+            except Exception:
+                logger.exception("Settings listener failed")
@@ -1,8 +1,27 @@
 from typing import AsyncIterator
-from starlette.websockets import WebSocket
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from server.backend.audio_frames import decode_input_frame
+
+Message = str | bytes
+
+
+async def send_message(websocket: WebSocket, message: Message) -> None:
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_text(message)
 
 
 async def websocket_stream(websocket: WebSocket) -> AsyncIterator[str]:
     while True:
-        data = await websocket.receive_text()
-        yield data
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message["code"], message.get("reason"))
+        if message.get("bytes") is not None:
+            # 바이너리 PCM 프레임은 upstream으로 보낼 JSON 이벤트로 한 번만 변환
+            event = decode_input_frame(message["bytes"])
+            if event is not None:
+                yield event
+        else:
+            yield message["text"]
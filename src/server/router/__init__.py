@@ -1,3 +1,4 @@
 from .websocket import websocket_endpoint
 from .instructions import get_instructions, update_instructions
 from .home import homepage
+from .metrics import metrics
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import secrets
+
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from server.backend.loop_monitor import LoopMonitor
+
+# event loop 지연 감시. 느린 callback 감지는 모든 callback의 시간을 재므로
+# VOICE_SLOW_CALLBACK_MS를 지정했을 때만 사용 (기본값 0: lag만 기록)
+LOOP_MONITOR = LoopMonitor(
+    interval=float(os.environ.get("VOICE_LOOP_LAG_INTERVAL_MS", "250")) / 1000,
+    slow_callback=float(os.environ.get("VOICE_SLOW_CALLBACK_MS", "0")) / 1000,
+)
+
+# 관리용 API 토큰 (지정하지 않으면 /admin 사용 안 함)
+ADMIN_TOKEN = os.environ.get("VOICE_ADMIN_TOKEN")
+
+MAX_PROFILE_S = 30.0
+
+
+def authorized(request) -> bool:
+    if not ADMIN_TOKEN:
+        return False
+    header = request.headers.get("authorization", "")
+    token = header[7:] if header.lower().startswith("bearer ") else ""
+    token = token or request.query_params.get("token", "")
+    return secrets.compare_digest(token, ADMIN_TOKEN)
+
+
+def not_found() -> JSONResponse:
+    return JSONResponse({"status": "error", "message": "Not found"}, status_code=404)
+
+
+# 살아 있는 asyncio task의 스택을 세션별로, 최근의 느린 callback과 함께 반환
+async def tasks(request):
+    if not authorized(request):
+        return not_found()
+    return JSONResponse(
+        {
+            "loop": LOOP_MONITOR.stats(),
+            "sessions": LOOP_MONITOR.tasks_by_session(),
+            "slow_callbacks": list(LOOP_MONITOR.slow_callbacks),
+        }
+    )
+
+
+# event loop thread를 seconds초 동안 샘플링해서 flamegraph용 collapsed stack으로 반환
+async def profile(request):
+    if not authorized(request):
+        return not_found()
+    try:
+        seconds = min(float(request.query_params.get("seconds", "2")), MAX_PROFILE_S)
+        interval = float(request.query_params.get("interval_ms", "5")) / 1000
+        if seconds <= 0 or interval <= 0:
+            raise ValueError
+    except ValueError:
+        return JSONResponse(
+            {"status": "error", "message": "Invalid seconds or interval_ms"},
+            status_code=400,
+        )
+    samples = await asyncio.to_thread(LOOP_MONITOR.profile, seconds, interval)
+    if samples is None:
+        return JSONResponse(
+            {"status": "error", "message": "A profile is already running"},
+            status_code=409,
+        )
+    return PlainTextResponse(
+        "".join(f"{stack} {count}\n" for stack, count in samples.items())
+    )
@@ -1,7 +1,59 @@
-from starlette.responses import HTMLResponse
+import os
+
+from starlette.responses import Response
+
+from server.backend.static_assets import Asset, StaticAssets
+
+# VOICE_STATIC_RELOAD=1(개발용)이면 파일을 고쳤을 때 다시 읽음
+ASSETS = StaticAssets(reload=os.environ.get("VOICE_STATIC_RELOAD", "0") == "1")
+
+# ?v=가 현재 내용의 hash와 같으면 URL이 바뀌기 전까지 다시 요청할 필요가 없음
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def _accepted_encodings(header: str) -> set:
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def asset_response(request, asset: Asset, cache_control: str) -> Response:
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    encoding = next(
+        (e for e in ("br", "gzip") if e in asset.encoded and e in accepted), None
+    )
+    etag = asset.etag(encoding)
+    headers = {"Cache-Control": cache_control, "ETag": etag, "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        asset.encoded[encoding] if encoding else asset.body,
+        media_type=asset.media_type,
+        headers=headers,
+    )
 
 
 async def homepage(request):
-    with open("src/server/static/index.html") as f:
-        html = f.read()
-        return HTMLResponse(html)
+    # 새 버전의 asset URL이 바로 반영되도록 index.html은 매번 ETag로 확인
+    return asset_response(request, ASSETS.get("index.html"), REVALIDATE)
+
+
+async def static_asset(request):
+    asset = ASSETS.get(request.path_params["path"])
+    if asset is None:
+        return Response("Not Found", status_code=404, media_type="text/plain")
+    version = request.query_params.get("v")
+    cache_control = IMMUTABLE if version == asset.version else REVALIDATE
+    return asset_response(request, asset, cache_control)
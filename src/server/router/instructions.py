@@ -1,9 +1,18 @@
+import logging
+
 from starlette.responses import JSONResponse
 from langchain_openai_voice.prompt import INSTRUCTIONS
 
+logger = logging.getLogger(__name__)
+
+
+def current_instructions(app) -> str:
+    # 모든 worker가 공유하는 저장소의 값, 없으면 prompt.py의 기본값
+    return app.state.settings.get("instructions") or INSTRUCTIONS
+
 
 async def get_instructions(request):
-    return JSONResponse({"instructions": INSTRUCTIONS})
+    return JSONResponse({"instructions": current_instructions(request.app)})
 
 
 async def update_instructions(request):
@@ -11,9 +20,8 @@ async def update_instructions(request):
         data = await request.json()
         new_instructions = data.get("instructions")
         if new_instructions:
-            global INSTRUCTIONS
-            INSTRUCTIONS = new_instructions
-            print(f"Instructions updated: {INSTRUCTIONS}")  # 로그 추가
+            await request.app.state.settings.set("instructions", new_instructions)
+            logger.info("Instructions updated: %s", new_instructions)  # 로그 추가
             return JSONResponse(
                 {"status": "success", "message": "Instructions updated"}
             )
@@ -23,7 +31,7 @@ async def update_instructions(request):
                 status_code=400,
             )
     except Exception as e:
-        print(f"Error updating instructions: {str(e)}")  # 오류 로그 추가
+        logger.exception("Error updating instructions")  # 오류 로그 추가
         return JSONResponse(
             {"status": "error", "message": f"Server error: {str(e)}"}, status_code=500
         )
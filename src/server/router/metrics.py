@@ -0,0 +1,8 @@
+from langchain_openai_voice.metrics import REGISTRY
+from starlette.responses import PlainTextResponse
+
+
+async def metrics(request):
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,46 @@
+from starlette.responses import JSONResponse
+
+from server.router.admin import authorized, not_found
+from server.router.websocket import TRANSCRIPT_STORE
+
+
+# 저장된 지난 대화 목록 (최신순), before로 이전 페이지 조회
+# 대화 내용이 모두 보이므로 관리용 토큰(VOICE_ADMIN_TOKEN)이 필요
+async def list_sessions(request):
+    if not authorized(request):
+        return not_found()
+    if TRANSCRIPT_STORE is None:
+        return JSONResponse(
+            {"status": "error", "message": "Transcript storage is disabled"},
+            status_code=404,
+        )
+    try:
+        limit = min(int(request.query_params.get("limit", "50")), 500)
+        before = request.query_params.get("before")
+        before = float(before) if before else None
+    except ValueError:
+        return JSONResponse(
+            {"status": "error", "message": "Invalid limit or before"},
+            status_code=400,
+        )
+    # 아직 기록 중인 대화의 최근 내용까지 보이도록 먼저 flush
+    await TRANSCRIPT_STORE.flush()
+    sessions = await TRANSCRIPT_STORE.list_sessions(limit=limit, before=before)
+    return JSONResponse({"sessions": sessions})
+
+
+async def get_session(request):
+    if not authorized(request):
+        return not_found()
+    if TRANSCRIPT_STORE is None:
+        return JSONResponse(
+            {"status": "error", "message": "Transcript storage is disabled"},
+            status_code=404,
+        )
+    await TRANSCRIPT_STORE.flush()
+    session = await TRANSCRIPT_STORE.get_session(request.path_params["session_id"])
+    if session is None:
+        return JSONResponse(
+            {"status": "error", "message": "Session not found"}, status_code=404
+        )
+    return JSONResponse(session)
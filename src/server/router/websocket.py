@@ -1,35 +1,295 @@
+import asyncio
+import logging
+import os
+import secrets
+import time
+import uuid
+
 from langchain_openai_voice import OpenAIVoiceReactAgent
-from langchain_openai_voice.tools import TOOLS
-from server.backend.utils import websocket_stream
-from starlette.websockets import WebSocket
+from langchain_openai_voice.constants import DEFAULT_URL
+from langchain_openai_voice.context import ContextBudget
+from langchain_openai_voice.execution import ToolExecutionPools
+from langchain_openai_voice.recording import SessionRecorder
+from langchain_openai_voice.tool_cache import ToolResultCache
+from langchain_openai_voice.transcripts import TranscriptStore
+from langchain_openai_voice.tools import TOOL_CACHE_TTLS, TOOL_POLICIES, TOOLS
+from langchain_openai_voice.vad import SilenceGate
+from server.backend.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    SharedLeases,
+)
+from server.backend.audio_frames import BinaryAudioEncoder
+from server.backend.broadcast import Listener
+from server.backend.sessions import RESUMES, SessionRegistry
+from server.router.instructions import current_instructions
+from starlette.websockets import WebSocket, WebSocketDisconnect, WebSocketState
+
+logger = logging.getLogger(__name__)
+
+# 모든 세션이 공유하는 tool 결과 캐시 (VOICE_TOOL_CACHE_SIZE > 0 일 때만 사용)
+TOOL_CACHE = (
+    ToolResultCache(
+        max_entries=int(os.environ["VOICE_TOOL_CACHE_SIZE"]),
+        default_ttl=float(os.environ.get("VOICE_TOOL_CACHE_TTL", "300")),
+        ttl_by_tool=TOOL_CACHE_TTLS,
+    )
+    if int(os.environ.get("VOICE_TOOL_CACHE_SIZE", "0")) > 0
+    else None
+)
+
+# 동기/CPU 도구를 실행할 thread/process pool (모든 세션이 공유)
+TOOL_POOLS = ToolExecutionPools(
+    thread_pool_sizes={"default": int(os.environ.get("VOICE_TOOL_THREADS", "8"))},
+    process_pool_size=int(os.environ.get("VOICE_TOOL_PROCESSES", "2")),
+)
+
+# VOICE_TRANSCRIPT_DB가 지정되면 대화 내용(transcript), 도구 호출과 세션 정보를 SQLite에 저장
+TRANSCRIPT_STORE = (
+    TranscriptStore(path=os.environ["VOICE_TRANSCRIPT_DB"])
+    if os.environ.get("VOICE_TRANSCRIPT_DB")
+    else None
+)
+
+# VOICE_RECORD_DIR가 지정되면 세션마다 재생(replay) 가능한 기록 파일을 남김
+RECORD_DIR = os.environ.get("VOICE_RECORD_DIR")
+
+
+# 브라우저 재연결 시 이어서 사용할 수 있도록 대화를 잠시 유지 (VOICE_RESUME_GRACE_S=0이면 사용 안 함)
+RESUMABLE_SESSIONS = SessionRegistry(
+    grace_period=float(os.environ.get("VOICE_RESUME_GRACE_S", "30")),
+    buffer_bytes=int(os.environ.get("VOICE_RESUME_BUFFER_BYTES", str(2 * 1024 * 1024))),
+)
+
+
+# 진행 중인 대화를 듣기 위한 토큰 (지정하지 않으면 /ws/listen 사용 안 함)
+LISTEN_TOKEN = os.environ.get("VOICE_LISTEN_TOKEN")
+# 느린 listener에게 쌓아 둘 최대 오디오 메시지 수. 넘치면 오디오만 버림
+LISTEN_MAX_AUDIO = int(os.environ.get("VOICE_LISTEN_MAX_AUDIO", "50"))
+
+
+# 새 대화의 시작을 upstream 한도에 맞춰 제한 (VOICE_MAX_SESSIONS=0이면 동시 세션 수 제한 없음)
+# VOICE_ADMISSION_SHARED=1이면 VOICE_STATE_DB를 통해 모든 worker가 한도를 나눠 씀
+ADMISSION = AdmissionController(
+    max_sessions=int(os.environ.get("VOICE_MAX_SESSIONS", "0")),
+    max_queue=int(os.environ.get("VOICE_ADMISSION_QUEUE", "100")),
+    max_wait=float(os.environ.get("VOICE_ADMISSION_WAIT_S", "30")),
+    min_remaining_requests=int(os.environ.get("VOICE_MIN_REMAINING_REQUESTS", "1")),
+    min_remaining_tokens=int(os.environ.get("VOICE_MIN_REMAINING_TOKENS", "0")),
+    shared=SharedLeases()
+    if os.environ.get("VOICE_ADMISSION_SHARED", "0") == "1"
+    else None,
+)
+
+
+def create_recorder() -> SessionRecorder | None:
+    if not RECORD_DIR:
+        return None
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    return SessionRecorder(path=os.path.join(RECORD_DIR, name))
+
+
+# VOICE_VAD_THRESHOLD_DB가 지정되면 무음 마이크 프레임을 upstream으로 보내지 않음
+def create_silence_gate() -> SilenceGate | None:
+    if not os.environ.get("VOICE_VAD_THRESHOLD_DB"):
+        return None
+    return SilenceGate(
+        threshold_db=float(os.environ["VOICE_VAD_THRESHOLD_DB"]),
+        hangover_ms=float(os.environ.get("VOICE_VAD_HANGOVER_MS", "800")),
+        pre_roll_ms=float(os.environ.get("VOICE_VAD_PRE_ROLL_MS", "300")),
+    )
+
+
+# VOICE_CONTEXT_MAX_TOKENS가 지정되면 긴 대화에서 오래된 항목을 정리해서 응답 지연을 일정하게 유지
+def create_context_budget() -> ContextBudget | None:
+    if not os.environ.get("VOICE_CONTEXT_MAX_TOKENS"):
+        return None
+    return ContextBudget(
+        max_tokens=int(os.environ["VOICE_CONTEXT_MAX_TOKENS"]),
+        keep_recent=int(os.environ.get("VOICE_CONTEXT_KEEP_RECENT", "6")),
+        max_tool_output_chars=int(
+            os.environ.get("VOICE_CONTEXT_MAX_TOOL_OUTPUT_CHARS", "1000")
+        ),
+    )
+
+
+def create_agent(instructions: str, **kwargs) -> OpenAIVoiceReactAgent:
+    return OpenAIVoiceReactAgent(
+        model="gpt-4o-realtime-preview",
+        tools=TOOLS,
+        instructions=instructions,
+        url=os.environ.get("OPENAI_REALTIME_URL", DEFAULT_URL),
+        coalesce_max_bytes=int(os.environ.get("VOICE_COALESCE_MAX_BYTES", "0")),
+        coalesce_max_delay_ms=float(
+            os.environ.get("VOICE_COALESCE_MAX_DELAY_MS", "30")
+        ),
+        tool_cache=TOOL_CACHE,
+        tool_policies=TOOL_POLICIES,
+        tool_pools=TOOL_POOLS,
+        on_rate_limits=ADMISSION.observe_rate_limits,
+        transcript_store=TRANSCRIPT_STORE,
+        **kwargs,
+    )
 
 
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
 
+    lease = None
     try:
         initial_data = await websocket.receive_json()
 
-        instructions = initial_data.get("instructions")
-        if not instructions:
-            print("Using default instructions")
-            from langchain_openai_voice.prompt import INSTRUCTIONS
-
-            instructions = INSTRUCTIONS
+        resume_token = initial_data.get("resume_token")
+        session = RESUMABLE_SESSIONS.get(resume_token)
+        if session is not None:
+            RESUMES.inc(result="resumed")
+            logger.info("Resuming session from seq %s", initial_data.get("last_seq"))
+            last_seq = int(initial_data.get("last_seq", 0))
         else:
-            print(f"Using custom instructions: {instructions}")
+            if resume_token:
+                RESUMES.inc(result="expired")
+                logger.info("Resume token expired, starting a new session")
+            instructions = initial_data.get("instructions")
+            if not instructions:
+                logger.info("Using default instructions")
+                instructions = current_instructions(websocket.app)
+            else:
+                logger.info("Using custom instructions: %s", instructions)
 
-        browser_receive_stream = websocket_stream(websocket)
+            # upstream 한도에 여유가 생길 때까지 기다리고, 너무 오래 걸리면 거절
+            # 기다리는 동안 브라우저가 떠나면 대기열에서 빠짐 (그동안 받은 메시지는 버림)
+            admission = asyncio.create_task(
+                ADMISSION.acquire(
+                    on_queued=lambda position: websocket.send_json(
+                        {"type": "session.queued", "position": position}
+                    )
+                )
+            )
+            disconnected = asyncio.create_task(_wait_disconnect(websocket))
+            try:
+                await asyncio.wait(
+                    {admission, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                disconnected.cancel()
+                admission.cancel()
+                await asyncio.gather(admission, disconnected, return_exceptions=True)
+            if not disconnected.cancelled():
+                if not admission.cancelled() and admission.exception() is None:
+                    ADMISSION.release(admission.result())
+                logger.info("Browser left while waiting for a session slot")
+                return
+            try:
+                lease = admission.result()
+            except AdmissionRejected as e:
+                logger.info("Rejected new session: %s", e)
+                await websocket.send_json(
+                    {
+                        "type": "session.busy",
+                        "message": str(e),
+                        "retry_after": e.retry_after,
+                    }
+                )
+                return
 
-        agent = OpenAIVoiceReactAgent(
-            model="gpt-4o-realtime-preview",
-            tools=TOOLS,
-            instructions=instructions,
+            agent = create_agent(
+                instructions,
+                upstream_pool=getattr(websocket.app.state, "upstream_pool", None),
+                recorder=create_recorder(),
+                silence_gate=create_silence_gate(),
+                context_budget=create_context_budget(),
+            )
+            # 클라이언트가 요청한 경우에만 바이너리 오디오 프레임 사용 (구버전은 JSON 유지)
+            binary_audio = initial_data.get("binary_audio") is True
+            session = RESUMABLE_SESSIONS.create(
+                agent, BinaryAudioEncoder() if binary_audio else None
+            )
+            last_seq = 0
+
+        # seq: 이 메시지 다음에 오는 메시지의 번호 (브라우저는 이후 메시지 수를 세어 ack함)
+        await session.attach(
+            websocket,
+            last_seq,
+            {
+                "type": "session.configured",
+                "binary_audio": session.binary_audio,
+                "resume_token": session.token,
+                "session_id": session.agent.session_id,
+                "resumed": session.task is not None,
+            },
         )
+        if session.task is None:
+            session.start()
+            # 자리는 upstream 세션이 끝날 때 (재연결 대기 시간 포함) 반납
+            if lease is not None:
+                session.task.add_done_callback(
+                    lambda _, lease=lease: ADMISSION.release(lease)
+                )
+                lease = None
 
-        await agent.aconnect(browser_receive_stream, websocket.send_text)
+        await session.serve(websocket)
 
     except Exception as e:
-        print(f"Error in websocket_endpoint: {str(e)}")
+        logger.warning("Error in websocket_endpoint: %s", e)
+    finally:
+        # 대화를 시작하지 못했으면 자리를 바로 반납
+        if lease is not None:
+            ADMISSION.release(lease)
+        await _close(websocket)
+
+
+async def listen_endpoint(websocket: WebSocket):
+    token = websocket.query_params.get("token", "")
+    if not LISTEN_TOKEN or not secrets.compare_digest(token, LISTEN_TOKEN):
+        await websocket.close(code=1008)
+        return
+    # 대화는 그 대화를 연 worker에만 있음
+    session = RESUMABLE_SESSIONS.find(websocket.path_params["session_id"])
+    if session is None or session.task is None or session.task.done():
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    await websocket.send_json(
+        {
+            "type": "session.configured",
+            "binary_audio": session.binary_audio,
+            "session_id": session.agent.session_id,
+            "listener": True,
+        }
+    )
+    listener = Listener(websocket, max_audio=LISTEN_MAX_AUDIO)
+    serve = asyncio.create_task(session.listeners.serve(listener))
+    disconnected = asyncio.create_task(_wait_disconnect(websocket))
+    try:
+        # 대화가 끝나거나 (listener.close) listener가 연결을 끊을 때까지
+        await asyncio.wait({serve, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if serve.done() and serve.exception() is not None:
+            logger.info("Listener disconnected: %s", serve.exception())
     finally:
-        await websocket.close(code=1000)
+        listener.close()
+        disconnected.cancel()
+        await asyncio.gather(serve, disconnected, return_exceptions=True)
+    if not disconnected.cancelled():
+        return
+    await _close(websocket)
+
+
+async def _close(websocket: WebSocket, code: int = 1000) -> None:
+    # 브라우저가 이미 끊었거나 (재연결 등으로) 이미 닫은 연결은 다시 닫지 않음
+    if WebSocketState.DISCONNECTED in (
+        websocket.client_state,
+        websocket.application_state,
+    ):
+        return
+    try:
+        await websocket.close(code=code)
+    except (RuntimeError, WebSocketDisconnect):
+        pass
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    # 읽기 전용: 받은 메시지는 버리고 연결 종료만 확인
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
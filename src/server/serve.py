@@ -0,0 +1,53 @@
+import argparse
+import importlib.util
+import os
+from pathlib import Path
+
+import uvicorn
+
+# 운영용 실행 진입점: 여러 worker 프로세스로 실행하고, 설치되어 있으면 uvloop/httptools 사용
+# 지시사항 등 공유 설정은 VOICE_STATE_DB(SQLite)를 통해 모든 worker가 함께 봄
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the voice server with workers")
+    parser.add_argument("--host", default=os.environ.get("VOICE_HOST", "0.0.0.0"))
+    parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("VOICE_PORT", "3000"))
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("VOICE_WORKERS", str(os.cpu_count() or 1))),
+    )
+    parser.add_argument(
+        "--log-level", default=os.environ.get("VOICE_LOG_LEVEL", "info").lower()
+    )
+    args = parser.parse_args()
+
+    # worker 프로세스는 환경 변수를 물려받음
+    os.environ.setdefault("VOICE_DEBUG", "0")
+    os.environ.setdefault("VOICE_STATE_DB", str(ROOT / "voice_state.sqlite3"))
+    os.chdir(ROOT)
+
+    uvicorn.run(
+        "server.app:app",
+        app_dir=str(ROOT / "src"),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if installed("uvloop") else "asyncio",
+        http="httptools" if installed("httptools") else "h11",
+        ws="auto",
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -170,31 +170,29 @@ class App {
     async startAudio() {
         try {
             await this.audioManager.start();
-            this.webSocketManager.connect();
-            
-            await new Promise(resolve => {
-                const checkConnection = () => {
-                    if (this.webSocketManager.ws && this.webSocketManager.ws.readyState === WebSocket.OPEN) {
-                        resolve();
-                    } else {
-                        setTimeout(checkConnection, 100);
-                    }
-                };
-                checkConnection();
-            });
-            
-            const initialSettings = {
+            this.webSocketManager.initialSettings = {
                 type: 'initial_settings',
-                instructions: this.instructions
+                instructions: this.instructions,
+                binary_audio: true
             };
-            console.log('Sending initial settings:', initialSettings);
-            this.webSocketManager.sendJson(initialSettings);
+            console.log('Sending initial settings:', this.webSocketManager.initialSettings);
+            this.webSocketManager.connect();
             
+            this.webSocketManager.onAudioFrame = (pcmData) => {
+                this.audioManager.playPcm(pcmData);
+            };
+
             this.webSocketManager.onMessage = (data) => {
-                if (data.type === 'response.audio.delta') {
+                if (data.type === 'session.configured') {
+                    this.webSocketManager.binaryAudio = data.binary_audio === true;
+                } else if (data.type === 'response.audio.delta') {
                     this.audioManager.playAudio(data.delta);
                 } else if (data.type === 'transcript') {
                     this.chatManager.addMessage(data.sender, data.transcript);
+                } else if (data.type === 'session.queued') {
+                    this.chatManager.addMessage('system', `대기 중입니다 (${data.position}번째). 잠시만 기다려주세요.`);
+                } else if (data.type === 'session.busy') {
+                    this.chatManager.addMessage('system', `서버가 혼잡합니다. ${Math.ceil(data.retry_after)}초 후 다시 연결합니다.`);
                 } else if (data.type === 'error') {
                     console.error('오류 발생:', data.message);
                 } else if (data.type === 'unhandled_event') {
@@ -204,6 +202,7 @@ class App {
                     // AI 턴이 끝났을 때의 처리 (필요한 경우)
                 } else if (data.type === 'input_audio_buffer.speech_started') {
                     console.log('사용자 음성 입력 시작');
+                    this.audioManager.clearPlayback();
                 } else if (data.type === 'input_audio_buffer.speech_stopped') {
                     console.log('사용자 음성 입력 종료');
                 } else if (data.type === 'response.output_item.added') {
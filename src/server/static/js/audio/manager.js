@@ -23,10 +23,18 @@ export class AudioManager {
     playAudio(base64Audio) {
         const binary = atob(base64Audio);
         const bytes = Uint8Array.from(binary, c => c.charCodeAt(0));
-        const pcmData = new Int16Array(bytes.buffer);
+        this.playPcm(new Int16Array(bytes.buffer));
+    }
+
+    playPcm(pcmData) {
         this.player.play(pcmData);
     }
 
+    // 사용자가 말하기 시작하면 아직 재생되지 않은 응답 오디오를 버림
+    clearPlayback() {
+        this.player.stop();
+    }
+
     handleAudioData(data) {
         const uint8Array = new Uint8Array(data);
         this.appendToBuffer(uint8Array);
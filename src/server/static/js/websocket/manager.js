@@ -1,36 +1,127 @@
+// 바이너리 오디오 프레임 헤더: kind (u8), reserved (3 bytes), sequence (u32 LE)
+const FRAME_HEADER_SIZE = 8;
+const INPUT_AUDIO_FRAME = 1;
+const OUTPUT_AUDIO_FRAME = 2;
+// 받은 메시지 수를 이 간격마다 서버에 알려서 서버의 재전송 버퍼를 비움
+const ACK_INTERVAL = 50;
+
 export class WebSocketManager {
     constructor(url) {
         this.url = url;
         this.ws = null;
         this.onMessage = null;
+        this.onAudioFrame = null;
+        this.binaryAudio = false;
+        this.inputSequence = 0;
+        // 연결될 때마다 보내는 initial_settings (재연결 시 resume_token, last_seq 추가)
+        this.initialSettings = null;
+        this.resumeToken = null;
+        this.receivedSeq = 0;
+        this.ackedSeq = 0;
+        this.closing = false;
+        this.reconnectTimer = null;
+        // 서버가 바쁘다고 알려주면 retry_after초 뒤에 다시 연결
+        this.retryAfter = 0;
     }
 
     connect() {
-        this.ws = new WebSocket(this.url);
-        this.ws.onmessage = (event) => {
+        if (this.ws && this.ws.readyState <= WebSocket.OPEN) {
+            return;
+        }
+        clearTimeout(this.reconnectTimer);
+        this.reconnectTimer = null;
+        this.closing = false;
+        // 바이너리 모드는 서버가 session.configured로 확인해준 뒤에만 사용
+        this.binaryAudio = false;
+        this.inputSequence = 0;
+        const ws = new WebSocket(this.url);
+        this.ws = ws;
+        ws.binaryType = 'arraybuffer';
+        ws.onopen = () => {
+            if (!this.initialSettings) {
+                return;
+            }
+            const settings = {...this.initialSettings};
+            if (this.resumeToken) {
+                settings.resume_token = this.resumeToken;
+                settings.last_seq = this.receivedSeq;
+            }
+            ws.send(JSON.stringify(settings));
+        };
+        ws.onmessage = (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                this.countMessage();
+                this.handleBinaryFrame(event.data);
+                return;
+            }
             const data = JSON.parse(event.data);
+            if (data.type === 'session.configured') {
+                if (data.resume_token !== this.resumeToken) {
+                    this.resumeToken = data.resume_token || null;
+                }
+                if (!data.resumed && this.receivedSeq > 0) {
+                    console.warn('이전 대화를 이어가지 못해 새 대화를 시작합니다.');
+                }
+                this.receivedSeq = data.seq || 0;
+                this.ackedSeq = this.receivedSeq;
+            } else if (data.type === 'session.queued' || data.type === 'session.busy') {
+                // 대화가 시작되기 전의 메시지는 seq에 포함되지 않음
+                this.retryAfter = data.retry_after || 0;
+            } else {
+                this.countMessage();
+            }
             if (this.onMessage) {
                 this.onMessage(data);
             }
         };
 
-        this.ws.onclose = () => {
+        ws.onclose = (event) => {
+            if (this.ws === ws) {
+                this.ws = null;
+            }
+            if (this.closing) {
+                return;
+            }
+            if (event.code === 4000) {
+                // 다른 연결(다른 탭 등)이 이 대화를 이어받음, 다시 가져오지 않음
+                console.warn('다른 연결에서 대화를 이어받아 연결을 종료합니다.');
+                this.resumeToken = null;
+                return;
+            }
             console.log('WebSocket 연결이 닫혔습니다. 재연결 시도 중...');
-            setTimeout(() => this.connect(), 1000); // 1초 후 재연결 시도
+            // 1초 후 재연결 시도, 서버가 대화를 유지하고 있으면 이어서 진행
+            const delay = Math.max(1, this.retryAfter) * 1000;
+            this.retryAfter = 0;
+            this.reconnectTimer = setTimeout(() => this.connect(), delay);
         };
 
-        this.ws.onerror = (error) => {
+        ws.onerror = (error) => {
             console.error('WebSocket 오류:', error);
         };
     }
 
     disconnect() {
+        // 정상 종료(1000)하면 서버도 대화를 바로 정리함
+        this.closing = true;
+        clearTimeout(this.reconnectTimer);
+        this.reconnectTimer = null;
+        this.resumeToken = null;
+        this.receivedSeq = 0;
+        this.ackedSeq = 0;
         if (this.ws) {
-            this.ws.close();
+            this.ws.close(1000);
             this.ws = null;
         }
     }
 
+    countMessage() {
+        this.receivedSeq += 1;
+        if (this.receivedSeq - this.ackedSeq >= ACK_INTERVAL && this.isConnected()) {
+            this.ackedSeq = this.receivedSeq;
+            this.ws.send(JSON.stringify({type: 'session.ack', seq: this.receivedSeq}));
+        }
+    }
+
     isConnected() {
         return this.ws && this.ws.readyState === WebSocket.OPEN;
     }
@@ -44,8 +135,23 @@ export class WebSocketManager {
         }
     }
 
+    handleBinaryFrame(buffer) {
+        const kind = new DataView(buffer).getUint8(0);
+        if (kind === OUTPUT_AUDIO_FRAME && this.onAudioFrame) {
+            this.onAudioFrame(new Int16Array(buffer, FRAME_HEADER_SIZE));
+        }
+    }
+
     sendAudio(audioData) {
-        if (this.isConnected()) {
+        if (this.isConnected() && this.binaryAudio) {
+            const frame = new Uint8Array(FRAME_HEADER_SIZE + audioData.length);
+            const view = new DataView(frame.buffer);
+            view.setUint8(0, INPUT_AUDIO_FRAME);
+            view.setUint32(4, this.inputSequence, true);
+            this.inputSequence = (this.inputSequence + 1) >>> 0;
+            frame.set(audioData, FRAME_HEADER_SIZE);
+            this.ws.send(frame.buffer);
+        } else if (this.isConnected()) {
             const base64 = btoa(String.fromCharCode(...audioData));
             this.ws.send(JSON.stringify({type: 'input_audio_buffer.append', audio: base64}));
         } else {